@@ -2,24 +2,36 @@ from logging.config import fileConfig
 from sqlalchemy import engine_from_config, pool
 from alembic import context
 from app.database.base import Base
+import app.models.criatura  # noqa: F401 - registra as tabelas em Base.metadata
 from app.config.settings import DATABASE_URL
 import os
 
-# Carregar URL síncrona para o Alembic
-SYNC_DATABASE_URL = DATABASE_URL.replace("+aiosqlite", "").replace("+asyncpg", "")
-
 # Alembic config
 config = context.config
+
+# Carregar URL síncrona para o Alembic (a aplicação pode informar outra URL
+# ao executar as migrações na inicialização)
+SYNC_DATABASE_URL = config.attributes.get("database_url", DATABASE_URL).replace("+aiosqlite", "").replace("+asyncpg", "")
 if SYNC_DATABASE_URL:
     config.set_main_option("sqlalchemy.url", SYNC_DATABASE_URL)
 
 # Logging
-if config.config_file_name is not None:
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
     fileConfig(config.config_file_name)
 
 # Metadados (para autogenerate)
 target_metadata = Base.metadata
 
+# Tabelas do SQLite criadas apenas pelas migrações (índice FTS5 e tabelas
+# mantidas por triggers), sem modelo correspondente
+SQLITE_ONLY_TABLES = ("criaturas_fts", "criaturas_catalogo", "criaturas_estatisticas", "criaturas_eventos")
+
+def include_name(name, type_, parent_names) -> bool:
+    """Ignora no autogenerate as tabelas que não têm modelo SQLAlchemy."""
+    if type_ == "table":
+        return not name.startswith(SQLITE_ONLY_TABLES)
+    return True
+
 def run_migrations_offline() -> None:
     """Execução de migrações offline."""
     url = config.get_main_option("sqlalchemy.url")
@@ -28,6 +40,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_name=include_name,
     )
     with context.begin_transaction():
         context.run_migrations()
@@ -40,7 +53,7 @@ def run_migrations_online() -> None:
         poolclass=pool.NullPool,
     )
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(connection=connection, target_metadata=target_metadata, include_name=include_name)
         with context.begin_transaction():
             context.run_migrations()
 
@@ -0,0 +1,65 @@
+"""add criaturas versao
+
+Revision ID: 111fa7ed60d5
+Revises: 9a540f48055c
+Create Date: 2026-10-18 13:41:09.652380
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '111fa7ed60d5'
+down_revision: Union[str, Sequence[str], None] = '9a540f48055c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # O SQLite não aceita CURRENT_TIMESTAMP como default em ADD COLUMN, então a
+    # coluna é criada com um valor fixo e preenchida em seguida
+    op.add_column('criaturas', sa.Column('versao', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('criaturas', sa.Column('atualizado_em', sa.DateTime(), server_default='1970-01-01 00:00:00', nullable=False))
+    op.execute("UPDATE criaturas SET atualizado_em = CURRENT_TIMESTAMP")
+
+    # Versão do catálogo inteiro, usada no ETag da listagem. Uma única linha,
+    # incrementada por triggers a cada escrita em 'criaturas'.
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.execute(
+        """
+        CREATE TABLE criaturas_catalogo (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            versao INTEGER NOT NULL,
+            atualizado_em DATETIME NOT NULL
+        )
+        """
+    )
+    op.execute("INSERT INTO criaturas_catalogo (id, versao, atualizado_em) VALUES (1, 1, CURRENT_TIMESTAMP)")
+    for name, event in (("ai", "INSERT"), ("au", "UPDATE"), ("ad", "DELETE")):
+        op.execute(
+            f"""
+            CREATE TRIGGER criaturas_catalogo_{name} AFTER {event} ON criaturas BEGIN
+                UPDATE criaturas_catalogo SET versao = versao + 1, atualizado_em = CURRENT_TIMESTAMP WHERE id = 1;
+            END
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "sqlite":
+        op.drop_column('criaturas', 'atualizado_em')
+        op.drop_column('criaturas', 'versao')
+        return
+    for name in ("ai", "au", "ad"):
+        op.execute(f"DROP TRIGGER IF EXISTS criaturas_catalogo_{name}")
+    op.execute("DROP TABLE IF EXISTS criaturas_catalogo")
+    # DROP COLUMN nativo (SQLite 3.35+) em vez do modo batch, que recriaria a
+    # tabela e perderia as triggers do índice FTS5
+    op.execute("ALTER TABLE criaturas DROP COLUMN atualizado_em")
+    op.execute("ALTER TABLE criaturas DROP COLUMN versao")
@@ -0,0 +1,79 @@
+"""add criaturas estatisticas
+
+Revision ID: 4c2e9d8b7a13
+Revises: 111fa7ed60d5
+Create Date: 2026-10-18 16:05:42.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c2e9d8b7a13'
+down_revision: Union[str, Sequence[str], None] = '111fa7ed60d5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Contagem de criaturas por região e periculosidade, mantida por triggers na
+    # mesma transação de cada escrita em 'criaturas'. Atende o
+    # GET /criaturas/estatisticas sem um GROUP BY sobre a tabela inteira.
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.execute(
+        """
+        CREATE TABLE criaturas_estatisticas (
+            regiao VARCHAR(20) NOT NULL,
+            periculosidade INTEGER NOT NULL,
+            quantidade INTEGER NOT NULL,
+            PRIMARY KEY (regiao, periculosidade)
+        )
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO criaturas_estatisticas (regiao, periculosidade, quantidade)
+        SELECT regiao, periculosidade, COUNT(*) FROM criaturas GROUP BY regiao, periculosidade
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER criaturas_estatisticas_ai AFTER INSERT ON criaturas BEGIN
+            INSERT INTO criaturas_estatisticas (regiao, periculosidade, quantidade) VALUES (new.regiao, new.periculosidade, 1)
+                ON CONFLICT (regiao, periculosidade) DO UPDATE SET quantidade = quantidade + 1;
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER criaturas_estatisticas_ad AFTER DELETE ON criaturas BEGIN
+            UPDATE criaturas_estatisticas SET quantidade = quantidade - 1
+                WHERE regiao = old.regiao AND periculosidade = old.periculosidade;
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER criaturas_estatisticas_au AFTER UPDATE OF regiao, periculosidade ON criaturas
+        WHEN old.regiao IS NOT new.regiao OR old.periculosidade IS NOT new.periculosidade BEGIN
+            UPDATE criaturas_estatisticas SET quantidade = quantidade - 1
+                WHERE regiao = old.regiao AND periculosidade = old.periculosidade;
+            INSERT INTO criaturas_estatisticas (regiao, periculosidade, quantidade) VALUES (new.regiao, new.periculosidade, 1)
+                ON CONFLICT (regiao, periculosidade) DO UPDATE SET quantidade = quantidade + 1;
+        END
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for name in ("ai", "au", "ad"):
+        op.execute(f"DROP TRIGGER IF EXISTS criaturas_estatisticas_{name}")
+    op.execute("DROP TABLE IF EXISTS criaturas_estatisticas")
@@ -0,0 +1,28 @@
+"""add regiao periculosidade index
+
+Revision ID: 7cca627b8b65
+Revises: adaf09a759e6
+Create Date: 2026-10-18 10:12:41.318402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7cca627b8b65'
+down_revision: Union[str, Sequence[str], None] = 'adaf09a759e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_criaturas_regiao_periculosidade', 'criaturas', ['regiao', 'periculosidade'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_criaturas_regiao_periculosidade', table_name='criaturas')
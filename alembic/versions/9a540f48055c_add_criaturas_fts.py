@@ -0,0 +1,69 @@
+"""add criaturas fts
+
+Revision ID: 9a540f48055c
+Revises: 7cca627b8b65
+Create Date: 2026-10-18 11:03:27.904112
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a540f48055c'
+down_revision: Union[str, Sequence[str], None] = '7cca627b8b65'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Índice de texto completo do SQLite (FTS5) sobre 'nome' e 'lenda', com
+    # conteúdo externo: o texto continua apenas em 'criaturas' e as triggers
+    # mantêm o índice sincronizado.
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.execute(
+        """
+        CREATE VIRTUAL TABLE criaturas_fts USING fts5(
+            nome, lenda,
+            content='criaturas', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER criaturas_fts_ai AFTER INSERT ON criaturas BEGIN
+            INSERT INTO criaturas_fts(rowid, nome, lenda) VALUES (new.id, new.nome, new.lenda);
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER criaturas_fts_ad AFTER DELETE ON criaturas BEGIN
+            INSERT INTO criaturas_fts(criaturas_fts, rowid, nome, lenda) VALUES ('delete', old.id, old.nome, old.lenda);
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER criaturas_fts_au AFTER UPDATE OF nome, lenda ON criaturas BEGIN
+            INSERT INTO criaturas_fts(criaturas_fts, rowid, nome, lenda) VALUES ('delete', old.id, old.nome, old.lenda);
+            INSERT INTO criaturas_fts(rowid, nome, lenda) VALUES (new.id, new.nome, new.lenda);
+        END
+        """
+    )
+    op.execute("INSERT INTO criaturas_fts(criaturas_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.execute("DROP TRIGGER IF EXISTS criaturas_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS criaturas_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS criaturas_fts_ai")
+    op.execute("DROP TABLE IF EXISTS criaturas_fts")
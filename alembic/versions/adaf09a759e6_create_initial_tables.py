@@ -21,15 +21,6 @@ depends_on: Union[str, Sequence[str], None] = None
 def upgrade() -> None:
     """Upgrade schema."""
     # ### commands auto generated by Alembic - please adjust! ###
-    op.drop_index(op.f('ix_criaturas_nome'), table_name='criaturas')
-    op.drop_index(op.f('ix_criaturas_regiao'), table_name='criaturas')
-    op.drop_table('criaturas')
-    # ### end Alembic commands ###
-
-
-def downgrade() -> None:
-    """Downgrade schema."""
-    # ### commands auto generated by Alembic - please adjust! ###
     op.create_table('criaturas',
     sa.Column('id', sa.INTEGER(), nullable=False),
     sa.Column('nome', sa.VARCHAR(length=50), nullable=False),
@@ -39,5 +30,14 @@ def downgrade() -> None:
     sa.PrimaryKeyConstraint('id')
     )
     op.create_index(op.f('ix_criaturas_regiao'), 'criaturas', ['regiao'], unique=False)
-    op.create_index(op.f('ix_criaturas_nome'), 'criaturas', ['nome'], unique=1)
+    op.create_index(op.f('ix_criaturas_nome'), 'criaturas', ['nome'], unique=True)
+    # ### end Alembic commands ###
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.drop_index(op.f('ix_criaturas_nome'), table_name='criaturas')
+    op.drop_index(op.f('ix_criaturas_regiao'), table_name='criaturas')
+    op.drop_table('criaturas')
     # ### end Alembic commands ###
@@ -0,0 +1,50 @@
+"""add criaturas eventos
+
+Revision ID: e5b1c07d92fa
+Revises: 4c2e9d8b7a13
+Create Date: 2026-10-18 19:12:08.604311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b1c07d92fa'
+down_revision: Union[str, Sequence[str], None] = '4c2e9d8b7a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Outbox das alterações em 'criaturas', lido pelo GET /criaturas/eventos
+    # (SSE). As triggers que o preenchem não são criadas aqui: a aplicação as
+    # cria ou remove a cada início conforme EVENTS_ENABLED (ver
+    # 'set_outbox_triggers'). O AUTOINCREMENT garante que um ID de evento nunca
+    # é reaproveitado, mesmo depois que os eventos antigos são apagados.
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.execute(
+        """
+        CREATE TABLE criaturas_eventos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tipo VARCHAR(10) NOT NULL,
+            criatura_id INTEGER NOT NULL,
+            nome VARCHAR(50) NOT NULL,
+            versao INTEGER NOT NULL,
+            criado_em DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for name in ("ai", "au", "ad"):
+        op.execute(f"DROP TRIGGER IF EXISTS criaturas_eventos_{name}")
+    op.execute("DROP TABLE IF EXISTS criaturas_eventos")
@@ -0,0 +1,241 @@
+import asyncio
+import heapq
+import math
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Iterable, Sequence
+from app.exceptions.logger import logger
+from app.models.criatura import Criatura
+
+# Fronteiras de palavra dentro de um nome ("Saci-Pererê", "Mula sem cabeça")
+SEPARADORES = re.compile(r"[\s\-'’]+")
+
+def fold(texto: str) -> str:
+    """
+        Remove acentos e diferenças de maiúsculas/minúsculas: "Pererê" -> "perere".
+    """
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+def trigrams(folded: str) -> set[str]:
+    """
+        Trigramas de cada palavra, com dois espaços antes e um depois, como no
+        pg_trgm, para que o começo das palavras pese mais na similaridade.
+    """
+    resultado = set()
+    for palavra in SEPARADORES.split(folded):
+        if palavra:
+            texto = f"  {palavra} "
+            resultado.update(texto[i:i + 3] for i in range(len(texto) - 2))
+    return resultado
+
+class AutocompleteIndex:
+    """
+        Índice em memória dos nomes das criaturas para o autocomplete.
+
+        Os nomes, sem acentos e em minúsculas (ver 'fold'), ficam em listas
+        ordenadas: uma com o nome inteiro e outra com o nome a partir de cada
+        palavra seguinte ("perere" em "Saci-Pererê"). Uma busca por prefixo é
+        uma busca binária seguida da leitura das chaves vizinhas. Quando nenhum
+        nome começa pelo texto digitado, um índice invertido de trigramas
+        encontra os nomes parecidos (erros de digitação), ordenados pela
+        similaridade de Jaccard entre os trigramas.
+
+        O índice é um observador do 'CriaturaRepository': inserts, renomeações
+        e deletes o atualizam depois do commit, sem consultar o banco.
+    """
+    def __init__(self, similarity_threshold: float = 0.3) -> None:
+        self.__similarity_threshold = similarity_threshold
+        self.__reset()
+
+    def __reset(self) -> None:
+        self.__nomes: dict[int, str] = {}
+        self.__inteiros: list[tuple[str, int]] = []
+        self.__palavras: list[tuple[str, int]] = []
+        self.__trigramas: dict[str, set[int]] = {}
+        self.__tamanhos: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.__nomes)
+
+    @staticmethod
+    def __word_keys(folded: str) -> list[str]:
+        return [folded[m.end():] for m in SEPARADORES.finditer(folded) if m.end() < len(folded)]
+
+    def build(self, criaturas: Iterable[tuple[int, str]]) -> None:
+        """
+            Recria o índice a partir de pares (id, nome), ordenando cada lista
+            uma única vez em vez de inserir nome a nome.
+        """
+        self.__reset()
+        for id, nome in criaturas:
+            folded = fold(nome)
+            self.__nomes[id] = nome
+            self.__inteiros.append((folded, id))
+            self.__palavras.extend((chave, id) for chave in self.__word_keys(folded))
+            self.__add_trigrams(id, folded)
+        self.__inteiros.sort()
+        self.__palavras.sort()
+
+    def add(self, id: int, nome: str) -> None:
+        self.add_many([(id, nome)])
+
+    def add_many(self, criaturas: Iterable[tuple[int, str]]) -> None:
+        """
+            Adiciona (ou renomeia) vários pares (id, nome) de uma vez. Um
+            'insort' desloca a lista inteira a cada chave; com várias chaves
+            novas (um insert em lote), elas são intercaladas de uma vez (ver
+            '__merge'), com uma única cópia da lista por lote.
+        """
+        inteiros: list[tuple[str, int]] = []
+        palavras: list[tuple[str, int]] = []
+        for id, nome in criaturas:
+            atual = self.__nomes.get(id)
+            if atual == nome:
+                continue
+            if atual is not None:
+                self.remove(id)
+            folded = fold(nome)
+            self.__nomes[id] = nome
+            inteiros.append((folded, id))
+            palavras.extend((chave, id) for chave in self.__word_keys(folded))
+            self.__add_trigrams(id, folded)
+        for chaves, novas in ((self.__inteiros, inteiros), (self.__palavras, palavras)):
+            if len(novas) == 1:
+                insort(chaves, novas[0])
+            elif novas:
+                self.__merge(chaves, novas)
+
+    @staticmethod
+    def __merge(chaves: list[tuple[str, int]], novas: list[tuple[str, int]]) -> None:
+        """
+            Intercala 'novas' na lista ordenada 'chaves': a posição de cada uma
+            vem de uma busca binária a partir da anterior, e a lista é remontada
+            uma única vez, copiando os trechos entre elas.
+        """
+        novas.sort()
+        resultado: list[tuple[str, int]] = []
+        inicio = 0
+        for chave in novas:
+            fim = bisect_left(chaves, chave, inicio)
+            resultado.extend(chaves[inicio:fim])
+            resultado.append(chave)
+            inicio = fim
+        resultado.extend(chaves[inicio:])
+        chaves[:] = resultado
+
+    def remove(self, id: int) -> None:
+        nome = self.__nomes.pop(id, None)
+        if nome is None:
+            return
+        folded = fold(nome)
+        self.__discard(self.__inteiros, folded, id)
+        for chave in self.__word_keys(folded):
+            self.__discard(self.__palavras, chave, id)
+        for trigrama in trigrams(folded):
+            ids = self.__trigramas.get(trigrama)
+            if ids is not None:
+                ids.discard(id)
+                if not ids:
+                    del self.__trigramas[trigrama]
+        self.__tamanhos.pop(id, None)
+
+    @staticmethod
+    def __discard(chaves: list[tuple[str, int]], chave: str, id: int) -> None:
+        indice = bisect_left(chaves, (chave, id))
+        if indice < len(chaves) and chaves[indice] == (chave, id):
+            del chaves[indice]
+
+    def __add_trigrams(self, id: int, folded: str) -> None:
+        conjunto = trigrams(folded)
+        for trigrama in conjunto:
+            self.__trigramas.setdefault(trigrama, set()).add(id)
+        self.__tamanhos[id] = len(conjunto)
+
+    def search(self, termo: str, limit: int) -> list[tuple[int, str]]:
+        """
+            Retorna até 'limit' pares (id, nome): primeiro os nomes que começam
+            pelo termo, depois os que têm uma palavra começando por ele, em
+            ordem alfabética; sem nenhum dos dois, os nomes mais parecidos.
+        """
+        folded = fold(termo).strip()
+        if not folded or limit <= 0:
+            return []
+        ids: list[int] = []
+        for chaves in (self.__inteiros, self.__palavras):
+            indice = bisect_left(chaves, (folded,))
+            while indice < len(chaves) and len(ids) < limit:
+                chave, id = chaves[indice]
+                if not chave.startswith(folded):
+                    break
+                if id not in ids:
+                    ids.append(id)
+                indice += 1
+        if not ids:
+            ids = self.__similar(folded, limit)
+        return [(id, self.__nomes[id]) for id in ids]
+
+    def __similar(self, folded: str, limit: int) -> list[int]:
+        """
+            Nomes com similaridade c / (q + n - c) >= limite, em que c são os
+            trigramas em comum, q os da consulta e n os do nome. Como isso exige
+            c >= limite * q, um nome parecido aparece em pelo menos uma das
+            listas menos as ceil(limite * q) - 1 maiores: só as menores são
+            contadas, e as maiores apenas conferidas para os candidatos que
+            ainda podem atingir o limite.
+        """
+        limite = self.__similarity_threshold
+        listas = sorted((self.__trigramas.get(t, set()) for t in trigrams(folded)), key=len)
+        q = len(listas)
+        grandes = max(math.ceil(limite * q) - 1, 0)
+        pequenas, grandes = listas[:q - grandes], listas[q - grandes:]
+
+        comuns = Counter()
+        for ids in pequenas:
+            comuns.update(ids)
+        candidatos = []
+        for id, quantidade in comuns.items():
+            n = self.__tamanhos[id]
+            if quantidade + len(grandes) < limite * (q + n) / (1 + limite):
+                continue
+            quantidade += sum(id in ids for ids in grandes)
+            similaridade = quantidade / (q + n - quantidade)
+            if similaridade >= limite:
+                candidatos.append((-similaridade, self.__nomes[id], id))
+        return [id for _, _, id in heapq.nsmallest(limit, candidatos)]
+
+    def on_saved(self, criaturas: Sequence[Criatura]) -> None:
+        self.add_many((criatura.id, criatura.nome) for criatura in criaturas)
+
+    def on_deleted(self, ids: Sequence[int]) -> None:
+        for id in ids:
+            self.remove(id)
+
+async def load_autocomplete_index(index: AutocompleteIndex, repository) -> int:
+    """
+        Preenche o índice com os nomes lidos do banco em fluxo, apenas as
+        colunas 'id' e 'nome'. Retorna a versão do catálogo lida antes da
+        leitura, para que 'refresh_autocomplete_index' perceba escritas feitas
+        durante ela.
+    """
+    versao = (await repository.select_catalog_version()).versao
+    criaturas = [(id, nome) async for id, nome in repository.stream_all_rows(("id", "nome"))]
+    index.build(criaturas)
+    return versao
+
+async def refresh_autocomplete_index(index: AutocompleteIndex, repository, interval: float, versao: int) -> None:
+    """
+        Com vários workers, cada processo só vê as próprias escritas. A cada
+        'interval' segundos a versão do catálogo é conferida e, se mudou, o
+        índice é recriado a partir do banco.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            atual = (await repository.select_catalog_version()).versao
+            if atual != versao:
+                versao = await load_autocomplete_index(index, repository)
+        except Exception as e:
+            logger.error(f"Erro ao atualizar o índice do autocomplete: {e}")
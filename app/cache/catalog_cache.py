@@ -0,0 +1,119 @@
+import asyncio
+import gzip
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Hashable, Optional, Sequence
+from app.models.criatura import Criatura
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional
+    brotli = None
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+def compress_variants(raw: bytes) -> dict[str, bytes]:
+    """
+        O corpo sem compressão ("identity") e comprimido em gzip e, se o pacote
+        'brotli' estiver instalado, em br.
+    """
+    variantes = {"identity": raw, "gzip": gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)}
+    if brotli is not None:
+        variantes["br"] = brotli.compress(raw, quality=BROTLI_QUALITY)
+    return variantes
+
+class CatalogEntry:
+    """
+        Listagem completa já serializada, em cada codificação, com a versão do
+        catálogo lida antes da consulta (para o ETag) e o total de criaturas.
+    """
+    __slots__ = ("bodies", "versao", "atualizado_em", "total", "size", "expires_at")
+
+    def __init__(self, bodies: dict[str, bytes], versao: int, atualizado_em: datetime, total: int) -> None:
+        self.bodies = bodies
+        self.versao = versao
+        self.atualizado_em = atualizado_em
+        self.total = total
+        self.size = sum(len(body) for body in bodies.values())
+        self.expires_at = 0.0
+
+class CatalogCache:
+    """
+        Cache materializado de 'GET /criaturas/' sem filtros nem paginação: o
+        corpo fica pronto em bytes, sem compressão e comprimido, e um acerto não
+        consulta o banco nem passa pelo serializador JSON.
+
+        Há uma entrada por conjunto de campos ('fields='), despejadas na ordem
+        LRU quando a soma dos corpos passa de 'max_bytes'; uma listagem maior
+        que o limite sozinha não é guardada. Como o 'CriaturaCache', é um
+        observador do 'CriaturaRepository': qualquer escrita descarta todas as
+        entradas e incrementa 'generation', e uma entrada montada a partir de
+        uma leitura anterior à escrita é recusada. As entradas expiram após
+        'ttl' segundos, o que limita o atraso em ver escritas de outros
+        processos.
+    """
+    def __init__(self, max_bytes: int, ttl: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.__entries: OrderedDict[Hashable, CatalogEntry] = OrderedDict()
+        self.__max_bytes = max_bytes
+        self.__ttl = ttl
+        self.__clock = clock
+        self.__bytes = 0
+        # Uma única reconstrução por vez: as requisições que chegam durante ela
+        # esperam e recebem a entrada pronta
+        self.lock = asyncio.Lock()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self.__bytes
+
+    def get(self, key: Hashable, count: bool = True) -> Optional[CatalogEntry]:
+        """
+            Entrada válida de 'key', ou None. Com 'count=False' a consulta não
+            entra em 'hits'/'misses' (a segunda conferência, já sob o lock).
+        """
+        entry = self.__entries.get(key)
+        if entry is None or entry.expires_at <= self.__clock():
+            if entry is not None:
+                self.__remove(key)
+            if count:
+                self.misses += 1
+            return None
+        self.__entries.move_to_end(key)
+        if count:
+            self.hits += 1
+        return entry
+
+    def set(self, key: Hashable, entry: CatalogEntry, generation: int) -> None:
+        if generation != self.generation or entry.size > self.__max_bytes:
+            return
+        self.__remove(key)
+        entry.expires_at = self.__clock() + self.__ttl
+        self.__entries[key] = entry
+        self.__bytes += entry.size
+        while self.__bytes > self.__max_bytes:
+            _, oldest = self.__entries.popitem(last=False)
+            self.__bytes -= oldest.size
+
+    def clear(self) -> None:
+        self.__entries.clear()
+        self.__bytes = 0
+        self.generation += 1
+
+    def on_saved(self, criaturas: Sequence[Criatura]) -> None:
+        self.clear()
+
+    def on_deleted(self, ids: Sequence[int]) -> None:
+        self.clear()
+
+    def __remove(self, key: Hashable) -> None:
+        entry = self.__entries.pop(key, None)
+        if entry is not None:
+            self.__bytes -= entry.size
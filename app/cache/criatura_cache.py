@@ -0,0 +1,135 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional, Sequence
+from app.models.criatura import Criatura
+from app.schemas.criatura_schema import CriaturaResponse
+
+_MISSING = object()
+
+class CriaturaCache:
+    """
+        Cache em memória, limitado e com expiração, das buscas de uma única
+        criatura por ID e por nome.
+
+        As entradas são despejadas na ordem LRU quando o cache passa de
+        'max_size' e expiram após 'ttl' segundos. Buscas sem resultado também são
+        guardadas (cache negativo) por 'negative_ttl' segundos. O cache é um
+        observador do 'CriaturaRepository': inserts, updates e deletes invalidam
+        as entradas da criatura afetada, tanto pelo ID quanto pelos nomes.
+
+        Cada invalidação incrementa 'generation'. Quem lê do banco guarda a
+        geração antes da consulta e a repassa ao gravar o resultado; se uma
+        escrita aconteceu no meio tempo, o resultado (possivelmente antigo) é
+        descartado.
+    """
+    def __init__(
+        self,
+        max_size: int,
+        ttl: float,
+        negative_ttl: float,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.__entries: OrderedDict[Hashable, tuple[float, object]] = OrderedDict()
+        self.__keys_by_id: dict[int, set[Hashable]] = {}
+        self.__max_size = max_size
+        self.__ttl = ttl
+        self.__negative_ttl = negative_ttl
+        self.__clock = clock
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def id_key(id: int) -> tuple:
+        return ("id", id)
+
+    @staticmethod
+    def name_key(nome: str) -> tuple:
+        return ("nome", nome)
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def get(self, key: Hashable) -> tuple[bool, Optional[CriaturaResponse]]:
+        """
+            Retorna (encontrado, criatura). Uma entrada negativa retorna
+            (True, None): a criatura sabidamente não existe.
+        """
+        entry = self.__entries.get(key)
+        if entry is None or entry[0] <= self.__clock():
+            if entry is not None:
+                self.__remove(key)
+            self.misses += 1
+            return False, None
+        self.__entries.move_to_end(key)
+        self.hits += 1
+        value = entry[1]
+        return True, None if value is _MISSING else value
+
+    def set(self, criatura: CriaturaResponse, generation: int) -> None:
+        if generation != self.generation:
+            return
+        expires_at = self.__clock() + self.__ttl
+        for key in (self.id_key(criatura.id), self.name_key(criatura.nome)):
+            self.__put(key, (expires_at, criatura))
+            self.__keys_by_id.setdefault(criatura.id, set()).add(key)
+
+    def set_missing(self, key: Hashable, generation: int) -> None:
+        if generation != self.generation:
+            return
+        self.__put(key, (self.__clock() + self.__negative_ttl, _MISSING))
+
+    def clear(self) -> None:
+        self.__entries.clear()
+        self.__keys_by_id.clear()
+        self.generation += 1
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.__entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def on_saved(self, criaturas: Sequence[Criatura]) -> None:
+        self.generation += 1
+        for criatura in criaturas:
+            self.__invalidate_id(criatura.id)
+            # Remove entradas negativas do novo nome
+            self.__remove(self.name_key(criatura.nome))
+
+    def on_deleted(self, ids: Sequence[int]) -> None:
+        self.generation += 1
+        for id in ids:
+            self.__invalidate_id(id)
+
+    def __invalidate_id(self, id: int) -> None:
+        for key in self.__keys_by_id.pop(id, ()):
+            self.__entries.pop(key, None)
+        self.__entries.pop(self.id_key(id), None)
+
+    def __put(self, key: Hashable, entry: tuple[float, object]) -> None:
+        self.__remove(key)
+        self.__entries[key] = entry
+        while len(self.__entries) > self.__max_size:
+            oldest_key, oldest_entry = self.__entries.popitem(last=False)
+            self.__forget(oldest_key, oldest_entry)
+            self.evictions += 1
+
+    def __remove(self, key: Hashable) -> None:
+        entry = self.__entries.pop(key, None)
+        if entry is not None:
+            self.__forget(key, entry)
+
+    def __forget(self, key: Hashable, entry: tuple[float, object]) -> None:
+        """Remove a chave do índice reverso por ID da criatura armazenada."""
+        value = entry[1]
+        if value is _MISSING:
+            return
+        keys = self.__keys_by_id.get(value.id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.__keys_by_id[value.id]
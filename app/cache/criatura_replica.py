@@ -0,0 +1,365 @@
+import asyncio
+import sys
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, namedtuple
+from datetime import datetime
+from operator import attrgetter
+from typing import AsyncIterator, Callable, Iterable, Iterator, Optional, Sequence
+from app.config.settings import STREAM_YIELD_PER
+from app.exceptions.logger import logger
+from app.exceptions.repository_exceptions import EntityNotFoundError
+from app.models.criatura import Criatura
+from app.schemas.criatura_schema import CriaturaFiltro
+
+EstatisticaRow = namedtuple("EstatisticaRow", ["regiao", "periculosidade", "quantidade"])
+
+class CriaturaRecord:
+    """
+        Uma criatura na réplica: só os atributos, sem '__dict__' nem o estado
+        do ORM. A região é internada ('sys.intern'), então as criaturas de uma
+        mesma região apontam para a mesma string.
+    """
+    __slots__ = ("id", "nome", "regiao", "periculosidade", "lenda", "versao", "atualizado_em")
+
+    def __init__(
+        self,
+        id: int,
+        nome: str,
+        regiao: str,
+        periculosidade: int,
+        lenda: str,
+        versao: int,
+        atualizado_em: datetime
+    ) -> None:
+        self.id = id
+        self.nome = nome
+        self.regiao = sys.intern(regiao)
+        self.periculosidade = periculosidade
+        self.lenda = lenda
+        self.versao = versao
+        self.atualizado_em = atualizado_em
+
+    @classmethod
+    def from_criatura(cls, criatura) -> "CriaturaRecord":
+        return cls(*(getattr(criatura, campo) for campo in cls.__slots__))
+
+    def as_tuple(self) -> tuple:
+        return tuple(getattr(self, campo) for campo in self.__slots__)
+
+CAMPOS_REPLICA = CriaturaRecord.__slots__
+
+def row_getter(campos: Sequence[str]) -> Callable[[CriaturaRecord], tuple]:
+    # 'attrgetter' com um único campo devolve o valor, e não uma tupla
+    if len(campos) == 1:
+        campo = campos[0]
+        return lambda record: (getattr(record, campo),)
+    return attrgetter(*campos)
+
+class CriaturaReplica:
+    """
+        Cópia em memória da tabela 'criaturas', com índices por ID, nome,
+        região e periculosidade, que atende as leituras do 'CriaturaService'
+        sem consultar o banco.
+
+        Os métodos de leitura têm os mesmos nomes e retornos dos do
+        'CriaturaRepository' (listagem com filtro, ordenação e cursor, busca
+        por chave, contagem, estatísticas), para que o serviço use um ou outro
+        indistintamente. Cada índice ordenado é uma lista de chaves mantida com
+        'bisect': a listagem começa pela posição do cursor, e a contagem e as
+        estatísticas vêm de um contador por (região, periculosidade).
+
+        A réplica é um observador do 'CriaturaRepository': as escritas do
+        próprio processo são aplicadas depois do commit. A busca textual e a
+        versão do catálogo (ETag da listagem) continuam vindo do banco.
+    """
+    def __init__(self) -> None:
+        self.__reset()
+        self.__carga = asyncio.Lock()
+        # Escritas confirmadas durante uma carga, reaplicadas sobre ela
+        self.__durante_carga: Optional[list[Callable[[], None]]] = None
+        self.generation = 0
+        self.divergences = 0
+
+    def __reset(self) -> None:
+        self.__por_id: dict[int, CriaturaRecord] = {}
+        self.__por_nome: dict[str, CriaturaRecord] = {}
+        self.__ids: list[int] = []
+        self.__nomes: list[tuple[str, int]] = []
+        self.__por_regiao: dict[str, list[int]] = {}
+        self.__por_periculosidade: dict[int, list[int]] = {}
+        self.__contagem: Counter = Counter()
+
+    def __len__(self) -> int:
+        return len(self.__por_id)
+
+    def ids(self) -> list[int]:
+        return list(self.__ids)
+
+    def get(self, id: int) -> Optional[CriaturaRecord]:
+        return self.__por_id.get(id)
+
+    def build(self, records: Iterable[CriaturaRecord]) -> None:
+        """
+            Recria a réplica, ordenando cada índice uma única vez em vez de
+            inserir criatura a criatura.
+        """
+        self.__reset()
+        for record in records:
+            self.__por_id[record.id] = record
+            self.__por_nome[record.nome] = record
+            self.__por_regiao.setdefault(record.regiao, []).append(record.id)
+            self.__por_periculosidade.setdefault(record.periculosidade, []).append(record.id)
+            self.__contagem[(record.regiao, record.periculosidade)] += 1
+        self.__ids = sorted(self.__por_id)
+        self.__nomes = sorted((nome, record.id) for nome, record in self.__por_nome.items())
+        for ids in (*self.__por_regiao.values(), *self.__por_periculosidade.values()):
+            ids.sort()
+
+    async def load(self, repository) -> int:
+        """
+            Preenche a réplica com as criaturas lidas do banco em fluxo e
+            retorna a versão do catálogo lida antes da leitura. A réplica
+            anterior continua respondendo até a nova ficar pronta; as escritas
+            confirmadas no meio da leitura são reaplicadas sobre ela.
+        """
+        async with self.__carga:
+            self.__durante_carga = []
+            try:
+                versao = (await repository.select_catalog_version()).versao
+                records = [CriaturaRecord(*row) async for row in repository.stream_all_rows(CAMPOS_REPLICA)]
+                self.build(records)
+                for aplicar in self.__durante_carga:
+                    aplicar()
+            finally:
+                self.__durante_carga = None
+            self.generation += 1
+            return versao
+
+    def upsert(self, record: CriaturaRecord) -> None:
+        self.remove(record.id)
+        self.__por_id[record.id] = record
+        self.__por_nome[record.nome] = record
+        insort(self.__ids, record.id)
+        insort(self.__nomes, (record.nome, record.id))
+        insort(self.__por_regiao.setdefault(record.regiao, []), record.id)
+        insort(self.__por_periculosidade.setdefault(record.periculosidade, []), record.id)
+        self.__contagem[(record.regiao, record.periculosidade)] += 1
+
+    def remove(self, id: int) -> None:
+        record = self.__por_id.pop(id, None)
+        if record is None:
+            return
+        del self.__por_nome[record.nome]
+        self.__discard(self.__ids, id)
+        self.__discard(self.__nomes, (record.nome, id))
+        self.__discard(self.__por_regiao[record.regiao], id)
+        self.__discard(self.__por_periculosidade[record.periculosidade], id)
+        self.__contagem[(record.regiao, record.periculosidade)] -= 1
+
+    @staticmethod
+    def __discard(chaves: list, chave) -> None:
+        indice = bisect_left(chaves, chave)
+        if indice < len(chaves) and chaves[indice] == chave:
+            del chaves[indice]
+
+    def on_saved(self, criaturas: Sequence[Criatura]) -> None:
+        self.generation += 1
+        records = [CriaturaRecord.from_criatura(criatura) for criatura in criaturas]
+        self.__apply(lambda: [self.upsert(record) for record in records])
+
+    def on_deleted(self, ids: Sequence[int]) -> None:
+        self.generation += 1
+        ids = list(ids)
+        self.__apply(lambda: [self.remove(id) for id in ids])
+
+    def __apply(self, aplicar: Callable[[], None]) -> None:
+        aplicar()
+        if self.__durante_carga is not None:
+            self.__durante_carga.append(aplicar)
+
+    def __scan(self, filtro: Optional[CriaturaFiltro], after: Optional[Sequence]) -> Iterator[CriaturaRecord]:
+        """
+            Percorre as criaturas que atendem ao filtro na ordem pedida, a
+            partir da chave 'after' (exclusiva), como o keyset da consulta do
+            repositório. O percurso é síncrono: nenhuma escrita altera os
+            índices no meio dele.
+        """
+        filtro = filtro or CriaturaFiltro()
+        desc = filtro.ordem_decrescente
+        regiao = filtro.regiao.value if filtro.regiao is not None else None
+        minimo = filtro.periculosidade_min or 0
+        maximo = filtro.periculosidade_max or sys.maxsize
+
+        if filtro.campo_ordenacao == "nome":
+            ids = (id for _, id in self.__seek(self.__nomes, tuple(after) if after else None, desc))
+        elif filtro.campo_ordenacao == "periculosidade":
+            ids = self.__scan_periculosidade(minimo, maximo, after, desc)
+        else:
+            base = self.__por_regiao.get(regiao, []) if regiao is not None else self.__ids
+            ids = self.__seek(base, after[0] if after else None, desc)
+
+        for id in ids:
+            record = self.__por_id[id]
+            if (regiao is None or record.regiao == regiao) and minimo <= record.periculosidade <= maximo:
+                yield record
+
+    def __scan_periculosidade(self, minimo: int, maximo: int, after: Optional[Sequence], desc: bool) -> Iterator[int]:
+        niveis = sorted((n for n in self.__por_periculosidade if minimo <= n <= maximo), reverse=desc)
+        for nivel in niveis:
+            if after is not None and (nivel > after[0] if desc else nivel < after[0]):
+                continue
+            inicio = after[1] if after is not None and nivel == after[0] else None
+            yield from self.__seek(self.__por_periculosidade[nivel], inicio, desc)
+
+    @staticmethod
+    def __seek(chaves: list, after, desc: bool) -> Iterator:
+        if desc:
+            fim = len(chaves) if after is None else bisect_left(chaves, after)
+            return (chaves[i] for i in range(fim - 1, -1, -1))
+        inicio = 0 if after is None else bisect_right(chaves, after)
+        return (chaves[i] for i in range(inicio, len(chaves)))
+
+    def __page(self, filtro: Optional[CriaturaFiltro], limit: Optional[int], after: Optional[Sequence]) -> list[CriaturaRecord]:
+        scan = self.__scan(filtro, after)
+        if limit is None:
+            return list(scan)
+        return [record for record, _ in zip(scan, range(limit))]
+
+    async def select_all(
+        self,
+        filtro: Optional[CriaturaFiltro] = None,
+        limit: Optional[int] = None,
+        after: Optional[Sequence] = None
+    ) -> list[CriaturaRecord]:
+        return self.__page(filtro, limit, after)
+
+    async def select_all_rows(
+        self,
+        campos: Sequence[str],
+        filtro: Optional[CriaturaFiltro] = None,
+        limit: Optional[int] = None,
+        after: Optional[Sequence] = None
+    ) -> list[tuple]:
+        return list(map(row_getter(campos), self.__page(filtro, limit, after)))
+
+    async def stream_all(self, filtro: Optional[CriaturaFiltro] = None, after: Optional[Sequence] = None) -> AsyncIterator[CriaturaRecord]:
+        """
+            As criaturas são separadas de uma vez (uma lista de referências) e
+            entregues em blocos de 'STREAM_YIELD_PER', devolvendo o event loop
+            entre um bloco e outro.
+        """
+        records = self.__page(filtro, None, after)
+        for inicio in range(0, len(records), STREAM_YIELD_PER):
+            for record in records[inicio:inicio + STREAM_YIELD_PER]:
+                yield record
+            await asyncio.sleep(0)
+
+    async def stream_all_rows(
+        self,
+        campos: Sequence[str],
+        filtro: Optional[CriaturaFiltro] = None,
+        after: Optional[Sequence] = None
+    ) -> AsyncIterator[tuple]:
+        getter = row_getter(campos)
+        async for record in self.stream_all(filtro, after):
+            yield getter(record)
+
+    async def count(self, filtro: Optional[CriaturaFiltro] = None) -> int:
+        filtro = filtro or CriaturaFiltro()
+        regiao = filtro.regiao.value if filtro.regiao is not None else None
+        minimo = filtro.periculosidade_min or 0
+        maximo = filtro.periculosidade_max or sys.maxsize
+        return sum(
+            quantidade for (r, nivel), quantidade in self.__contagem.items()
+            if (regiao is None or r == regiao) and minimo <= nivel <= maximo
+        )
+
+    async def select_statistics(self) -> list[EstatisticaRow]:
+        return [
+            EstatisticaRow(regiao, nivel, quantidade)
+            for (regiao, nivel), quantidade in self.__contagem.items() if quantidade > 0
+        ]
+
+    async def select_by_id(self, id: int) -> CriaturaRecord:
+        record = self.__por_id.get(id)
+        if record is None:
+            raise EntityNotFoundError(f"Criatura com ID '{id}' não encontrada.")
+        return record
+
+    async def select_by_name(self, nome: str) -> CriaturaRecord:
+        record = self.__por_nome.get(nome)
+        if record is None:
+            raise EntityNotFoundError(f"Criatura com nome '{nome}' não encontrada.")
+        return record
+
+    async def select_row_by_id(self, id: int, campos: Sequence[str]) -> tuple:
+        return row_getter(campos)(await self.select_by_id(id))
+
+    async def select_row_by_name(self, nome: str, campos: Sequence[str]) -> tuple:
+        return row_getter(campos)(await self.select_by_name(nome))
+
+    async def select_rows_by_ids(self, ids: Sequence[int], campos: Sequence[str]) -> list[CriaturaRecord]:
+        # As criaturas inteiras servem como linhas: os campos são lidos por atributo
+        return [self.__por_id[id] for id in ids if id in self.__por_id]
+
+    async def select_rows_by_names(self, nomes: Sequence[str], campos: Sequence[str]) -> list[CriaturaRecord]:
+        return [self.__por_nome[nome] for nome in nomes if nome in self.__por_nome]
+
+    async def select_version_by_id(self, id: int) -> CriaturaRecord:
+        return await self.select_by_id(id)
+
+    async def select_version_by_name(self, nome: str) -> CriaturaRecord:
+        return await self.select_by_name(nome)
+
+async def find_divergences(replica: CriaturaReplica, repository) -> Optional[list[int]]:
+    """
+        Compara a réplica com o banco, linha a linha, e retorna os IDs que
+        diferem, faltam ou sobram na réplica. Retorna None se a réplica recebeu
+        uma escrita durante a comparação, que nesse caso não é conclusiva.
+    """
+    generation = replica.generation
+    divergentes = []
+    vistos = set()
+    async for row in repository.stream_all_rows(CAMPOS_REPLICA):
+        vistos.add(row.id)
+        record = replica.get(row.id)
+        if record is None or record.as_tuple() != tuple(row):
+            divergentes.append(row.id)
+    if replica.generation != generation:
+        return None
+    divergentes += [id for id in replica.ids() if id not in vistos]
+    return sorted(divergentes)
+
+async def refresh_replica(replica: CriaturaReplica, repository, interval: float, versao: int) -> None:
+    """
+        Com vários workers, cada processo só aplica as próprias escritas. A
+        cada 'interval' segundos a versão do catálogo é conferida e, se mudou,
+        a réplica é recarregada do banco.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            atual = (await repository.select_catalog_version()).versao
+            if atual != versao:
+                versao = await replica.load(repository)
+        except Exception as e:
+            logger.error(f"Erro ao atualizar a réplica em memória: {e}")
+
+async def check_replica(replica: CriaturaReplica, repository, interval: float) -> None:
+    """
+        Confere a réplica contra o banco a cada 'interval' segundos (ver
+        'find_divergences') e a recarrega se encontrar diferenças.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            divergentes = await find_divergences(replica, repository)
+            if divergentes:
+                replica.divergences += len(divergentes)
+                logger.error(
+                    f"Réplica em memória divergente do banco em {len(divergentes)} criaturas "
+                    f"(IDs {divergentes[:10]}); recarregando."
+                )
+                await replica.load(repository)
+        except Exception as e:
+            logger.error(f"Erro ao conferir a réplica em memória: {e}")
@@ -4,3 +4,112 @@ import os
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///database.db")
+
+# Pool de conexões da AsyncEngine compartilhada pela aplicação
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+# Como o schema é preparado na inicialização: "alembic" (upgrade head),
+# "create_all" (Base.metadata.create_all) ou "none" (nada é feito)
+SCHEMA_BOOTSTRAP = os.getenv("SCHEMA_BOOTSTRAP", "create_all")
+
+# Paginação por cursor e streaming NDJSON da listagem de criaturas
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", "100"))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "1000"))
+STREAM_YIELD_PER = int(os.getenv("STREAM_YIELD_PER", "500"))
+
+# Busca textual (FTS5) sobre nome e lenda
+SEARCH_LIMIT_DEFAULT = int(os.getenv("SEARCH_LIMIT_DEFAULT", "20"))
+SEARCH_LIMIT_MAX = int(os.getenv("SEARCH_LIMIT_MAX", "100"))
+
+# Cache em memória das buscas de uma criatura por ID e por nome
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", "1024"))
+CACHE_TTL = float(os.getenv("CACHE_TTL", "60"))
+CACHE_NEGATIVE_TTL = float(os.getenv("CACHE_NEGATIVE_TTL", "5"))
+
+
+# Criação em lote (POST /criaturas/bulk): linhas por INSERT e itens por requisição
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "50000"))
+
+# Métricas no formato do Prometheus em GET /metrics (requisições, consultas e pool)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Rastreamento de SQL por requisição (cabeçalhos X-DB-Queries e X-DB-Time) e
+# log das consultas acima de SLOW_QUERY_MS, com o plano de execução
+SQL_TRACE_ENABLED = os.getenv("SQL_TRACE_ENABLED", "false").lower() in ("1", "true", "yes")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+
+# Busca em lote (GET/POST /criaturas/lote): chaves por requisição e por consulta IN,
+# abaixo do limite de 999 parâmetros das versões antigas do SQLite
+LOTE_MAX_KEYS = int(os.getenv("LOTE_MAX_KEYS", "1000"))
+IN_CHUNK_SIZE = int(os.getenv("IN_CHUNK_SIZE", "500"))
+
+# Escritor único com commit em grupo (ver 'GroupCommitWriter'): escritas por
+# grupo, espera máxima pelo grupo após a primeira escrita e tamanho da fila
+WRITE_PIPELINE_ENABLED = os.getenv("WRITE_PIPELINE_ENABLED", "false").lower() in ("1", "true", "yes")
+WRITE_BATCH_MAX = int(os.getenv("WRITE_BATCH_MAX", "64"))
+WRITE_BATCH_DELAY_MS = float(os.getenv("WRITE_BATCH_DELAY_MS", "2"))
+WRITE_QUEUE_SIZE = int(os.getenv("WRITE_QUEUE_SIZE", "1024"))
+
+# Pool só de leitura (réplica ou o mesmo arquivo SQLite aberto com 'mode=ro') e
+# janela, em segundos, em que um cliente que acabou de escrever lê do primário
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL", "")
+READ_STICKY_SECONDS = float(os.getenv("READ_STICKY_SECONDS", "5"))
+
+# Servidor de produção (python -m app.server): processos, keep-alive e fila de
+# conexões do socket, tempo para concluir as requisições em andamento no
+# desligamento e log de acesso
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "1"))
+SERVER_KEEPALIVE = int(os.getenv("SERVER_KEEPALIVE", "15"))
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+SERVER_ACCESS_LOG = os.getenv("SERVER_ACCESS_LOG", "false").lower() in ("1", "true", "yes")
+
+# Abre as conexões do pool na inicialização, antes da primeira requisição
+DB_POOL_WARMUP = os.getenv("DB_POOL_WARMUP", "true").lower() in ("1", "true", "yes")
+
+# Autocomplete de nomes (GET /criaturas/autocomplete) servido por um índice em
+# memória; com vários workers, o índice é recriado a cada AUTOCOMPLETE_REFRESH_SECONDS
+# se outro processo alterou o catálogo (0 desliga)
+AUTOCOMPLETE_ENABLED = os.getenv("AUTOCOMPLETE_ENABLED", "true").lower() in ("1", "true", "yes")
+AUTOCOMPLETE_LIMIT_DEFAULT = int(os.getenv("AUTOCOMPLETE_LIMIT_DEFAULT", "10"))
+AUTOCOMPLETE_LIMIT_MAX = int(os.getenv("AUTOCOMPLETE_LIMIT_MAX", "50"))
+AUTOCOMPLETE_REFRESH_SECONDS = float(os.getenv("AUTOCOMPLETE_REFRESH_SECONDS", "0"))
+
+# Cache materializado da listagem completa (GET /criaturas/ sem filtros): corpo
+# pronto, sem compressão e comprimido, limitado a CATALOG_CACHE_MAX_BYTES no total
+CATALOG_CACHE_ENABLED = os.getenv("CATALOG_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CATALOG_CACHE_MAX_BYTES = int(os.getenv("CATALOG_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "60"))
+
+# Agrupamento das buscas por ID e por nome entre requisições concorrentes: as
+# chaves pedidas no mesmo ciclo do event loop, ou dentro de LOADER_WINDOW_US
+# microssegundos, viram uma única consulta IN (...)
+LOADER_ENABLED = os.getenv("LOADER_ENABLED", "true").lower() in ("1", "true", "yes")
+LOADER_WINDOW_US = int(os.getenv("LOADER_WINDOW_US", "0"))
+
+# Réplica em memória da tabela 'criaturas', que atende as leituras sem consultar
+# o banco; com vários workers, é recarregada a cada REPLICA_REFRESH_SECONDS se
+# outro processo alterou o catálogo, e conferida contra o banco a cada
+# REPLICA_CHECK_SECONDS (0 desliga cada um)
+REPLICA_ENABLED = os.getenv("REPLICA_ENABLED", "false").lower() in ("1", "true", "yes")
+REPLICA_REFRESH_SECONDS = float(os.getenv("REPLICA_REFRESH_SECONDS", "0"))
+REPLICA_CHECK_SECONDS = float(os.getenv("REPLICA_CHECK_SECONDS", "0"))
+
+# Feed de alterações (GET /criaturas/eventos, Server-Sent Events) lido do outbox
+# 'criaturas_eventos'. Desligado por padrão: ligado, cada escrita grava também
+# um evento. Intervalo de leitura do banco enquanto há assinantes, heartbeat,
+# fila por assinante (quem a enche é desconectado e reconecta), eventos recentes
+# em memória para as reconexões e quantos eventos o outbox guarda (no mínimo 1)
+EVENTS_ENABLED = os.getenv("EVENTS_ENABLED", "false").lower() in ("1", "true", "yes")
+EVENTS_POLL_SECONDS = float(os.getenv("EVENTS_POLL_SECONDS", "1"))
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "1000"))
+EVENTS_BUFFER_SIZE = int(os.getenv("EVENTS_BUFFER_SIZE", "10000"))
+EVENTS_RETENTION = int(os.getenv("EVENTS_RETENTION", "100000"))
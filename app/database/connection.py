@@ -1,42 +1,119 @@
-from app.database.base import Base
-from app.config.settings import DATABASE_URL
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+import asyncio
+from app.config.settings import (
+    DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE,
+    DB_POOL_TIMEOUT,
+)
+from app.metrics.instrumentation import MeteredAsyncAdaptedQueuePool
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
+
+def create_engine(connection_string: str = DATABASE_URL) -> AsyncEngine:
+    """
+        Cria a AsyncEngine da aplicação, com o pool de conexões configurado
+        em 'app/config/settings.py'.
+
+        Bancos SQLite em memória usam um pool próprio do SQLAlchemy que não
+        aceita as opções de tamanho, então elas só são repassadas para
+        bancos em arquivo ou servidores, que usam o
+        'MeteredAsyncAdaptedQueuePool' para expor a espera pelo pool em '/metrics'.
+    """
+    url = make_url(connection_string)
+    options = {"pool_pre_ping": True}
+    if not (url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")):
+        options.update(
+            poolclass=MeteredAsyncAdaptedQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_timeout=DB_POOL_TIMEOUT,
+        )
+    return create_async_engine(url, **options)
+
+def create_read_engine(connection_string: str) -> AsyncEngine:
+    """
+        Cria a AsyncEngine do pool só de leitura ('READ_DATABASE_URL'), com as
+        mesmas opções de pool da engine principal. Cada conexão nova é marcada
+        como somente leitura ('PRAGMA query_only' no SQLite, transações
+        READ ONLY no PostgreSQL), de modo que uma escrita enviada por engano a
+        esse pool falha em vez de gravar na réplica.
+    """
+    engine = create_engine(connection_string)
+    backend = engine.url.get_backend_name()
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def do_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if backend == "sqlite":
+            cursor.execute("PRAGMA query_only = ON")
+        elif backend == "postgresql":
+            cursor.execute("SET SESSION CHARACTERISTICS AS TRANSACTION READ ONLY")
+        cursor.close()
+
+    return engine
+
+async def enable_wal(engine: AsyncEngine) -> None:
+    """
+        Passa um banco SQLite em arquivo para o modo WAL, em que as leituras de
+        outras conexões não esperam pelo commit de quem escreve. O modo fica
+        gravado no arquivo; outros bancos não são alterados.
+    """
+    url = engine.url
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        return
+    async with engine.connect() as conn:
+        await conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+
+async def warm_up(engine: AsyncEngine) -> int:
+    """
+        Abre de uma vez as conexões fixas do pool e as devolve, para que as
+        primeiras requisições não paguem a abertura (e, no PostgreSQL, a
+        autenticação) de cada conexão. Pools sem tamanho fixo, como o do SQLite
+        em memória, não são aquecidos. Retorna quantas conexões foram abertas.
+    """
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return 0
+    conexoes = await asyncio.gather(*(engine.connect() for _ in range(pool.size())))
+    try:
+        for conn in conexoes:
+            await conn.execute(text("SELECT 1"))
+    finally:
+        for conn in conexoes:
+            await conn.close()
+    return len(conexoes)
+
+def create_session_factory(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
 class DBConnectionHandler:
     """
-        Classe que gerencia a conexão assíncrona do SQLAlchemy.
+        Classe que gerencia a sessão assíncrona do SQLAlchemy.
 
-        Implementa a criação de uma AsyncEngine, além dos métodos contextuais
-        '__aenter__' e '__aexit__' para possibilitar o uso assíncrono de 'with'
-        nos repositories.
+        Recebe a fábrica de sessões criada uma única vez no lifespan da
+        aplicação (ver 'create_app'), de modo que a engine e o pool de conexões
+        são compartilhados por todas as requisições. Implementa os métodos
+        contextuais '__aenter__' e '__aexit__' para possibilitar o uso
+        assíncrono de 'with' nos repositories.
 
-        O '__aenter__' inicia uma sessão assíncrona do SQLAlchemy e o '__aexit__'
-        a fecha.
+        O '__aenter__' apenas inicia uma sessão assíncrona do SQLAlchemy (o schema
+        é preparado uma única vez na inicialização, ver 'init_schema') e o
+        '__aexit__' a fecha, devolvendo a conexão ao pool.
     """
-    def __init__(self) -> None:
-        self.__connection_string = DATABASE_URL
-        self.__engine = self.__create_engine()
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        self.__session_factory = session_factory
         self.session = None
 
-    def __create_engine(self) -> AsyncEngine:
-        engine = create_async_engine(self.__connection_string)
-        return engine
-    
     def get_engine(self) -> AsyncEngine:
-        return self.__engine
-    
+        return self.__session_factory.kw["bind"]
+
     async def __aenter__(self) -> "DBConnectionHandler":
-        async_session = sessionmaker(
-            bind=self.__engine,
-            class_=AsyncSession,
-            expire_on_commit=False
-        )
-        self.session = async_session()
-        async with self.__engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
+        self.session = self.__session_factory()
         return self
-    
+
     async def __aexit__(self, exc_type, exc, tb) -> None:
         await self.session.close()
-    
\ No newline at end of file
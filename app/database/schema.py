@@ -0,0 +1,217 @@
+import asyncio
+from pathlib import Path
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.database.base import Base
+from app.config.settings import SCHEMA_BOOTSTRAP
+import app.models.criatura  # noqa: F401 - registra as tabelas em Base.metadata
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+SCHEMA_BOOTSTRAP_MODES = ("alembic", "create_all", "none")
+
+# Objetos do SQLite que o 'create_all' não conhece (tabelas virtuais e triggers),
+# espelhando as migrações do Alembic. Cada entrada traz o nome do objeto
+# principal, o DDL idempotente e os comandos que populam o objeto apenas
+# quando ele acaba de ser criado em um banco que já tinha dados.
+SQLITE_OBJECTS: list[tuple[str, tuple[str, ...], tuple[str, ...]]] = [
+    (
+        "criaturas_fts",
+        (
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS criaturas_fts USING fts5(
+                nome, lenda,
+                content='criaturas', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS criaturas_fts_ai AFTER INSERT ON criaturas BEGIN
+                INSERT INTO criaturas_fts(rowid, nome, lenda) VALUES (new.id, new.nome, new.lenda);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS criaturas_fts_ad AFTER DELETE ON criaturas BEGIN
+                INSERT INTO criaturas_fts(criaturas_fts, rowid, nome, lenda) VALUES ('delete', old.id, old.nome, old.lenda);
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS criaturas_fts_au AFTER UPDATE OF nome, lenda ON criaturas BEGIN
+                INSERT INTO criaturas_fts(criaturas_fts, rowid, nome, lenda) VALUES ('delete', old.id, old.nome, old.lenda);
+                INSERT INTO criaturas_fts(rowid, nome, lenda) VALUES (new.id, new.nome, new.lenda);
+            END
+            """,
+        ),
+        ("INSERT INTO criaturas_fts(criaturas_fts) VALUES ('rebuild')",),
+    ),
+    (
+        "criaturas_catalogo",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS criaturas_catalogo (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                versao INTEGER NOT NULL,
+                atualizado_em DATETIME NOT NULL
+            )
+            """,
+            *(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS criaturas_catalogo_{name} AFTER {event} ON criaturas BEGIN
+                    UPDATE criaturas_catalogo SET versao = versao + 1, atualizado_em = CURRENT_TIMESTAMP WHERE id = 1;
+                END
+                """
+                for name, event in (("ai", "INSERT"), ("au", "UPDATE"), ("ad", "DELETE"))
+            ),
+        ),
+        ("INSERT INTO criaturas_catalogo (id, versao, atualizado_em) VALUES (1, 1, CURRENT_TIMESTAMP)",),
+    ),
+    (
+        "criaturas_estatisticas",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS criaturas_estatisticas (
+                regiao VARCHAR(20) NOT NULL,
+                periculosidade INTEGER NOT NULL,
+                quantidade INTEGER NOT NULL,
+                PRIMARY KEY (regiao, periculosidade)
+            )
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS criaturas_estatisticas_ai AFTER INSERT ON criaturas BEGIN
+                INSERT INTO criaturas_estatisticas (regiao, periculosidade, quantidade) VALUES (new.regiao, new.periculosidade, 1)
+                    ON CONFLICT (regiao, periculosidade) DO UPDATE SET quantidade = quantidade + 1;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS criaturas_estatisticas_ad AFTER DELETE ON criaturas BEGIN
+                UPDATE criaturas_estatisticas SET quantidade = quantidade - 1
+                    WHERE regiao = old.regiao AND periculosidade = old.periculosidade;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS criaturas_estatisticas_au AFTER UPDATE OF regiao, periculosidade ON criaturas
+            WHEN old.regiao IS NOT new.regiao OR old.periculosidade IS NOT new.periculosidade BEGIN
+                UPDATE criaturas_estatisticas SET quantidade = quantidade - 1
+                    WHERE regiao = old.regiao AND periculosidade = old.periculosidade;
+                INSERT INTO criaturas_estatisticas (regiao, periculosidade, quantidade) VALUES (new.regiao, new.periculosidade, 1)
+                    ON CONFLICT (regiao, periculosidade) DO UPDATE SET quantidade = quantidade + 1;
+            END
+            """,
+        ),
+        (
+            """
+            INSERT INTO criaturas_estatisticas (regiao, periculosidade, quantidade)
+            SELECT regiao, periculosidade, COUNT(*) FROM criaturas GROUP BY regiao, periculosidade
+            """,
+        ),
+    ),
+    (
+        "criaturas_eventos",
+        (
+            """
+            CREATE TABLE IF NOT EXISTS criaturas_eventos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                tipo VARCHAR(10) NOT NULL,
+                criatura_id INTEGER NOT NULL,
+                nome VARCHAR(50) NOT NULL,
+                versao INTEGER NOT NULL,
+                criado_em DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+        ),
+        (),
+    ),
+]
+
+# Triggers que alimentam o outbox 'criaturas_eventos' (feed de alterações). Não
+# fazem parte das migrações nem de SQLITE_OBJECTS: só existem com EVENTS_ENABLED
+# (ver 'set_outbox_triggers'), para que as escritas não gravem eventos que
+# ninguém lê nem apaga.
+OUTBOX_TRIGGERS = tuple(
+    (
+        f"criaturas_eventos_{name}",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS criaturas_eventos_{name} AFTER {event} ON criaturas BEGIN
+            INSERT INTO criaturas_eventos (tipo, criatura_id, nome, versao)
+            VALUES ('{tipo}', {row}.id, {row}.nome, {row}.versao);
+        END
+        """,
+    )
+    for name, event, tipo, row in (
+        ("ai", "INSERT", "criada", "new"),
+        ("au", "UPDATE", "atualizada", "new"),
+        ("ad", "DELETE", "removida", "old"),
+    )
+)
+
+def alembic_upgrade(database_url: str, revision: str = "head") -> None:
+    """
+        Executa 'alembic upgrade' de forma síncrona, sem reconfigurar o logging
+        da aplicação.
+    """
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["database_url"] = database_url
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, revision)
+
+def create_sqlite_objects(conn: Connection) -> None:
+    existing = set(conn.exec_driver_sql("SELECT name FROM sqlite_master").scalars())
+    for name, ddl, populate in SQLITE_OBJECTS:
+        for statement in ddl:
+            conn.exec_driver_sql(statement)
+        if name not in existing:
+            for statement in populate:
+                conn.exec_driver_sql(statement)
+
+async def init_schema(engine: AsyncEngine, mode: str = SCHEMA_BOOTSTRAP) -> None:
+    """
+        Prepara o schema do banco uma única vez, na inicialização da aplicação.
+
+        O modo é escolhido pela configuração 'SCHEMA_BOOTSTRAP': as migrações do
+        Alembic, um 'create_all' único ou nenhuma ação (schema gerenciado por fora).
+        Depois disso, o caminho das requisições apenas abre sessões.
+    """
+    if mode == "alembic":
+        url = engine.url.render_as_string(hide_password=False)
+        await asyncio.to_thread(alembic_upgrade, url)
+    elif mode == "create_all":
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            if engine.dialect.name == "sqlite":
+                await conn.run_sync(create_sqlite_objects)
+    elif mode != "none":
+        raise ValueError(
+            f"SCHEMA_BOOTSTRAP inválido: '{mode}'. Use um de {', '.join(SCHEMA_BOOTSTRAP_MODES)}."
+        )
+
+async def set_outbox_triggers(engine: AsyncEngine, enabled: bool) -> None:
+    """
+        Cria ou remove as triggers do outbox. A aplicação chama na inicialização
+        conforme 'EVENTS_ENABLED', exceto com SCHEMA_BOOTSTRAP=none (schema
+        gerenciado por fora, ver 'app.tools.outbox'). Só existem no SQLite,
+        como as demais triggers. Quando as triggers já estão como pedido nada
+        é gravado, então os workers que iniciam depois do primeiro só leem.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    async with engine.begin() as conn:
+        response = await conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE name LIKE 'criaturas_eventos%'")
+        existing = set(response.scalars())
+        triggers = {name for name, _ in OUTBOX_TRIGGERS}
+        if not enabled:
+            for name in sorted(triggers & existing):
+                await conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+            return
+        if "criaturas_eventos" not in existing:
+            raise RuntimeError("A tabela 'criaturas_eventos' não existe; aplique as migrações antes de habilitar os eventos.")
+        if existing.issuperset(triggers):
+            return
+        # As escritas feitas com os eventos desligados não estão no outbox.
+        # Os eventos antigos são apagados e um ID é pulado, para que quem
+        # reconectar com um Last-Event-ID anterior receba um "reinicio"
+        await conn.exec_driver_sql("DELETE FROM criaturas_eventos")
+        await conn.exec_driver_sql("UPDATE sqlite_sequence SET seq = seq + 1 WHERE name = 'criaturas_eventos'")
+        for _, ddl in OUTBOX_TRIGGERS:
+            await conn.exec_driver_sql(ddl)
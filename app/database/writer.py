@@ -0,0 +1,199 @@
+import asyncio
+import contextvars
+from typing import Awaitable, Callable, Optional, TypeVar
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession, create_async_engine
+from app.exceptions.logger import logger
+
+T = TypeVar("T")
+
+WriteOperation = Callable[[AsyncSession], Awaitable[T]]
+CommitCallback = Callable[[T], None]
+
+def create_writer_engine(connection_string: str) -> AsyncEngine:
+    """
+        Engine própria do escritor, com uma única conexão.
+
+        O driver do SQLite abre as transações por conta própria e não convive
+        com SAVEPOINT; a receita da documentação do SQLAlchemy desliga esse
+        controle e emite o BEGIN pelo evento 'begin'. Aqui o BEGIN é IMMEDIATE,
+        para que o lock de escrita seja pego no início do grupo e não no meio
+        dele. O banco também passa para o modo WAL, em que as leituras das
+        outras conexões não bloqueiam o commit do escritor.
+    """
+    url = make_url(connection_string)
+    engine = create_async_engine(url, pool_size=1, max_overflow=0, pool_pre_ping=True)
+    if url.get_backend_name() == "sqlite":
+        @event.listens_for(engine.sync_engine, "connect")
+        def do_connect(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.close()
+
+        @event.listens_for(engine.sync_engine, "begin")
+        def do_begin(conn):
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+    return engine
+
+class GroupCommitWriter:
+    """
+        Escritor único com commit em grupo.
+
+        Uma tarefa em segundo plano é dona de uma única conexão e recebe as
+        escritas do 'CriaturaRepository' por uma fila do asyncio. Cada grupo
+        reúne até 'max_batch' operações, esperando no máximo 'max_delay'
+        segundos depois da primeira, e é gravado em uma única transação, com um
+        único commit (um fsync) para o grupo inteiro.
+
+        Cada operação roda no próprio SAVEPOINT: se ela falhar (por exemplo, com
+        um IntegrityError de nome duplicado), só ela é desfeita e só quem a
+        enviou recebe a exceção; as demais seguem no grupo. Uma falha no commit
+        do grupo é repassada a todas as operações dele.
+
+        O 'on_commit' de cada operação gravada roda pela própria tarefa, logo
+        após o commit, mesmo que quem a enviou tenha sido cancelado enquanto
+        esperava. Se a tarefa terminar, as escritas ainda não gravadas falham
+        com RuntimeError em vez de esperar para sempre.
+
+        Cada operação roda no contexto (contextvars) de quem a enviou, e não no
+        da tarefa: as consultas dela entram no rastro da requisição (ver
+        'instrument_tracing'), como as feitas sem o escritor.
+    """
+    def __init__(self, engine: AsyncEngine, max_batch: int, max_delay: float, queue_size: int = 0) -> None:
+        self.__engine = engine
+        self.__max_batch = max_batch
+        self.__max_delay = max_delay
+        self.__queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.__connection: Optional[AsyncConnection] = None
+        self.__session: Optional[AsyncSession] = None
+        self.__task: Optional[asyncio.Task] = None
+        self.groups = 0
+        self.operations = 0
+
+    async def start(self) -> None:
+        self.__connection = await self.__engine.connect()
+        self.__session = AsyncSession(bind=self.__connection, expire_on_commit=False)
+        self.__task = asyncio.create_task(self.__run(), name="group-commit-writer")
+
+    async def stop(self) -> None:
+        """
+            Grava o que ainda está na fila, encerra a tarefa e fecha a conexão,
+            mesmo que a tarefa já tenha terminado com erro.
+        """
+        task = self.__task
+        if task is not None:
+            if not task.done():
+                await self.__queue.put(None)
+            await asyncio.wait([task])
+            self.__task = None
+            if not task.cancelled() and task.exception() is not None:
+                logger.error(f"O escritor terminou com erro: {task.exception()}")
+        if self.__session is not None:
+            await self.__session.close()
+            await self.__connection.close()
+        await self.__engine.dispose()
+
+    async def submit(self, operation: WriteOperation[T], on_commit: Optional[CommitCallback[T]] = None) -> T:
+        """
+            Enfileira 'operation(session)' e espera o commit do grupo em que ela
+            entrou. A operação não deve fazer commit nem rollback. 'on_commit'
+            recebe o resultado depois do commit (ver 'GroupCommitWriter').
+        """
+        task = self.__task
+        if task is None or task.done():
+            raise RuntimeError("O escritor não está em execução.")
+        future = asyncio.get_running_loop().create_future()
+        await self.__queue.put((operation, on_commit, future, contextvars.copy_context()))
+        if task.done() and not future.done():
+            # A tarefa terminou enquanto a escrita esperava lugar na fila
+            future.set_exception(RuntimeError("O escritor foi encerrado antes de gravar a escrita."))
+        return await future
+
+    async def __run(self) -> None:
+        loop = asyncio.get_running_loop()
+        parar = False
+        grupo: list = []
+        try:
+            while not parar:
+                item = await self.__queue.get()
+                if item is None:
+                    break
+                grupo = [item]
+                prazo = loop.time() + self.__max_delay
+                while len(grupo) < self.__max_batch:
+                    try:
+                        item = self.__queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        restante = prazo - loop.time()
+                        if restante <= 0:
+                            break
+                        try:
+                            item = await asyncio.wait_for(self.__queue.get(), restante)
+                        except asyncio.TimeoutError:
+                            break
+                    if item is None:
+                        parar = True
+                        break
+                    grupo.append(item)
+                await self.__commit(grupo)
+        finally:
+            self.__fail_pending(grupo)
+
+    def __fail_pending(self, grupo: list) -> None:
+        """
+            Falha as escritas do grupo interrompido e as que ficaram na fila
+            (inclusive as enfileiradas depois do 'stop'), para que ninguém espere
+            por uma tarefa que já terminou.
+        """
+        pendentes = list(grupo)
+        while not self.__queue.empty():
+            pendentes.append(self.__queue.get_nowait())
+        for item in pendentes:
+            if item is None:
+                continue
+            _, _, future, _ = item
+            if not future.done():
+                future.set_exception(RuntimeError("O escritor foi encerrado antes de gravar a escrita."))
+
+    async def __commit(self, grupo: list) -> None:
+        session = self.__session
+        resultados = []
+        try:
+            async with session.begin():
+                for operation, on_commit, future, context in grupo:
+                    try:
+                        async with session.begin_nested():
+                            # O BEGIN e o SAVEPOINT são emitidos aqui, e não na
+                            # primeira consulta da operação, no contexto dela
+                            await session.connection()
+                            resultado = await asyncio.create_task(operation(session), context=context)
+                            resultados.append((future, on_commit, resultado, None))
+                    except Exception as e:
+                        resultados.append((future, on_commit, None, e))
+                    finally:
+                        # Cada operação começa com o identity map vazio: senão um
+                        # UPDATE ... RETURNING de uma linha já carregada no grupo
+                        # devolveria o objeto da operação anterior, com os valores
+                        # antigos. Os objetos devolvidos ficam desanexados, com os
+                        # valores gravados.
+                        session.expunge_all()
+        except Exception as e:
+            logger.error(f"Erro ao gravar grupo de {len(grupo)} escritas: {e}")
+            resultados = [(future, None, None, e) for _, _, future, _ in grupo]
+        self.groups += 1
+        self.operations += len(grupo)
+        for future, on_commit, resultado, erro in resultados:
+            if erro is None and on_commit is not None:
+                try:
+                    on_commit(resultado)
+                except Exception as e:
+                    logger.error(f"Erro ao processar escrita gravada: {e}")
+            if future.done():
+                # Quem enviou desistiu de esperar (requisição cancelada)
+                continue
+            if erro is not None:
+                future.set_exception(erro)
+            else:
+                future.set_result(resultado)
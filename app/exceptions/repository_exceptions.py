@@ -3,4 +3,8 @@ class RepositoryError(Exception):
 
 class EntityNotFoundError(RepositoryError):
     def __init__(self, message: str = "Entidade não encontrada") -> None:
+        super().__init__(message)
+
+class VersionConflictError(RepositoryError):
+    def __init__(self, message: str = "A entidade foi alterada por outra requisição") -> None:
         super().__init__(message)
\ No newline at end of file
@@ -0,0 +1,10 @@
+class ServiceError(Exception):
+    pass
+
+class InvalidCursorError(ServiceError):
+    def __init__(self, message: str = "Cursor de paginação inválido") -> None:
+        super().__init__(message)
+
+class AutocompleteDisabledError(ServiceError):
+    def __init__(self, message: str = "O autocomplete está desabilitado (AUTOCOMPLETE_ENABLED=false).") -> None:
+        super().__init__(message)
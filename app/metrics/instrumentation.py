@@ -0,0 +1,211 @@
+import time
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.cache.catalog_cache import CatalogCache
+from app.cache.criatura_cache import CriaturaCache
+from app.cache.criatura_replica import CriaturaReplica
+from app.services.criatura_loader import CriaturaLoader
+from app.services.event_broadcaster import EventBroadcaster
+from app.metrics.registry import Registry
+
+# Limites dos buckets, em segundos: as consultas costumam ficar abaixo de 1 ms
+# no SQLite, as requisições incluem serialização e a espera pelo pool
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Rótulo das requisições que não casaram com nenhuma rota (404), para não
+# criar uma série por caminho desconhecido
+UNMATCHED_ROUTE = "<sem rota>"
+
+# Operações SQL com série própria; o resto (PRAGMA, BEGIN, CTEs...) vai em "outra"
+SQL_OPERATIONS = frozenset(("SELECT", "INSERT", "UPDATE", "DELETE"))
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "bestiario_http_requests_total", "Requisições HTTP atendidas, por método, rota e status.", ("method", "route", "status")
+)
+HTTP_DURATION = REGISTRY.histogram(
+    "bestiario_http_request_duration_seconds", "Duração das requisições HTTP até o fim da resposta, por método e rota.",
+    ("method", "route"), REQUEST_BUCKETS
+)
+HTTP_IN_PROGRESS = REGISTRY.gauge("bestiario_http_requests_in_progress", "Requisições HTTP em andamento.")
+
+DB_QUERY_DURATION = REGISTRY.histogram(
+    "bestiario_db_query_duration_seconds", "Duração da execução das consultas no driver, por operação SQL.",
+    ("operation",), QUERY_BUCKETS
+)
+DB_QUERY_ERRORS = REGISTRY.counter("bestiario_db_query_errors_total", "Consultas que falharam no driver, por operação SQL.", ("operation",))
+
+DB_POOL_SIZE = REGISTRY.gauge("bestiario_db_pool_size", "Tamanho fixo do pool de conexões.")
+DB_POOL_CHECKED_OUT = REGISTRY.gauge("bestiario_db_pool_checked_out", "Conexões do pool em uso.")
+DB_POOL_OVERFLOW = REGISTRY.gauge("bestiario_db_pool_overflow", "Conexões abertas além do tamanho fixo do pool.")
+DB_POOL_WAITING = REGISTRY.gauge("bestiario_db_pool_waiting", "Sessões aguardando uma conexão do pool.")
+DB_POOL_WAIT = REGISTRY.histogram(
+    "bestiario_db_pool_wait_seconds", "Tempo até o pool entregar uma conexão (inclui abrir uma nova).",
+    buckets=QUERY_BUCKETS + (5.0, 10.0, 30.0)
+)
+
+CACHE_HITS = REGISTRY.counter("bestiario_cache_hits_total", "Acertos do cache de criaturas.")
+CACHE_MISSES = REGISTRY.counter("bestiario_cache_misses_total", "Faltas do cache de criaturas.")
+CACHE_EVICTIONS = REGISTRY.counter("bestiario_cache_evictions_total", "Entradas despejadas do cache de criaturas.")
+CACHE_ENTRIES = REGISTRY.gauge("bestiario_cache_entries", "Entradas no cache de criaturas.")
+
+CATALOG_CACHE_HITS = REGISTRY.counter("bestiario_catalog_cache_hits_total", "Listagens completas servidas do cache materializado.")
+CATALOG_CACHE_MISSES = REGISTRY.counter("bestiario_catalog_cache_misses_total", "Listagens completas que precisaram ser montadas.")
+CATALOG_CACHE_BYTES = REGISTRY.gauge("bestiario_catalog_cache_bytes", "Bytes ocupados pelos corpos do cache materializado.")
+
+LOADER_REQUESTS = REGISTRY.counter("bestiario_loader_requests_total", "Buscas por ID ou nome recebidas pelo loader.")
+LOADER_SHARED = REGISTRY.counter("bestiario_loader_shared_total", "Buscas atendidas por uma consulta já pedida por outra requisição.")
+LOADER_BATCHES = REGISTRY.counter("bestiario_loader_batches_total", "Consultas IN (...) feitas pelo loader.")
+LOADER_KEYS = REGISTRY.counter("bestiario_loader_keys_total", "Chaves distintas consultadas pelo loader.")
+
+REPLICA_ENTRIES = REGISTRY.gauge("bestiario_replica_entries", "Criaturas na réplica em memória.")
+REPLICA_DIVERGENCES = REGISTRY.counter("bestiario_replica_divergences_total", "Criaturas em que a réplica divergiu do banco na conferência.")
+EVENTS_SUBSCRIBERS = REGISTRY.gauge("bestiario_events_subscribers", "Conexões abertas em GET /criaturas/eventos.")
+EVENTS_FETCHED = REGISTRY.counter("bestiario_events_fetched_total", "Eventos lidos do outbox pelo broadcaster, uma vez cada.")
+EVENTS_DELIVERED = REGISTRY.counter("bestiario_events_delivered_total", "Eventos enviados aos assinantes.")
+EVENTS_REPLAYED = REGISTRY.counter("bestiario_events_replayed_total", "Eventos relidos do banco em reconexões mais antigas que o buffer.")
+EVENTS_DROPPED = REGISTRY.counter("bestiario_events_dropped_total", "Assinantes desconectados por não acompanharem o ritmo dos eventos.")
+
+WRITER_GROUPS = REGISTRY.counter("bestiario_writer_groups_total", "Grupos gravados pelo escritor com commit em grupo.")
+WRITER_OPERATIONS = REGISTRY.counter("bestiario_writer_operations_total", "Escritas gravadas pelo escritor com commit em grupo.")
+
+class MetricsMiddleware:
+    """
+        Middleware ASGI que mede cada requisição HTTP, do recebimento ao último
+        pedaço da resposta (o que inclui o streaming NDJSON), e conta os status.
+
+        A rota é rotulada pelo modelo do caminho ('/criaturas/id/{id}'), que o
+        FastAPI grava em 'scope["route"]' ao casar a requisição, e não pelo
+        caminho concreto, para que o número de séries não cresça com os IDs.
+        É um middleware ASGI puro, sem o 'BaseHTTPMiddleware', para não
+        reempacotar as respostas em streaming.
+    """
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc()
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duracao = time.perf_counter() - inicio
+            HTTP_IN_PROGRESS.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", UNMATCHED_ROUTE)
+            method = scope["method"]
+            HTTP_DURATION.observe(duracao, method, path)
+            HTTP_REQUESTS.inc(method, path, str(status))
+
+def sql_operation(statement: str) -> str:
+    operation = statement.lstrip()[:6].upper()
+    return operation if operation in SQL_OPERATIONS else "outra"
+
+def instrument_engine(engine: AsyncEngine, pool_gauges: bool = True) -> None:
+    """
+        Mede a duração de cada consulta no driver com os eventos
+        'before_cursor_execute'/'after_cursor_execute' da engine síncrona por
+        trás da AsyncEngine, e passa a ler o estado do pool na coleta.
+
+        O início fica em uma pilha em 'conn.info', como na receita da
+        documentação do SQLAlchemy, e o evento 'handle_error' a desempilha
+        quando a consulta falha. Com 'pool_gauges=False' (a engine do escritor),
+        apenas as consultas são medidas.
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        inicio = conn.info["metrics_query_start"].pop()
+        DB_QUERY_DURATION.observe(time.perf_counter() - inicio, sql_operation(statement))
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(context):
+        inicios = context.connection.info.get("metrics_query_start") if context.connection is not None else None
+        if inicios:
+            inicios.pop()
+            DB_QUERY_ERRORS.inc(sql_operation(context.statement or ""))
+
+    if not pool_gauges:
+        return
+
+    # 'engine.pool' é lido a cada coleta porque o 'dispose()' troca o pool
+    def pool_stat(stat) -> Optional[float]:
+        pool = engine.pool
+        return stat(pool) if isinstance(pool, QueuePool) else None
+
+    DB_POOL_SIZE.set_function(lambda: pool_stat(QueuePool.size))
+    DB_POOL_CHECKED_OUT.set_function(lambda: pool_stat(QueuePool.checkedout))
+    # 'overflow()' começa em -pool_size e só fica positivo com conexões extras
+    DB_POOL_OVERFLOW.set_function(lambda: pool_stat(lambda pool: max(pool.overflow(), 0)))
+
+def instrument_cache(cache: Optional[CriaturaCache]) -> None:
+    # Os contadores já são mantidos pelo próprio cache e só são lidos na coleta
+    CACHE_HITS.set_function(lambda: cache.hits if cache is not None else None)
+    CACHE_MISSES.set_function(lambda: cache.misses if cache is not None else None)
+    CACHE_EVICTIONS.set_function(lambda: cache.evictions if cache is not None else None)
+    CACHE_ENTRIES.set_function(lambda: len(cache) if cache is not None else None)
+
+def instrument_catalog_cache(cache: Optional[CatalogCache]) -> None:
+    CATALOG_CACHE_HITS.set_function(lambda: cache.hits if cache is not None else None)
+    CATALOG_CACHE_MISSES.set_function(lambda: cache.misses if cache is not None else None)
+    CATALOG_CACHE_BYTES.set_function(lambda: cache.size_bytes if cache is not None else None)
+
+def instrument_loader(loader: Optional[CriaturaLoader]) -> None:
+    # A razão de agrupamento é requests_total / batches_total
+    LOADER_REQUESTS.set_function(lambda: loader.requests if loader is not None else None)
+    LOADER_SHARED.set_function(lambda: loader.shared if loader is not None else None)
+    LOADER_BATCHES.set_function(lambda: loader.batches if loader is not None else None)
+    LOADER_KEYS.set_function(lambda: loader.keys if loader is not None else None)
+
+def instrument_replica(replica: Optional[CriaturaReplica]) -> None:
+    REPLICA_ENTRIES.set_function(lambda: len(replica) if replica is not None else None)
+    REPLICA_DIVERGENCES.set_function(lambda: replica.divergences if replica is not None else None)
+
+def instrument_broadcaster(broadcaster: Optional[EventBroadcaster]) -> None:
+    EVENTS_SUBSCRIBERS.set_function(lambda: len(broadcaster) if broadcaster is not None else None)
+    EVENTS_FETCHED.set_function(lambda: broadcaster.fetched if broadcaster is not None else None)
+    EVENTS_DELIVERED.set_function(lambda: broadcaster.delivered if broadcaster is not None else None)
+    EVENTS_REPLAYED.set_function(lambda: broadcaster.replayed if broadcaster is not None else None)
+    EVENTS_DROPPED.set_function(lambda: broadcaster.dropped if broadcaster is not None else None)
+
+def instrument_writer(writer) -> None:
+    WRITER_GROUPS.set_function(lambda: writer.groups if writer is not None else None)
+    WRITER_OPERATIONS.set_function(lambda: writer.operations if writer is not None else None)
+
+class MeteredAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """
+        O pool padrão das AsyncEngines, medindo quanto cada 'connect()' espera
+        por uma conexão (fila cheia, abertura de uma nova e pre-ping) e quantas
+        sessões estão esperando no momento. O 'dispose()' recria o pool com a
+        mesma classe, então a medição continua após um descarte.
+    """
+    def connect(self):
+        DB_POOL_WAITING.inc()
+        inicio = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - inicio)
+            DB_POOL_WAITING.dec()
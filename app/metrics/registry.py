@@ -0,0 +1,153 @@
+import math
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Iterable, Optional, Sequence
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pares = [f'{name}="{escape_label(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+class Metric(ABC):
+    """
+        Base das métricas: nome, texto de ajuda e nomes dos rótulos. As séries
+        são guardadas por tupla de valores dos rótulos, na ordem de 'labels'.
+        Cada tipo de métrica implementa 'samples'.
+    """
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    @abstractmethod
+    def samples(self) -> Iterable[str]:
+        ...
+
+    def render(self) -> list[str]:
+        return self.header() + list(self.samples())
+
+class ValueMetric(Metric):
+    """
+        Métrica de um valor por série. Com 'set_function', o valor passa a ser
+        lido na coleta (por exemplo, do pool de conexões ou de contadores que
+        outro objeto já mantém), em uma série sem rótulos.
+    """
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labels)
+        self._values: dict[tuple, float] = {}
+        self.__function: Optional[Callable[[], Optional[float]]] = None
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def set_function(self, function: Optional[Callable[[], Optional[float]]]) -> None:
+        self.__function = function
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def samples(self) -> Iterable[str]:
+        if self.__function is not None:
+            value = self.__function()
+            if value is not None:
+                yield f"{self.name} {format_value(value)}"
+            return
+        for label_values, value in sorted(self._values.items()):
+            yield f"{self.name}{format_labels(self.labels, label_values)} {format_value(value)}"
+
+class Counter(ValueMetric):
+    kind = "counter"
+
+class Gauge(ValueMetric):
+    kind = "gauge"
+
+    def set(self, value: float, *label_values: str) -> None:
+        self._values[label_values] = value
+
+    def dec(self, *label_values: str, amount: float = 1) -> None:
+        self.inc(*label_values, amount=-amount)
+
+class Histogram(Metric):
+    """
+        Histograma com buckets fixos. Cada observação incrementa apenas o seu
+        bucket (busca binária com 'bisect'); os valores acumulados que o formato
+        do Prometheus exige são calculados na coleta.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = ()) -> None:
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Por série: [contagem por bucket (+ o +Inf no fim), soma]
+        self.__series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self.__series.get(label_values)
+        if series is None:
+            series = self.__series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def count(self, *label_values: str) -> int:
+        series = self.__series.get(label_values)
+        return sum(series[0]) if series else 0
+
+    def samples(self) -> Iterable[str]:
+        for label_values, (counts, total) in sorted(self.__series.items()):
+            acumulado = 0
+            for limite, quantidade in zip(self.buckets + (math.inf,), counts):
+                acumulado += quantidade
+                labels = format_labels(self.labels, label_values, f'le="{format_value(limite)}"')
+                yield f"{self.name}_bucket{labels} {acumulado}"
+            labels = format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {format_value(total)}"
+            yield f"{self.name}_count{labels} {acumulado}"
+
+class Registry:
+    """
+        Conjunto de métricas de um processo, renderizado no formato texto do
+        Prometheus (versão 0.0.4).
+    """
+    def __init__(self) -> None:
+        self.__metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.__metrics:
+            raise ValueError(f"Métrica já registrada: {metric.name}")
+        self.__metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (), buckets: Sequence[float] = ()) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        linhas = []
+        for metric in self.__metrics.values():
+            linhas += metric.render()
+        return "\n".join(linhas) + "\n"
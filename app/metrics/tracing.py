@@ -0,0 +1,120 @@
+import time
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.exceptions.logger import logger
+
+# Prefixo que pede o plano de execução em cada dialeto; os demais não são explicados
+EXPLAIN_PREFIXES = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+
+class RequestTrace:
+    """
+        Consultas executadas e tempo total no banco durante uma requisição.
+    """
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.seconds = 0.0
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+class SQLTraceMiddleware:
+    """
+        Middleware ASGI que abre um 'RequestTrace' por requisição e o reporta nos
+        cabeçalhos 'X-DB-Queries' e 'X-DB-Time' (milissegundos).
+
+        O rastro fica em uma ContextVar, que o SQLAlchemy repassa ao greenlet em
+        que os eventos da engine rodam. Os cabeçalhos são escritos quando a
+        resposta começa: em respostas em streaming (NDJSON) eles cobrem apenas
+        as consultas feitas até o envio do primeiro pedaço.
+    """
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace()
+
+        async def send_with_trace(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Queries"] = str(trace.queries)
+                headers["X-DB-Time"] = f"{trace.seconds * 1000:.3f}"
+            await send(message)
+
+        token = _current_trace.set(trace)
+        try:
+            await self.app(scope, receive, send_with_trace)
+        finally:
+            _current_trace.reset(token)
+
+def explain(conn, statement: str, parameters) -> Optional[str]:
+    """
+        Plano de execução de 'statement' com os mesmos parâmetros, lido por um
+        cursor do DBAPI para não disparar os eventos da engine de novo.
+    """
+    prefix = EXPLAIN_PREFIXES.get(conn.dialect.name)
+    if prefix is None or not statement.lstrip()[:6].upper().startswith(EXPLAINABLE):
+        return None
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        # O detalhe de cada passo é a última coluna (no SQLite, as anteriores são IDs)
+        return "\n".join(str(linha[-1]) for linha in cursor.fetchall())
+    finally:
+        cursor.close()
+
+def instrument_tracing(engine: AsyncEngine, slow_query_ms: float) -> None:
+    """
+        Conta as consultas e o tempo no banco da requisição corrente e registra
+        no log as que passarem de 'slow_query_ms', com o plano de execução
+        ('EXPLAIN QUERY PLAN' no SQLite). Uma varredura completa aparece no
+        plano como 'SCAN criaturas', em vez de 'SEARCH ... USING INDEX'.
+    """
+    sync_engine = engine.sync_engine
+    slow_query_seconds = slow_query_ms / 1000
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("trace_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duracao = time.perf_counter() - conn.info["trace_query_start"].pop()
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.queries += 1
+            trace.seconds += duracao
+        if duracao < slow_query_seconds:
+            return
+        plano = None
+        if not executemany:
+            try:
+                plano = explain(conn, statement, parameters)
+            except Exception as e:
+                plano = f"(plano indisponível: {e})"
+        logger.warning(
+            f"Consulta lenta ({duracao * 1000:.1f} ms): {statement} {parameters!r}"
+            + (f"\nPlano de execução:\n{plano}" if plano else "")
+        )
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(context):
+        inicios = context.connection.info.get("trace_query_start") if context.connection is not None else None
+        if inicios:
+            duracao = time.perf_counter() - inicios.pop()
+            trace = _current_trace.get()
+            if trace is not None:
+                trace.queries += 1
+                trace.seconds += duracao
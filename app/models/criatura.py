@@ -1,5 +1,9 @@
+from datetime import datetime, timezone
 from app.database.base import Base
-from sqlalchemy import Column, Integer, String, Text
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text, func
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
 
 class Criatura(Base):
     __tablename__ = "criaturas"
@@ -9,6 +13,19 @@ class Criatura(Base):
     regiao = Column(String(20), nullable=False, index=True)
     periculosidade = Column(Integer, nullable=False)
     lenda = Column(Text, nullable=False)
+    # Versão da linha, incrementada a cada update (ETag e If-Match), e momento
+    # da última alteração em UTC (Last-Modified)
+    versao = Column(Integer, nullable=False, server_default="1")
+    atualizado_em = Column(DateTime, nullable=False, default=utcnow, onupdate=utcnow, server_default=func.current_timestamp())
+
+    __table_args__ = (
+        # Atende os filtros por região e faixa de periculosidade da listagem
+        Index("ix_criaturas_regiao_periculosidade", "regiao", "periculosidade"),
+    )
+
+    __mapper_args__ = {
+        "version_id_col": versao
+    }
 
     def __repr__(self) -> str:
         return f"<Criatura(nome='{self.nome}', regiao='{self.regiao}', periculosidade={self.periculosidade})>"
@@ -19,5 +36,7 @@ class Criatura(Base):
             "nome": self.nome,
             "regiao": self.regiao,
             "periculosidade": self.periculosidade,
-            "lenda": self.lenda
+            "lenda": self.lenda,
+            "versao": self.versao,
+            "atualizado_em": self.atualizado_em
         }
\ No newline at end of file
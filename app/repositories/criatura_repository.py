@@ -1,39 +1,160 @@
+from typing import AsyncIterator, Awaitable, Callable, Optional, Sequence, TypeVar
 from app.models.criatura import Criatura
-from app.exceptions.repository_exceptions import RepositoryError, EntityNotFoundError
+from app.exceptions.repository_exceptions import RepositoryError, EntityNotFoundError, VersionConflictError
 from app.exceptions.logger import logger
+from app.config.settings import BULK_CHUNK_SIZE, IN_CHUNK_SIZE, STREAM_YIELD_PER
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
-from sqlalchemy import select
-from app.schemas.criatura_schema import CriaturaCreate, CriaturaUpdate
+from sqlalchemy import DateTime, Integer, Row, Select, String, delete, func, select, text, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.schemas.criatura_schema import CriaturaCreate, CriaturaFiltro, CriaturaUpdate
+from app.repositories.observers import CriaturaObserver
+from app.database.writer import GroupCommitWriter
+
+T = TypeVar("T")
 
 class CriaturaRepository:
-    def __init__(self, db_connection_handler) -> None:
+    def __init__(
+        self,
+        db_connection_handler,
+        observers: Sequence[CriaturaObserver] = (),
+        writer: Optional[GroupCommitWriter] = None,
+        read_connection_handler=None
+    ) -> None:
+        """
+            As leituras usam 'read_connection_handler', quando informado (o pool
+            só de leitura, ver 'create_read_engine'), e as escritas sempre usam
+            'db_connection_handler', o primário.
+        """
         self.__conn = db_connection_handler
+        self.__read_conn = read_connection_handler or db_connection_handler
+        self.__observers = observers
+        self.__writer = writer
 
-    async def insert(self, criatura_data: CriaturaCreate) -> Criatura:
+    async def __write(
+        self,
+        operation: Callable[[AsyncSession], Awaitable[T]],
+        on_commit: Optional[Callable[[T], None]] = None
+    ) -> T:
+        """
+            Executa uma escrita em transação própria: pelo escritor com commit em
+            grupo, quando configurado (ver 'GroupCommitWriter'), ou em uma sessão
+            do handler, com commit ao final e rollback em qualquer erro. A
+            operação não faz commit; os erros do banco chegam a quem chamou
+            como vieram do SQLAlchemy.
+
+            'on_commit' (a notificação dos observadores) recebe o resultado logo
+            após o commit, sem um 'await' entre os dois: uma requisição
+            cancelada depois do commit não deixa caches e réplicas com a linha
+            antiga.
+        """
+        if self.__writer is not None:
+            return await self.__writer.submit(operation, on_commit)
         async with self.__conn as db:
             try:
-                criatura = Criatura(
-                    nome=criatura_data.nome,
-                    regiao=criatura_data.regiao.value,
-                    periculosidade=criatura_data.periculosidade,
-                    lenda=criatura_data.lenda
-                )
-                db.session.add(criatura)
+                resultado = await operation(db.session)
                 await db.session.commit()
-                await db.session.refresh(criatura)
-                return criatura
-            except IntegrityError:
-                await db.session.rollback()
-                raise RepositoryError("Erro ao inserir criatura. Já existe uma criatura com esse nome.")
-            except SQLAlchemyError as e:
+            except BaseException:
                 await db.session.rollback()
-                logger.error(f"Erro ao inserir criatura: {e}")
-                raise RepositoryError("Erro ao salvar criatura no banco de dados.")
+                raise
+            if on_commit is not None:
+                on_commit(resultado)
+            return resultado
 
-    async def select_all(self) -> list[Criatura]:
-        async with self.__conn as db:
+    async def insert(self, criatura_data: CriaturaCreate) -> Criatura:
+        async def operation(session: AsyncSession) -> Criatura:
+            criatura = Criatura(
+                nome=criatura_data.nome,
+                regiao=criatura_data.regiao.value,
+                periculosidade=criatura_data.periculosidade,
+                lenda=criatura_data.lenda
+            )
+            session.add(criatura)
+            await session.flush()
+            await session.refresh(criatura)
+            return criatura
+
+        try:
+            return await self.__write(operation, lambda criatura: self.__notify_saved([criatura]))
+        except IntegrityError:
+            raise RepositoryError("Erro ao inserir criatura. Já existe uma criatura com esse nome.")
+        except SQLAlchemyError as e:
+            logger.error(f"Erro ao inserir criatura: {e}")
+            raise RepositoryError("Erro ao salvar criatura no banco de dados.")
+
+    async def bulk_insert(self, criaturas: Sequence[CriaturaCreate]) -> list[Optional[Row]]:
+        """
+            Insere várias criaturas em uma única transação. O INSERT ... ON CONFLICT
+            DO NOTHING ... RETURNING é compilado uma vez e executado como
+            executemany, que o SQLAlchemy agrupa em blocos de 'BULK_CHUNK_SIZE'
+            linhas por comando ("insertmanyvalues"). Um nome que já existe, no banco ou repetido no próprio lote,
+            não aborta o lote: a posição correspondente no retorno fica None.
+
+            As linhas inseridas são devolvidas como 'Row' com as colunas de
+            'criaturas', sem montar objetos do ORM, que custariam mais que o próprio
+            INSERT em lotes grandes.
+        """
+        resultado: list[Optional[Row]] = [None] * len(criaturas)
+        primeiras: dict[str, int] = {}
+        for indice, criatura_data in enumerate(criaturas):
+            primeiras.setdefault(criatura_data.nome, indice)
+        indices = list(primeiras.values())
+
+        values = [
+            {
+                "nome": criaturas[i].nome,
+                "regiao": criaturas[i].regiao.value,
+                "periculosidade": criaturas[i].periculosidade,
+                "lenda": criaturas[i].lenda
+            }
+            for i in indices
+        ]
+
+        async def operation(session: AsyncSession) -> None:
+            if not values:
+                return
+            insert = self.__insert_ignoring_conflicts(session.bind.dialect.name)
+            query = (
+                insert(Criatura.__table__)
+                .on_conflict_do_nothing(index_elements=["nome"])
+                .returning(*Criatura.__table__.columns)
+                .execution_options(insertmanyvalues_page_size=BULK_CHUNK_SIZE)
+            )
+            response = await session.execute(query, values)
+            for row in response:
+                resultado[primeiras[row.nome]] = row
+
+        try:
+            await self.__write(operation, lambda _: self.__notify_saved([row for row in resultado if row is not None]))
+        except SQLAlchemyError as e:
+            logger.error(f"Erro ao inserir criaturas em lote: {e}")
+            raise RepositoryError("Erro ao salvar criaturas no banco de dados.")
+        return resultado
+
+    @staticmethod
+    def __insert_ignoring_conflicts(dialect_name: str):
+        # ON CONFLICT DO NOTHING só existe nos construtores de INSERT dos dialetos
+        if dialect_name == "postgresql":
+            return postgresql.insert
+        return sqlite.insert
+
+    async def select_all(
+        self,
+        filtro: Optional[CriaturaFiltro] = None,
+        limit: Optional[int] = None,
+        after: Optional[Sequence] = None
+    ) -> list[Criatura]:
+        """
+            Lista as criaturas que atendem ao filtro, na ordem pedida. Com 'limit'
+            e 'after' a busca é paginada por cursor (keyset): 'after' é a chave de
+            ordenação da última linha da página anterior e a consulta continua a
+            partir dela pelo índice, em vez de usar OFFSET.
+        """
+        async with self.__read_conn as db:
             try:
-                query = select(Criatura)
+                query = self.__list_query(filtro, after)
+                if limit is not None:
+                    query = query.limit(limit)
                 response = await db.session.execute(query)
                 criaturas = response.scalars().all()
                 if not criaturas:
@@ -43,8 +164,150 @@ class CriaturaRepository:
                 logger.error(f"Erro ao buscar criaturas.")
                 raise RepositoryError("Erro ao acessar banco de dados.")
 
+    async def select_all_rows(
+        self,
+        campos: Sequence[str],
+        filtro: Optional[CriaturaFiltro] = None,
+        limit: Optional[int] = None,
+        after: Optional[Sequence] = None,
+        primary: bool = False
+    ) -> list[Row]:
+        """
+            Mesma consulta de 'select_all', mas selecionando apenas as colunas de
+            'campos', nessa ordem, e devolvendo as linhas como tuplas, sem montar
+            objetos do ORM nem passar pelo identity map da sessão. Com 'primary',
+            a leitura vai ao primário mesmo havendo um handler de leitura.
+        """
+        async with (self.__conn if primary else self.__read_conn) as db:
+            try:
+                query = self.__list_query(filtro, after, [getattr(Criatura, campo) for campo in campos])
+                if limit is not None:
+                    query = query.limit(limit)
+                response = await db.session.execute(query)
+                return response.all()
+            except SQLAlchemyError as e:
+                logger.error(f"Erro ao buscar criaturas: {e}")
+                raise RepositoryError("Erro ao acessar banco de dados.")
+
+    async def stream_all(self, filtro: Optional[CriaturaFiltro] = None, after: Optional[Sequence] = None) -> AsyncIterator[Criatura]:
+        """
+            Percorre as criaturas sem carregar a tabela inteira: as linhas são
+            lidas do cursor em blocos de 'STREAM_YIELD_PER' e entregues conforme
+            chegam, mantendo o uso de memória constante.
+        """
+        async with self.__read_conn as db:
+            try:
+                query = self.__list_query(filtro, after).execution_options(yield_per=STREAM_YIELD_PER)
+                response = await db.session.stream_scalars(query)
+                async for criatura in response:
+                    yield criatura
+            except SQLAlchemyError as e:
+                logger.error(f"Erro ao percorrer criaturas: {e}")
+                raise RepositoryError("Erro ao acessar banco de dados.")
+
+    async def stream_all_rows(
+        self,
+        campos: Sequence[str],
+        filtro: Optional[CriaturaFiltro] = None,
+        after: Optional[Sequence] = None
+    ) -> AsyncIterator[Row]:
+        """
+            Versão de 'stream_all' que lê apenas as colunas de 'campos' e entrega
+            as linhas como tuplas.
+        """
+        async with self.__read_conn as db:
+            try:
+                query = self.__list_query(filtro, after, [getattr(Criatura, campo) for campo in campos])
+                response = await db.session.stream(query.execution_options(yield_per=STREAM_YIELD_PER))
+                async for row in response:
+                    yield row
+            except SQLAlchemyError as e:
+                logger.error(f"Erro ao percorrer criaturas: {e}")
+                raise RepositoryError("Erro ao acessar banco de dados.")
+
+    async def count(self, filtro: Optional[CriaturaFiltro] = None) -> int:
+        async with self.__read_conn as db:
+            try:
+                query = select(func.count()).select_from(Criatura).where(*self.__filter_conditions(filtro))
+                response = await db.session.execute(query)
+                return response.scalar_one()
+            except SQLAlchemyError as e:
+                logger.error(f"Erro ao contar criaturas: {e}")
+                raise RepositoryError("Erro ao acessar banco de dados.")
+
+    async def search(self, termo: str, limit: int) -> list[Row]:
+        """
+            Busca textual em 'nome' e 'lenda' pelo índice FTS5 'criaturas_fts',
+            ordenada por relevância (bm25, com peso maior para o nome). A consulta
+            parte do índice invertido e só acessa 'criaturas' pelo rowid das
+            linhas encontradas, sem percorrer a coluna 'lenda'.
+        """
+        query = text(
+            """
+            SELECT c.id, c.nome, c.regiao, c.periculosidade,
+                   snippet(criaturas_fts, 1, '<mark>', '</mark>', '…', 16) AS trecho,
+                   bm25(criaturas_fts, 10.0, 1.0) AS relevancia
+            FROM criaturas_fts
+            JOIN criaturas AS c ON c.id = criaturas_fts.rowid
+            WHERE criaturas_fts MATCH :termo
+            ORDER BY relevancia
+            LIMIT :limit
+            """
+        )
+        fts_query = self.__fts_query(termo)
+        if not fts_query:
+            return []
+        async with self.__read_conn as db:
+            try:
+                response = await db.session.execute(query, {"termo": fts_query, "limit": limit})
+                return response.all()
+            except SQLAlchemyError as e:
+                logger.error(f"Erro ao buscar criaturas por texto: {e}")
+                raise RepositoryError("Erro ao acessar banco de dados.")
+
+    @staticmethod
+    def __fts_query(termo: str) -> str:
+        """
+            Converte o texto digitado em uma consulta FTS5 segura: cada palavra vira
+            uma frase entre aspas com busca por prefixo, e todas precisam aparecer.
+            Assim a sintaxe do FTS5 (aspas, operadores, '*') nunca é interpretada.
+        """
+        palavras = [p.replace('"', '""') for p in termo.split()]
+        return " ".join(f'"{p}"*' for p in palavras)
+
+    @staticmethod
+    def __filter_conditions(filtro: Optional[CriaturaFiltro]) -> list:
+        conditions = []
+        if filtro is None:
+            return conditions
+        if filtro.regiao is not None:
+            conditions.append(Criatura.regiao == filtro.regiao.value)
+        if filtro.periculosidade_min is not None:
+            conditions.append(Criatura.periculosidade >= filtro.periculosidade_min)
+        if filtro.periculosidade_max is not None:
+            conditions.append(Criatura.periculosidade <= filtro.periculosidade_max)
+        return conditions
+
+    @classmethod
+    def __list_query(cls, filtro: Optional[CriaturaFiltro], after: Optional[Sequence], columns: Optional[Sequence] = None) -> Select:
+        """
+            Monta a consulta da listagem, da entidade inteira ou apenas das
+            'columns' pedidas. A ordenação sempre termina pelo ID, que desempata
+            valores repetidos e torna a chave do cursor única.
+        """
+        filtro = filtro or CriaturaFiltro()
+        query = select(*columns) if columns else select(Criatura)
+        query = query.where(*cls.__filter_conditions(filtro))
+        keys = [Criatura.id]
+        if filtro.campo_ordenacao != "id":
+            keys.insert(0, getattr(Criatura, filtro.campo_ordenacao))
+        if after is not None:
+            key, value = (tuple_(*keys), tuple_(*after)) if len(keys) > 1 else (keys[0], after[0])
+            query = query.where(key < value if filtro.ordem_decrescente else key > value)
+        return query.order_by(*(k.desc() if filtro.ordem_decrescente else k for k in keys))
+
     async def select_by_id(self, id: int) -> Criatura:
-        async with self.__conn as db:
+        async with self.__read_conn as db:
             try:
                 query = select(Criatura).where(Criatura.id == id)
                 response = await db.session.execute(query)
@@ -57,7 +320,7 @@ class CriaturaRepository:
                 raise RepositoryError("Erro ao acessar banco de dados")
             
     async def select_by_name(self, nome: str) -> Criatura:
-        async with self.__conn as db:
+        async with self.__read_conn as db:
             try:
                 query = select(Criatura).where(Criatura.nome == nome)
                 response = await db.session.execute(query)
@@ -69,72 +332,287 @@ class CriaturaRepository:
                 logger.error(f"Erro ao buscar criatura por nome: {e}")
                 raise RepositoryError("Erro ao acessar banco de dados")
 
-    async def update_by_id(self, id: int, update_data: CriaturaUpdate) -> Criatura:
-        async with self.__conn as db:
+    async def select_row_by_id(self, id: int, campos: Sequence[str]) -> Row:
+        """
+            Lê apenas as colunas de 'campos' da criatura, na ordem pedida, para as
+            respostas com 'fields='.
+        """
+        return await self.__select_row(Criatura.id == id, campos, f"Criatura com ID '{id}' não encontrada.")
+
+    async def select_row_by_name(self, nome: str, campos: Sequence[str]) -> Row:
+        return await self.__select_row(Criatura.nome == nome, campos, f"Criatura com nome '{nome}' não encontrada.")
+
+    async def __select_row(self, condition, campos: Sequence[str], not_found_message: str) -> Row:
+        async with self.__read_conn as db:
             try:
-                query = select(Criatura).where(Criatura.id == id)
+                query = select(*(getattr(Criatura, campo) for campo in campos)).where(condition)
                 response = await db.session.execute(query)
-                criatura = response.scalar_one_or_none()
-                if not criatura:
-                    raise EntityNotFoundError(f"Criatura com ID '{id}' não encontrada.")
-                for field, value in update_data.model_dump(exclude_unset=True).items():
-                    setattr(criatura, field, value)
-                await db.session.commit()
-                await db.session.refresh(criatura)
-                return criatura
-            except IntegrityError:
-                await db.session.rollback()
-                raise RepositoryError("Já existe uma criatura com esse nome.")
+                row = response.one_or_none()
+                if row is None:
+                    raise EntityNotFoundError(not_found_message)
+                return row
             except SQLAlchemyError as e:
-                await db.session.rollback()
-                raise RepositoryError(f"Erro ao acessar banco de dados e atualizar criatura: {e}")
-            
-    async def update_by_name(self, nome: str, update_data: CriaturaUpdate) -> Criatura:
-        async with self.__conn as db:
+                logger.error(f"Erro ao buscar criatura: {e}")
+                raise RepositoryError("Erro ao acessar banco de dados")
+
+    async def select_rows_by_ids(self, ids: Sequence[int], campos: Sequence[str]) -> list[Row]:
+        """
+            Lê as colunas de 'campos' de várias criaturas com 'WHERE id IN (...)',
+            em blocos de 'IN_CHUNK_SIZE' chaves para ficar abaixo do limite de
+            parâmetros do SQLite. Todos os blocos usam a mesma sessão e conexão.
+            IDs inexistentes simplesmente não aparecem no retorno, que não
+            segue a ordem de 'ids'.
+        """
+        return await self.__select_rows_in(Criatura.id, ids, campos)
+
+    async def select_rows_by_names(self, nomes: Sequence[str], campos: Sequence[str]) -> list[Row]:
+        return await self.__select_rows_in(Criatura.nome, nomes, campos)
+
+    async def __select_rows_in(self, column, values: Sequence, campos: Sequence[str]) -> list[Row]:
+        async with self.__read_conn as db:
             try:
-                query = select(Criatura).where(Criatura.nome == nome)
+                columns = [getattr(Criatura, campo) for campo in campos]
+                rows = []
+                for inicio in range(0, len(values), IN_CHUNK_SIZE):
+                    query = select(*columns).where(column.in_(values[inicio:inicio + IN_CHUNK_SIZE]))
+                    response = await db.session.execute(query)
+                    rows += response.all()
+                return rows
+            except SQLAlchemyError as e:
+                logger.error(f"Erro ao buscar criaturas em lote: {e}")
+                raise RepositoryError("Erro ao acessar banco de dados")
+
+    async def select_version_by_id(self, id: int, primary: bool = False) -> Row:
+        """
+            Retorna apenas a versão e a data de alteração da criatura, para
+            responder requisições condicionais sem carregar a linha inteira.
+            Com 'primary', a leitura vai ao primário mesmo havendo um handler
+            de leitura, que pode estar atrasado (a conferência do If-Match).
+        """
+        return await self.__select_version(Criatura.id == id, f"Criatura com ID '{id}' não encontrada.", primary)
+
+    async def select_version_by_name(self, nome: str, primary: bool = False) -> Row:
+        return await self.__select_version(Criatura.nome == nome, f"Criatura com nome '{nome}' não encontrada.", primary)
+
+    async def __select_version(self, condition, not_found_message: str, primary: bool) -> Row:
+        async with (self.__conn if primary else self.__read_conn) as db:
+            try:
+                query = select(Criatura.id, Criatura.versao, Criatura.atualizado_em).where(condition)
                 response = await db.session.execute(query)
-                criatura = response.scalar_one_or_none()
-                if not criatura:
-                    raise EntityNotFoundError(f"Criatura com nome '{nome}' não encontrada.")
-                for field, value in update_data.model_dump(exclude_unset=True).items():
-                    setattr(criatura, field, value)
-                await db.session.commit()
-                await db.session.refresh(criatura)
-                return criatura
-            except IntegrityError:
-                await db.session.rollback()
-                raise RepositoryError("Já existe uma criatura com esse nome.")
+                row = response.one_or_none()
+                if row is None:
+                    raise EntityNotFoundError(not_found_message)
+                return row
             except SQLAlchemyError as e:
-                await db.session.rollback()
-                raise RepositoryError(f"Erro ao acessar banco de dados e atualizar criatura: {e}")
+                logger.error(f"Erro ao buscar versão da criatura: {e}")
+                raise RepositoryError("Erro ao acessar banco de dados")
 
-    async def delete_by_id(self, id: int) -> None:
-        async with self.__conn as db:
+    async def select_catalog_version(self, primary: bool = False) -> Row:
+        """
+            Retorna a versão do catálogo inteiro, incrementada por triggers a cada
+            escrita em 'criaturas' (ver 'criaturas_catalogo').
+        """
+        async with (self.__conn if primary else self.__read_conn) as db:
             try:
-                query = select(Criatura).where(Criatura.id == id)
+                query = text("SELECT versao, atualizado_em FROM criaturas_catalogo WHERE id = 1").columns(
+                    versao=Integer, atualizado_em=DateTime
+                )
                 response = await db.session.execute(query)
-                criatura = response.scalar_one_or_none()
-                if not criatura:
-                    raise EntityNotFoundError(f"Criatura com ID '{id}' não encontrada.")
-                await db.session.delete(criatura)
+                return response.one()
+            except SQLAlchemyError as e:
+                logger.error(f"Erro ao buscar versão do catálogo: {e}")
+                raise RepositoryError("Erro ao acessar banco de dados")
+
+    async def select_statistics(self) -> list[Row]:
+        """
+            Retorna (regiao, periculosidade, quantidade) de 'criaturas_estatisticas',
+            mantida por triggers a cada escrita em 'criaturas'. A leitura percorre
+            no máximo regiões x níveis de periculosidade linhas, qualquer que seja
+            o tamanho do catálogo.
+        """
+        async with self.__read_conn as db:
+            try:
+                query = text(
+                    "SELECT regiao, periculosidade, quantidade FROM criaturas_estatisticas WHERE quantidade > 0"
+                ).columns(regiao=String, periculosidade=Integer, quantidade=Integer)
+                response = await db.session.execute(query)
+                return response.all()
+            except SQLAlchemyError as e:
+                logger.error(f"Erro ao buscar estatísticas: {e}")
+                raise RepositoryError("Erro ao acessar banco de dados")
+
+    async def rebuild_statistics(self) -> int:
+        """
+            Recalcula 'criaturas_estatisticas' a partir de 'criaturas' com um
+            GROUP BY, em uma única transação. Usado apenas para recuperação (ver
+            'app/tools/rebuild_stats.py'). Retorna o total de criaturas contadas.
+        """
+        async with self.__conn as db:
+            try:
+                await db.session.execute(text("DELETE FROM criaturas_estatisticas"))
+                await db.session.execute(text(
+                    "INSERT INTO criaturas_estatisticas (regiao, periculosidade, quantidade) "
+                    "SELECT regiao, periculosidade, COUNT(*) FROM criaturas GROUP BY regiao, periculosidade"
+                ))
+                response = await db.session.execute(text("SELECT COALESCE(SUM(quantidade), 0) FROM criaturas_estatisticas"))
+                total = response.scalar_one()
                 await db.session.commit()
+                return total
             except SQLAlchemyError as e:
                 await db.session.rollback()
-                raise RepositoryError(f"Erro ao acessar banco de dados e deletar criatura: {e}")
-            
-    async def delete_by_name(self, nome: str) -> None:
+                logger.error(f"Erro ao recalcular estatísticas: {e}")
+                raise RepositoryError("Erro ao recalcular as estatísticas no banco de dados.")
+
+    async def select_events_after(self, after: int, limit: int) -> list[Row]:
+        """
+            Retorna até 'limit' eventos do outbox 'criaturas_eventos' com ID maior
+            que 'after', em ordem: (id, tipo, criatura_id, nome, versao,
+            criado_em). Os eventos são gravados por triggers na mesma transação
+            de cada escrita em 'criaturas', e a leitura usa o primário para não
+            ficar atrás dele.
+        """
         async with self.__conn as db:
             try:
-                query = select(Criatura).where(Criatura.nome == nome)
+                query = text(
+                    "SELECT id, tipo, criatura_id, nome, versao, criado_em FROM criaturas_eventos "
+                    "WHERE id > :after ORDER BY id LIMIT :limit"
+                ).columns(
+                    id=Integer, tipo=String, criatura_id=Integer, nome=String, versao=Integer, criado_em=DateTime
+                )
+                response = await db.session.execute(query, {"after": after, "limit": limit})
+                return response.all()
+            except SQLAlchemyError as e:
+                logger.error(f"Erro ao buscar eventos: {e}")
+                raise RepositoryError("Erro ao acessar banco de dados")
+
+    async def select_event_bounds(self) -> Row:
+        """
+            Retorna (primeiro, ultimo): os IDs do evento mais antigo e do mais
+            recente ainda no outbox, ambos 0 sem eventos. A retenção guarda
+            sempre ao menos o último evento (ver 'delete_events_up_to').
+        """
+        async with self.__conn as db:
+            try:
+                query = text(
+                    "SELECT COALESCE(MIN(id), 0) AS primeiro, COALESCE(MAX(id), 0) AS ultimo FROM criaturas_eventos"
+                ).columns(primeiro=Integer, ultimo=Integer)
                 response = await db.session.execute(query)
-                criatura = response.scalar_one_or_none()
-                if not criatura:
-                    raise EntityNotFoundError(f"Criatura com nome '{nome}' não encontrada.")
-                await db.session.delete(criatura)
-                await db.session.commit()
+                return response.one()
             except SQLAlchemyError as e:
-                await db.session.rollback()
-                raise RepositoryError(f"Erro ao acessar banco de dados e deletar criatura: {e}")
+                logger.error(f"Erro ao buscar limites dos eventos: {e}")
+                raise RepositoryError("Erro ao acessar banco de dados")
+
+    async def delete_events_up_to(self, id: int) -> int:
+        """
+            Apaga do outbox os eventos com ID até 'id' (retenção), pelo mesmo
+            caminho das demais escritas (o escritor com commit em grupo, quando
+            configurado). Retorna quantos foram apagados.
+        """
+        async def operation(session: AsyncSession) -> int:
+            response = await session.execute(text("DELETE FROM criaturas_eventos WHERE id <= :id"), {"id": id})
+            return response.rowcount
+
+        try:
+            return await self.__write(operation)
+        except SQLAlchemyError as e:
+            logger.error(f"Erro ao apagar eventos: {e}")
+            raise RepositoryError("Erro ao apagar eventos no banco de dados.")
+
+    async def update_by_id(self, id: int, update_data: CriaturaUpdate, versao: Optional[int] = None) -> Criatura:
+        return await self.__update(Criatura.id == id, update_data, versao, f"Criatura com ID '{id}'")
 
-    
+    async def update_by_name(self, nome: str, update_data: CriaturaUpdate, versao: Optional[int] = None) -> Criatura:
+        return await self.__update(Criatura.nome == nome, update_data, versao, f"Criatura com nome '{nome}'")
+
+    async def __update(self, condition, update_data: CriaturaUpdate, versao: Optional[int], descricao: str) -> Criatura:
+        """
+            Atualiza a criatura com um único UPDATE ... RETURNING, que incrementa a
+            versão e devolve a linha gravada, sem SELECT prévio nem refresh. Com
+            'versao', a versão esperada entra no WHERE; só quando nenhuma linha é
+            afetada uma segunda consulta distingue criatura inexistente de
+            conflito de versão.
+        """
+        values = update_data.model_dump(exclude_unset=True)
+        if "regiao" in values and values["regiao"] is not None:
+            values["regiao"] = values["regiao"].value
+        conditions = [condition]
+        if versao is not None:
+            conditions.append(Criatura.versao == versao)
+
+        async def operation(session: AsyncSession) -> Criatura:
+            if values:
+                query = (
+                    update(Criatura)
+                    .where(*conditions)
+                    .values(**values, versao=Criatura.versao + 1)
+                    .returning(Criatura)
+                    # A linha devolvida substitui os valores de um objeto que já
+                    # esteja na sessão, em vez de ser descartada
+                    .execution_options(synchronize_session=False, populate_existing=True)
+                )
+            else:
+                # Sem campos para alterar a linha não é gravada nem muda de versão
+                query = select(Criatura).where(*conditions)
+            response = await session.execute(query)
+            criatura = response.scalar_one_or_none()
+            if criatura is None:
+                await self.__raise_not_updated(session, condition, versao, descricao)
+            return criatura
+
+        def on_commit(criatura: Criatura) -> None:
+            if values:
+                self.__notify_saved([criatura])
+
+        try:
+            return await self.__write(operation, on_commit)
+        except IntegrityError:
+            raise RepositoryError("Já existe uma criatura com esse nome.")
+        except SQLAlchemyError as e:
+            raise RepositoryError(f"Erro ao acessar banco de dados e atualizar criatura: {e}")
+
+    @staticmethod
+    async def __raise_not_updated(session, condition, versao: Optional[int], descricao: str) -> None:
+        if versao is not None:
+            response = await session.execute(select(Criatura.versao).where(condition))
+            atual = response.scalar_one_or_none()
+            if atual is not None:
+                raise VersionConflictError(f"{descricao} está na versão {atual}, não na {versao}.")
+        raise EntityNotFoundError(f"{descricao} não encontrada.")
+
+    async def delete_by_id(self, id: int) -> None:
+        await self.__delete(Criatura.id == id, f"Criatura com ID '{id}' não encontrada.")
+
+    async def delete_by_name(self, nome: str) -> None:
+        await self.__delete(Criatura.nome == nome, f"Criatura com nome '{nome}' não encontrada.")
+
+    async def __delete(self, condition, not_found_message: str) -> None:
+        """
+            Remove a criatura com um único DELETE ... RETURNING id; nenhum ID
+            retornado significa que a criatura não existe.
+        """
+        async def operation(session: AsyncSession) -> int:
+            query = delete(Criatura).where(condition).returning(Criatura.id).execution_options(synchronize_session=False)
+            response = await session.execute(query)
+            id = response.scalar_one_or_none()
+            if id is None:
+                raise EntityNotFoundError(not_found_message)
+            return id
+
+        try:
+            await self.__write(operation, lambda id: self.__notify_deleted([id]))
+        except SQLAlchemyError as e:
+            raise RepositoryError(f"Erro ao acessar banco de dados e deletar criatura: {e}")
+
+    def __notify_saved(self, criaturas: Sequence[Criatura]) -> None:
+        for observer in self.__observers:
+            try:
+                observer.on_saved(criaturas)
+            except Exception as e:
+                logger.error(f"Erro ao notificar gravação de criaturas: {e}")
+
+    def __notify_deleted(self, ids: Sequence[int]) -> None:
+        for observer in self.__observers:
+            try:
+                observer.on_deleted(ids)
+            except Exception as e:
+                logger.error(f"Erro ao notificar remoção de criaturas: {e}")
@@ -0,0 +1,16 @@
+from typing import Protocol, Sequence, Union
+from sqlalchemy import Row
+from app.models.criatura import Criatura
+
+class CriaturaObserver(Protocol):
+    """
+        Interface dos objetos avisados pelo 'CriaturaRepository' depois que uma
+        escrita é confirmada (commit), como os caches em memória.
+
+        'on_saved' recebe as criaturas inseridas ou atualizadas, já com os valores
+        gravados, e 'on_deleted' os IDs das criaturas removidas. Na inserção em
+        lote as criaturas chegam como 'Row' com as mesmas colunas do modelo.
+    """
+    def on_saved(self, criaturas: Sequence[Union[Criatura, Row]]) -> None: ...
+
+    def on_deleted(self, ids: Sequence[int]) -> None: ...
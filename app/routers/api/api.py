@@ -1,8 +1,223 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from app.cache.catalog_cache import CatalogCache
+from app.cache.criatura_cache import CriaturaCache
+from app.cache.criatura_replica import CriaturaReplica, check_replica, refresh_replica
+from app.cache.autocomplete_index import AutocompleteIndex, load_autocomplete_index, refresh_autocomplete_index
+from app.config.settings import (
+    AUTOCOMPLETE_ENABLED,
+    AUTOCOMPLETE_REFRESH_SECONDS,
+    CACHE_ENABLED,
+    CACHE_MAX_SIZE,
+    CACHE_TTL,
+    CACHE_NEGATIVE_TTL,
+    CATALOG_CACHE_ENABLED,
+    CATALOG_CACHE_MAX_BYTES,
+    CATALOG_CACHE_TTL,
+    DATABASE_URL,
+    DB_POOL_WARMUP,
+    EVENTS_BUFFER_SIZE,
+    EVENTS_ENABLED,
+    EVENTS_POLL_SECONDS,
+    EVENTS_QUEUE_SIZE,
+    EVENTS_RETENTION,
+    IN_CHUNK_SIZE,
+    LOADER_ENABLED,
+    LOADER_WINDOW_US,
+    METRICS_ENABLED,
+    READ_DATABASE_URL,
+    READ_STICKY_SECONDS,
+    REPLICA_CHECK_SECONDS,
+    REPLICA_ENABLED,
+    REPLICA_REFRESH_SECONDS,
+    SCHEMA_BOOTSTRAP,
+    SLOW_QUERY_MS,
+    SQL_TRACE_ENABLED,
+    WRITE_BATCH_DELAY_MS,
+    WRITE_BATCH_MAX,
+    WRITE_PIPELINE_ENABLED,
+    WRITE_QUEUE_SIZE,
+)
+from app.database.connection import DBConnectionHandler, create_engine, create_read_engine, create_session_factory, enable_wal, warm_up
+from app.database.schema import init_schema, set_outbox_triggers
+from app.database.writer import GroupCommitWriter, create_writer_engine
+from app.exceptions.logger import logger
+from app.metrics.instrumentation import (
+    MetricsMiddleware,
+    instrument_broadcaster,
+    instrument_cache,
+    instrument_catalog_cache,
+    instrument_engine,
+    instrument_loader,
+    instrument_replica,
+    instrument_writer,
+)
+from app.metrics.tracing import SQLTraceMiddleware, instrument_tracing
+from app.repositories.criatura_repository import CriaturaRepository
+from app.routers.api.consistency import ReadYourWritesMiddleware
+from app.services.criatura_loader import CriaturaLoader
+from app.services.event_broadcaster import EventBroadcaster
 from app.routers.routes.criatura_routes import router as criaturas_routes
+from app.routers.routes.metrics_routes import router as metrics_routes
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+        Cria uma única AsyncEngine e uma única fábrica de sessões para todo o
+        processo, guardadas em 'app.state', prepara o schema conforme
+        'SCHEMA_BOOTSTRAP' e descarta o pool no desligamento. O cache de
+        criaturas e o da listagem completa, quando habilitados, também são
+        únicos por processo. Com 'METRICS_ENABLED', a engine e os caches
+        passam a alimentar o '/metrics'; com 'SQL_TRACE_ENABLED', as
+        consultas são contadas por requisição.
+
+        Com 'WRITE_PIPELINE_ENABLED', as escritas passam pelo escritor único com
+        commit em grupo, que tem engine e conexão próprias e grava o que ainda
+        estiver na fila antes do desligamento.
+
+        Com 'READ_DATABASE_URL', as leituras usam uma engine própria, só de
+        leitura; um banco SQLite em arquivo passa para o modo WAL, para que
+        essas leituras não esperem pelos commits do primário.
+
+        Com 'DB_POOL_WARMUP', as conexões fixas dos pools são abertas antes de a
+        aplicação aceitar a primeira requisição.
+
+        Com 'AUTOCOMPLETE_ENABLED', o índice de nomes do autocomplete é montado
+        a partir do banco antes da primeira requisição e, com
+        'AUTOCOMPLETE_REFRESH_SECONDS', recriado quando outro processo altera o
+        catálogo.
+
+        Com 'LOADER_ENABLED', as buscas por ID e por nome das requisições
+        concorrentes são agrupadas por um 'CriaturaLoader' único por processo,
+        que lê do pool de leitura quando há um.
+
+        Com 'REPLICA_ENABLED', a tabela 'criaturas' é copiada para uma réplica
+        em memória antes da primeira requisição, e as leituras passam a ser
+        feitas nela (ver 'CriaturaReplica').
+
+        Com 'EVENTS_ENABLED', as triggers do outbox 'criaturas_eventos' são
+        criadas (e, sem ela, removidas) e um 'EventBroadcaster' único por
+        processo distribui os eventos às conexões de 'GET /criaturas/eventos'.
+        Com SCHEMA_BOOTSTRAP=none as triggers não são tocadas: quem gerencia o
+        schema usa 'python -m app.tools.outbox'.
+    """
+    engine = create_engine()
+    await init_schema(engine)
+    if SCHEMA_BOOTSTRAP != "none":
+        await set_outbox_triggers(engine, EVENTS_ENABLED)
+    app.state.engine = engine
+    app.state.session_factory = create_session_factory(engine)
+    app.state.criatura_cache = (
+        CriaturaCache(CACHE_MAX_SIZE, CACHE_TTL, CACHE_NEGATIVE_TTL) if CACHE_ENABLED else None
+    )
+    app.state.catalog_cache = (
+        CatalogCache(CATALOG_CACHE_MAX_BYTES, CATALOG_CACHE_TTL) if CATALOG_CACHE_ENABLED else None
+    )
+    read_engine = None
+    app.state.read_session_factory = None
+    if READ_DATABASE_URL:
+        await enable_wal(engine)
+        read_engine = create_read_engine(READ_DATABASE_URL)
+        app.state.read_session_factory = create_session_factory(read_engine)
+    app.state.criatura_loader = None
+    if LOADER_ENABLED:
+        loader_session_factory = app.state.read_session_factory or app.state.session_factory
+        app.state.criatura_loader = CriaturaLoader(
+            lambda: CriaturaRepository(DBConnectionHandler(loader_session_factory)),
+            LOADER_WINDOW_US / 1_000_000,
+            IN_CHUNK_SIZE
+        )
+    app.state.writer = None
+    if WRITE_PIPELINE_ENABLED:
+        writer_engine = create_writer_engine(DATABASE_URL)
+        if METRICS_ENABLED:
+            instrument_engine(writer_engine, pool_gauges=False)
+        if SQL_TRACE_ENABLED:
+            instrument_tracing(writer_engine, SLOW_QUERY_MS)
+        app.state.writer = GroupCommitWriter(writer_engine, WRITE_BATCH_MAX, WRITE_BATCH_DELAY_MS / 1000, WRITE_QUEUE_SIZE)
+        await app.state.writer.start()
+    if METRICS_ENABLED:
+        instrument_engine(engine)
+        instrument_cache(app.state.criatura_cache)
+        instrument_catalog_cache(app.state.catalog_cache)
+        instrument_loader(app.state.criatura_loader)
+        instrument_writer(app.state.writer)
+        if read_engine is not None:
+            instrument_engine(read_engine, pool_gauges=False)
+    if SQL_TRACE_ENABLED:
+        instrument_tracing(engine, SLOW_QUERY_MS)
+        if read_engine is not None:
+            instrument_tracing(read_engine, SLOW_QUERY_MS)
+    if DB_POOL_WARMUP:
+        abertas = await warm_up(engine)
+        if read_engine is not None:
+            abertas += await warm_up(read_engine)
+        logger.info(f"Pool de conexões aquecido: {abertas} conexões abertas.")
+    app.state.autocomplete_index = None
+    refresh_task = None
+    if AUTOCOMPLETE_ENABLED:
+        repository = CriaturaRepository(DBConnectionHandler(app.state.session_factory))
+        app.state.autocomplete_index = AutocompleteIndex()
+        versao = await load_autocomplete_index(app.state.autocomplete_index, repository)
+        if AUTOCOMPLETE_REFRESH_SECONDS > 0:
+            refresh_task = asyncio.create_task(refresh_autocomplete_index(
+                app.state.autocomplete_index, repository, AUTOCOMPLETE_REFRESH_SECONDS, versao
+            ))
+    app.state.criatura_replica = None
+    replica_tasks = []
+    if REPLICA_ENABLED:
+        repository = CriaturaRepository(DBConnectionHandler(app.state.session_factory))
+        app.state.criatura_replica = CriaturaReplica()
+        versao = await app.state.criatura_replica.load(repository)
+        logger.info(f"Réplica em memória carregada: {len(app.state.criatura_replica)} criaturas.")
+        if REPLICA_REFRESH_SECONDS > 0:
+            replica_tasks.append(asyncio.create_task(refresh_replica(
+                app.state.criatura_replica, repository, REPLICA_REFRESH_SECONDS, versao
+            )))
+        if REPLICA_CHECK_SECONDS > 0:
+            replica_tasks.append(asyncio.create_task(check_replica(
+                app.state.criatura_replica, repository, REPLICA_CHECK_SECONDS
+            )))
+    app.state.event_broadcaster = None
+    if EVENTS_ENABLED:
+        # Lê sempre do primário, e a retenção grava pelo escritor, se houver
+        app.state.event_broadcaster = EventBroadcaster(
+            lambda: CriaturaRepository(DBConnectionHandler(app.state.session_factory), writer=app.state.writer),
+            EVENTS_POLL_SECONDS,
+            EVENTS_BUFFER_SIZE,
+            EVENTS_QUEUE_SIZE,
+            IN_CHUNK_SIZE,
+            EVENTS_RETENTION
+        )
+        app.state.event_broadcaster.start()
+    if METRICS_ENABLED:
+        instrument_replica(app.state.criatura_replica)
+        instrument_broadcaster(app.state.event_broadcaster)
+    try:
+        yield
+    finally:
+        if refresh_task is not None:
+            refresh_task.cancel()
+        for task in replica_tasks:
+            task.cancel()
+        if app.state.event_broadcaster is not None:
+            await app.state.event_broadcaster.stop()
+        if app.state.writer is not None:
+            await app.state.writer.stop()
+        if read_engine is not None:
+            await read_engine.dispose()
+        await engine.dispose()
 
 def create_app() -> FastAPI:
-    app = FastAPI(title="Bestiário Brasileiro")
+    app = FastAPI(title="Bestiário Brasileiro", lifespan=lifespan)
     app.include_router(criaturas_routes)
+    if METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+        app.include_router(metrics_routes)
+    if SQL_TRACE_ENABLED:
+        app.add_middleware(SQLTraceMiddleware)
+    if READ_DATABASE_URL and READ_STICKY_SECONDS > 0:
+        app.add_middleware(ReadYourWritesMiddleware, sticky_seconds=READ_STICKY_SECONDS)
     return app
 
@@ -0,0 +1,77 @@
+import email.utils
+import hashlib
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import Request, Response
+
+def criatura_etag(id: int, versao: int, atualizado_em: datetime, variante: str = "") -> str:
+    """
+        ETag de uma criatura. A data de alteração entra junto com a versão para
+        que um ID reaproveitado após um delete não repita o ETag antigo; a
+        'variante' distingue representações parciais (parâmetro 'fields').
+    """
+    micros = int(atualizado_em.replace(tzinfo=timezone.utc).timestamp() * 1_000_000)
+    if variante:
+        digest = hashlib.blake2s(variante.encode(), digest_size=4).hexdigest()
+        return f'"{id}-{versao}-{micros:x}-{digest}"'
+    return f'"{id}-{versao}-{micros:x}"'
+
+def catalogo_etag(request: Request, versao: int) -> str:
+    """
+        ETag da listagem: a versão do catálogo combinada com a query string e o
+        Accept, já que filtros, páginas e formatos diferentes geram corpos
+        diferentes para a mesma versão.
+    """
+    variant = f"{sorted(request.query_params.multi_items())}|{request.headers.get('accept', '')}"
+    digest = hashlib.blake2s(variant.encode(), digest_size=8).hexdigest()
+    return f'"catalogo-{versao}-{digest}"'
+
+def http_date(value: datetime) -> str:
+    return email.utils.format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+def etag_matches(header: str, etag: str, weak: bool) -> bool:
+    """
+        Verifica se o ETag aparece na lista do header. A comparação fraca
+        (If-None-Match) ignora o prefixo 'W/'; a forte (If-Match) não aceita
+        ETags fracos.
+    """
+    for tag in (t.strip() for t in header.split(",")):
+        if tag == "*":
+            return True
+        if weak:
+            tag = tag.removeprefix("W/")
+        if tag == etag:
+            return True
+    return False
+
+def set_validators(response: Response, etag: str, last_modified: Optional[datetime]) -> None:
+    response.headers["ETag"] = etag
+    if last_modified is not None:
+        response.headers["Last-Modified"] = http_date(last_modified)
+
+def is_conditional(request: Request) -> bool:
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+        Avalia If-None-Match e, apenas na ausência dele, If-Modified-Since,
+        conforme a RFC 9110.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag, weak=True)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = email.utils.parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+def not_modified(etag: str, last_modified: Optional[datetime]) -> Response:
+    response = Response(status_code=304)
+    set_validators(response, etag, last_modified)
+    return response
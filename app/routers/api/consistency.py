@@ -0,0 +1,49 @@
+import time
+from fastapi import Request
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Cookie com o instante (epoch, em segundos) até o qual o cliente lê do primário
+PRIMARY_COOKIE = "bestiario_primario"
+
+WRITE_METHODS = frozenset(("POST", "PUT", "PATCH", "DELETE"))
+
+class ReadYourWritesMiddleware:
+    """
+        Middleware ASGI que, após uma escrita bem-sucedida, grava no cliente o
+        cookie 'PRIMARY_COOKIE' válido por 'sticky_seconds'. Enquanto ele vale,
+        as leituras desse cliente vão para o primário (ver 'reads_from_primary')
+        e enxergam a própria escrita mesmo que a réplica ainda não a tenha.
+
+        O prazo vai no valor do cookie e é conferido no servidor, então um
+        cliente que ignore o 'Max-Age' não fica preso ao primário.
+    """
+    def __init__(self, app: ASGIApp, sticky_seconds: float) -> None:
+        self.app = app
+        self.sticky_seconds = sticky_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = MutableHeaders(scope=message)
+                ate = time.time() + self.sticky_seconds
+                headers.append(
+                    "Set-Cookie",
+                    f"{PRIMARY_COOKIE}={ate:.0f}; Max-Age={self.sticky_seconds:.0f}; Path=/; HttpOnly; SameSite=Lax"
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+def reads_from_primary(request: Request) -> bool:
+    valor = request.cookies.get(PRIMARY_COOKIE)
+    if valor is None:
+        return False
+    try:
+        return float(valor) > time.time()
+    except ValueError:
+        return False
@@ -1,8 +1,44 @@
+from typing import Optional
+from fastapi import Request
+from app.cache.catalog_cache import CatalogCache
 from app.database.connection import DBConnectionHandler
+from app.routers.api.consistency import reads_from_primary
 from app.repositories.criatura_repository import CriaturaRepository
 from app.services.criatura_service import CriaturaService
+from app.services.event_broadcaster import EventBroadcaster
 
-def get_criatura_service() -> CriaturaService:
-    conn = DBConnectionHandler()
-    repo = CriaturaRepository(conn)
-    return CriaturaService(repo)
\ No newline at end of file
+def get_criatura_service(request: Request) -> CriaturaService:
+    state = request.app.state
+    cache = state.criatura_cache
+    loader = state.criatura_loader
+    replica = state.criatura_replica
+    observers = [
+        observer for observer in (
+            cache, state.catalog_cache, state.autocomplete_index, loader, replica, state.event_broadcaster
+        )
+        if observer is not None
+    ]
+    conn = DBConnectionHandler(state.session_factory)
+    # Logo após uma escrita, o cliente lê do primário para enxergar o que gravou
+    read_conn = None
+    if reads_from_primary(request):
+        # O loader lê do pool de leitura e é compartilhado: fica de fora
+        loader = None
+    elif state.read_session_factory is not None:
+        read_conn = DBConnectionHandler(state.read_session_factory)
+    repo = CriaturaRepository(
+        conn,
+        observers=observers,
+        writer=state.writer,
+        read_connection_handler=read_conn
+    )
+    if replica is not None:
+        # A réplica já está em memória: o cache e o loader não teriam o que poupar
+        return CriaturaService(repo, autocomplete=state.autocomplete_index, replica=replica)
+    return CriaturaService(repo, cache=cache, autocomplete=state.autocomplete_index, loader=loader)
+
+def get_catalog_cache(request: Request) -> Optional[CatalogCache]:
+    return request.app.state.catalog_cache
+
+def get_event_broadcaster(request: Request) -> Optional[EventBroadcaster]:
+    return request.app.state.event_broadcaster
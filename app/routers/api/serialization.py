@@ -0,0 +1,68 @@
+from typing import Any, Sequence
+from pydantic import TypeAdapter
+from app.schemas.criatura_schema import CriaturaResponse
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional
+    orjson = None
+
+# Campos na mesma ordem em que o 'CriaturaResponse' os serializa
+CAMPOS_CRIATURA = tuple(CriaturaResponse.model_fields)
+
+_LISTA_ADAPTER = TypeAdapter(list[dict[str, Any]])
+_ITEM_ADAPTER = TypeAdapter(dict[str, Any])
+
+def dump_criaturas(rows: Sequence[Sequence], campos: Sequence[str] = CAMPOS_CRIATURA) -> bytes:
+    """
+        Serializa linhas já lidas do banco (tuplas com os valores na ordem de
+        'campos') direto para um array JSON, sem criar um 'CriaturaResponse' por
+        linha nem validar de novo no 'response_model'. Usa o orjson quando ele
+        está instalado e, senão, um TypeAdapter do Pydantic compilado uma única
+        vez; os dois geram o mesmo JSON do 'CriaturaResponse'.
+    """
+    itens = [dict(zip(campos, row)) for row in rows]
+    if orjson is not None:
+        return orjson.dumps(itens)
+    return _LISTA_ADAPTER.dump_json(itens)
+
+def dump_criatura_line(row: Sequence, campos: Sequence[str] = CAMPOS_CRIATURA) -> bytes:
+    """
+        Serializa uma linha como um objeto JSON terminado em quebra de linha,
+        para a listagem em NDJSON.
+    """
+    item = dict(zip(campos, row))
+    if orjson is not None:
+        return orjson.dumps(item, option=orjson.OPT_APPEND_NEWLINE)
+    return _ITEM_ADAPTER.dump_json(item) + b"\n"
+
+# Codificações comprimidas na ordem de preferência, para qualidades iguais
+ENCODING_PREFERENCE = ("br", "gzip")
+
+def choose_encoding(accept_encoding: str, available) -> str:
+    """
+        Escolhe, entre as codificações em 'available', a de maior qualidade
+        ('q') no header Accept-Encoding; sem nenhuma aceita, responde sem
+        compressão ("identity").
+    """
+    qualidades: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        nome, _, parametros = item.strip().partition(";")
+        nome = nome.strip().lower()
+        if not nome:
+            continue
+        q = 1.0
+        parametro = parametros.strip()
+        if parametro.startswith("q="):
+            try:
+                q = float(parametro[2:])
+            except ValueError:
+                q = 0.0
+        qualidades[nome] = q
+    curinga = qualidades.get("*", 0.0)
+    melhor, melhor_q = "identity", 0.0
+    for encoding in ENCODING_PREFERENCE:
+        q = qualidades.get(encoding, curinga)
+        if encoding in available and q > melhor_q:
+            melhor, melhor_q = encoding, q
+    return melhor
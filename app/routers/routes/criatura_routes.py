@@ -1,33 +1,464 @@
-from fastapi import APIRouter, Depends
-from app.routers.api.dependencies import get_criatura_service
-from app.schemas.criatura_schema import CriaturaCreate, CriaturaResponse, CriaturaUpdate
+import asyncio
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Sequence
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from app.cache.catalog_cache import CatalogCache, CatalogEntry, compress_variants
+from app.config.settings import (
+    AUTOCOMPLETE_LIMIT_DEFAULT,
+    AUTOCOMPLETE_LIMIT_MAX,
+    BULK_MAX_ITEMS,
+    EVENTS_HEARTBEAT_SECONDS,
+    LOTE_MAX_KEYS,
+    PAGE_SIZE_DEFAULT,
+    PAGE_SIZE_MAX,
+    SEARCH_LIMIT_DEFAULT,
+    SEARCH_LIMIT_MAX,
+)
+from app.exceptions.repository_exceptions import VersionConflictError
+from app.exceptions.service_exceptions import AutocompleteDisabledError, InvalidCursorError
+from app.routers.api.conditional import (
+    catalogo_etag,
+    criatura_etag,
+    etag_matches,
+    is_conditional,
+    is_not_modified,
+    not_modified,
+    set_validators,
+)
+from app.routers.api.consistency import reads_from_primary
+from app.routers.api.dependencies import get_catalog_cache, get_criatura_service, get_event_broadcaster
+from app.routers.api.serialization import CAMPOS_CRIATURA, choose_encoding, dump_criatura_line, dump_criaturas
+from app.schemas.criatura_schema import (
+    CriaturaBuscaResponse,
+    CriaturaCreate,
+    CriaturaEstatisticasResponse,
+    CriaturaFiltro,
+    CriaturaLoteBusca,
+    CriaturaLoteBuscaResponse,
+    CriaturaLoteResponse,
+    CriaturaResponse,
+    CriaturaSugestao,
+    CriaturaUpdate,
+    criatura_projection_model,
+    parse_campos,
+)
 from app.services.criatura_service import CriaturaService
+from app.services.event_broadcaster import EventBroadcaster
 
 router = APIRouter(prefix="/criaturas", tags=["Criaturas"])
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NDJSON_BUFFER_SIZE = 64 * 1024
+SSE_MEDIA_TYPE = "text/event-stream"
+
+async def ndjson_lines(rows: AsyncIterator, campos: Sequence[str]) -> AsyncIterator[bytes]:
+    """
+        Serializa as criaturas como NDJSON (uma por linha), agrupando as linhas em
+        blocos de até 64 KiB para não enviar um pedaço HTTP por criatura.
+    """
+    buffer = bytearray()
+    async for row in rows:
+        buffer += dump_criatura_line(row, campos)
+        if len(buffer) >= NDJSON_BUFFER_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
 @router.post("/", response_model=CriaturaResponse)
 async def create_criatura(criatura_data: CriaturaCreate, service: CriaturaService = Depends(get_criatura_service)):
     return await service.create_criatura(criatura_data)
 
+def parse_bulk_body(body: bytes, content_type: str) -> list[Any]:
+    """
+        Lê o corpo do POST em lote: um array JSON ou, com
+        'Content-Type: application/x-ndjson', um objeto JSON por linha.
+    """
+    if content_type.startswith(NDJSON_MEDIA_TYPE):
+        itens = []
+        for numero, linha in enumerate(body.splitlines(), start=1):
+            if not linha.strip():
+                continue
+            try:
+                itens.append(json.loads(linha))
+            except ValueError:
+                raise ValueError(f"Linha {numero} do NDJSON não é um JSON válido.")
+        return itens
+    try:
+        itens = json.loads(body)
+    except ValueError:
+        raise ValueError("O corpo da requisição não é um JSON válido.")
+    if not isinstance(itens, list):
+        raise ValueError("O corpo da requisição deve ser um array JSON de criaturas.")
+    return itens
+
+@router.post(
+    "/bulk",
+    response_model=CriaturaLoteResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": {"type": "array", "items": CriaturaCreate.model_json_schema()}},
+                NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}}
+            }
+        }
+    }
+)
+async def create_criaturas_bulk(request: Request, service: CriaturaService = Depends(get_criatura_service)):
+    """
+        Cria várias criaturas de uma vez, em uma única transação. A resposta traz
+        o resultado de cada item, na ordem enviada: 'criada', 'conflito' (nome já
+        existente) ou 'invalida' (erro de validação).
+    """
+    try:
+        itens = parse_bulk_body(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(itens) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"O lote deve ter no máximo {BULK_MAX_ITEMS} criaturas.")
+    return await service.create_criaturas_bulk(itens)
+
+def parse_ids(ids: list[str]) -> list[int]:
+    # Aceita tanto '?ids=1,2,3' quanto '?ids=1&ids=2&ids=3'
+    try:
+        return [int(id) for valor in ids for id in valor.split(",") if id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="'ids' deve ser uma lista de números inteiros separados por vírgula.")
+
+async def get_lote(ids: Sequence[int], nomes: Sequence[str], service: CriaturaService) -> CriaturaLoteBuscaResponse:
+    if not ids and not nomes:
+        raise HTTPException(status_code=400, detail="Informe ao menos um ID ou nome.")
+    if len(ids) + len(nomes) > LOTE_MAX_KEYS:
+        raise HTTPException(status_code=413, detail=f"A busca em lote aceita no máximo {LOTE_MAX_KEYS} chaves.")
+    return await service.get_criaturas_lote(ids, nomes)
+
+@router.get("/lote", response_model=CriaturaLoteBuscaResponse)
+async def get_criaturas_lote(
+    ids: list[str] = Query(..., description="IDs separados por vírgula (ex.: '1,2,3')"),
+    service: CriaturaService = Depends(get_criatura_service)
+):
+    """
+        Busca várias criaturas por ID em uma única consulta. As criaturas voltam
+        na ordem pedida e os IDs inexistentes são listados em 'ids_nao_encontrados'.
+    """
+    return await get_lote(parse_ids(ids), [], service)
+
+@router.post("/lote", response_model=CriaturaLoteBuscaResponse)
+async def post_criaturas_lote(busca: CriaturaLoteBusca, service: CriaturaService = Depends(get_criatura_service)):
+    """
+        Variante de 'GET /criaturas/lote' que aceita IDs e/ou nomes no corpo.
+    """
+    return await get_lote(busca.ids, busca.nomes, service)
+
+def get_campos(
+    fields: Optional[str] = Query(
+        None,
+        description="Campos retornados, separados por vírgula (ex.: 'id,nome,regiao,periculosidade'); por padrão, todos"
+    )
+) -> Optional[tuple[str, ...]]:
+    try:
+        return parse_campos(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/", response_model=list[CriaturaResponse])
-async def list_criaturas(service: CriaturaService = Depends(get_criatura_service)):
-    return await service.get_all_criaturas()
+async def list_criaturas(
+    request: Request,
+    response: Response,
+    filtro: CriaturaFiltro = Depends(),
+    limit: Optional[int] = Query(None, ge=1, le=PAGE_SIZE_MAX, description="Tamanho da página"),
+    after: Optional[str] = Query(None, description="Cursor retornado em 'X-Next-Cursor' pela página anterior"),
+    campos: Optional[tuple[str, ...]] = Depends(get_campos),
+    service: CriaturaService = Depends(get_criatura_service),
+    catalog_cache: Optional[CatalogCache] = Depends(get_catalog_cache)
+):
+    """
+        Lista as criaturas, com filtros opcionais por região e faixa de
+        periculosidade e ordenação por 'ordenar'. Com 'limit' e 'after' retorna
+        uma página e o cursor da próxima no header 'X-Next-Cursor'; o total de
+        criaturas que atendem ao filtro vem em 'X-Total-Count'. Com
+        'Accept: application/x-ndjson' as criaturas são enviadas em streaming,
+        uma por linha, conforme são lidas do banco. O ETag deriva da versão do
+        catálogo, então If-None-Match é respondido com 304 sem executar a listagem.
+
+        Com 'fields', apenas as colunas pedidas são lidas do banco e enviadas; sem
+        'lenda', a listagem fica bem menor.
+
+        A listagem completa, sem filtros nem paginação, vem do cache
+        materializado quando ele está habilitado (ver 'materialized_catalog_response').
+    """
+    campos = campos or CAMPOS_CRIATURA
+    if (
+        catalog_cache is not None
+        and limit is None
+        and after is None
+        and filtro == CriaturaFiltro()
+        and NDJSON_MEDIA_TYPE not in request.headers.get("accept", "")
+    ):
+        return await materialized_catalog_response(request, campos, catalog_cache, service)
+    versao, atualizado_em = await service.get_versao_catalogo()
+    etag = catalogo_etag(request, versao)
+    if is_not_modified(request, etag, atualizado_em):
+        return not_modified(etag, atualizado_em)
+    set_validators(response, etag, atualizado_em)
+    try:
+        if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+            return StreamingResponse(
+                ndjson_lines(service.stream_criaturas_rows(campos, filtro, after), campos),
+                media_type=NDJSON_MEDIA_TYPE,
+                headers=dict(response.headers)
+            )
+        if limit is None and after is None and filtro == CriaturaFiltro():
+            rows = await service.get_all_criaturas_rows(campos)
+            response.headers["X-Total-Count"] = str(len(rows))
+            return json_rows_response(rows, campos, response)
+        if after is not None and limit is None:
+            limit = PAGE_SIZE_DEFAULT
+        page, next_cursor = await service.get_criaturas_page_rows(campos, filtro, limit, after)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    total = len(page) if limit is None else await service.count_criaturas(filtro)
+    response.headers["X-Total-Count"] = str(total)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return json_rows_response(page, campos, response)
+
+def json_rows_response(rows, campos: Sequence[str], response: Response) -> Response:
+    """
+        Responde a listagem já serializada em bytes (ver 'dump_criaturas'). Como
+        um Response retornado diretamente dispensa o 'response_model', os headers
+        definidos em 'response' são copiados para ele.
+    """
+    return Response(content=dump_criaturas(rows, campos), media_type="application/json", headers=dict(response.headers))
+
+async def materialized_catalog_response(
+    request: Request,
+    campos: tuple[str, ...],
+    cache: CatalogCache,
+    service: CriaturaService
+) -> Response:
+    """
+        Responde a listagem completa com o corpo já serializado e comprimido
+        do 'CatalogCache', na codificação escolhida pelo Accept-Encoding. Um
+        acerto não consulta o banco nem serializa nada.
+
+        Depois de uma escrita a entrada é remontada na primeira leitura, sob o
+        lock do cache, para que uma rajada de requisições dispare uma única
+        consulta. A entrada é montada sempre a partir do primário: lida da
+        réplica ou do pool de leitura, ela poderia guardar por todo o TTL uma
+        listagem atrasada. A versão do catálogo é lida antes das linhas (um
+        ETag antigo apenas provoca um download a mais), e a serialização e a
+        compressão rodam fora do event loop.
+
+        Logo após uma escrita (ver 'reads_from_primary'), talvez feita por outro
+        processo, a entrada só é usada se tiver a versão atual do catálogo.
+    """
+    minima = None
+    entry = cache.get(campos)
+    if entry is not None and reads_from_primary(request):
+        minima, _ = await service.get_versao_catalogo(primary=True)
+    if entry is None or (minima is not None and entry.versao < minima):
+        async with cache.lock:
+            # Quem esperou pelo lock encontra a entrada montada pela requisição anterior
+            entry = cache.get(campos, count=False)
+            if entry is None or (minima is not None and entry.versao < minima):
+                generation = cache.generation
+                versao, atualizado_em = await service.get_versao_catalogo(primary=True)
+                rows = await service.get_all_criaturas_rows(campos, primary=True)
+                bodies = await asyncio.to_thread(lambda: compress_variants(dump_criaturas(rows, campos)))
+                entry = CatalogEntry(bodies, versao, atualizado_em, len(rows))
+                cache.set(campos, entry, generation)
+
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""), entry.bodies)
+    etag = catalogo_etag(request, entry.versao)
+    if encoding != "identity":
+        # Cada codificação é uma representação diferente e precisa de ETag próprio
+        etag = f'{etag[:-1]}-{encoding}"'
+    if is_not_modified(request, etag, entry.atualizado_em):
+        response = not_modified(etag, entry.atualizado_em)
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+    headers = {"X-Total-Count": str(entry.total), "Vary": "Accept-Encoding"}
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    response = Response(content=entry.bodies[encoding], media_type="application/json", headers=headers)
+    set_validators(response, etag, entry.atualizado_em)
+    return response
+
+@router.get("/estatisticas", response_model=CriaturaEstatisticasResponse)
+async def get_estatisticas(service: CriaturaService = Depends(get_criatura_service)):
+    """
+        Contagem de criaturas por região e histograma de periculosidade, lidos de
+        uma tabela de resumo mantida por triggers (sem percorrer 'criaturas').
+    """
+    return await service.get_estatisticas()
+
+@router.get("/busca", response_model=list[CriaturaBuscaResponse])
+async def search_criaturas(
+    q: str = Query(..., min_length=2, max_length=100, description="Palavras buscadas no nome e na lenda"),
+    limit: int = Query(SEARCH_LIMIT_DEFAULT, ge=1, le=SEARCH_LIMIT_MAX),
+    service: CriaturaService = Depends(get_criatura_service)
+):
+    return await service.search_criaturas(q, limit)
+
+@router.get("/autocomplete", response_model=list[CriaturaSugestao])
+async def autocomplete_criaturas(
+    q: str = Query(..., min_length=1, max_length=50, description="Começo (ou parte) do nome digitado"),
+    limit: int = Query(AUTOCOMPLETE_LIMIT_DEFAULT, ge=1, le=AUTOCOMPLETE_LIMIT_MAX),
+    service: CriaturaService = Depends(get_criatura_service)
+):
+    """
+        Sugestões de nomes sem diferenciar acentos e maiúsculas: nomes que
+        começam pelo texto, depois nomes com uma palavra que começa por ele e,
+        sem nenhum dos dois, os nomes mais parecidos (erros de digitação).
+    """
+    try:
+        return await service.autocomplete_criaturas(q, limit)
+    except AutocompleteDisabledError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@router.get("/eventos", response_class=StreamingResponse)
+async def stream_eventos(
+    request: Request,
+    after: Optional[int] = Query(None, ge=0, description="ID do último evento recebido, se não houver Last-Event-ID"),
+    broadcaster: Optional[EventBroadcaster] = Depends(get_event_broadcaster)
+):
+    """
+        Feed das alterações no catálogo em Server-Sent Events: um evento
+        "criada", "atualizada" ou "removida" por escrita, na ordem do commit.
+        Ao reconectar, o EventSource envia o header Last-Event-ID e recebe os
+        eventos que perdeu; um evento "reinicio" indica que eles não estão mais
+        disponíveis e o catálogo deve ser recarregado.
+    """
+    if broadcaster is None:
+        raise HTTPException(status_code=503, detail="O feed de eventos está desativado.")
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id:
+        try:
+            after = int(last_event_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Last-Event-ID deve ser um número inteiro.")
+    return StreamingResponse(
+        broadcaster.listen(after, EVENTS_HEARTBEAT_SECONDS),
+        media_type=SSE_MEDIA_TYPE,
+        # Sem cache e sem o buffer de proxies como o nginx, que atrasariam os eventos
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def get_one(
+    request: Request,
+    response: Response,
+    campos: Optional[tuple[str, ...]],
+    get_versao: Callable[[], Awaitable[tuple]],
+    get_criatura: Callable[[], Awaitable[CriaturaResponse]],
+    get_campos_criatura: Callable[[tuple[str, ...]], Awaitable[dict]]
+):
+    """
+        GET condicional de uma criatura: com If-None-Match ou If-Modified-Since,
+        apenas a versão é consultada e, se o cliente já tem a versão atual, a
+        resposta é 304 sem carregar nem serializar a linha. Com 'fields', a
+        resposta usa o modelo da projeção e o ETag identifica também os campos.
+    """
+    variante = ",".join(campos) if campos else ""
+    if is_conditional(request):
+        id, versao, atualizado_em = await get_versao()
+        etag = criatura_etag(id, versao, atualizado_em, variante)
+        if is_not_modified(request, etag, atualizado_em):
+            return not_modified(etag, atualizado_em)
+    if campos is None:
+        criatura = await get_criatura()
+        set_criatura_validators(response, criatura)
+        return criatura
+    dados = await get_campos_criatura(campos)
+    set_validators(response, criatura_etag(dados["id"], dados["versao"], dados["atualizado_em"], variante), dados["atualizado_em"])
+    projecao = criatura_projection_model(campos).model_validate(dados)
+    return Response(content=projecao.model_dump_json(), media_type="application/json", headers=dict(response.headers))
+
+async def update_one(
+    request: Request,
+    response: Response,
+    get_versao: Callable[[], Awaitable[tuple]],
+    update: Callable[[Optional[int]], Awaitable[CriaturaResponse]]
+):
+    """
+        PUT com controle de concorrência otimista: com If-Match, a criatura só é
+        atualizada se o ETag enviado for o atual, e a versão conferida também é
+        exigida no próprio update, respondendo 412 se outra escrita passou na frente.
+        A versão é lida do banco, nunca do cache deste processo, que pode não ter
+        visto a escrita de outro worker.
+    """
+    versao = None
+    if_match = request.headers.get("if-match")
+    if if_match is not None and if_match.strip() != "*":
+        id, versao, atualizado_em = await get_versao()
+        if not etag_matches(if_match, criatura_etag(id, versao, atualizado_em), weak=False):
+            raise HTTPException(status_code=412, detail="A criatura foi alterada desde a versão informada em If-Match.")
+    try:
+        criatura = await update(versao)
+    except VersionConflictError as e:
+        raise HTTPException(status_code=412, detail=str(e))
+    set_criatura_validators(response, criatura)
+    return criatura
+
+def set_criatura_validators(response: Response, criatura) -> None:
+    criatura = CriaturaResponse.model_validate(criatura)
+    if criatura.versao is not None and criatura.atualizado_em is not None:
+        set_validators(response, criatura_etag(criatura.id, criatura.versao, criatura.atualizado_em), criatura.atualizado_em)
 
 @router.get("/id/{id}", response_model=CriaturaResponse)
-async def get_criatura_by_id(id: int, service: CriaturaService = Depends(get_criatura_service)):
-    return await service.get_criatura_by_id(id)
+async def get_criatura_by_id(
+    id: int,
+    request: Request,
+    response: Response,
+    campos: Optional[tuple[str, ...]] = Depends(get_campos),
+    service: CriaturaService = Depends(get_criatura_service)
+):
+    return await get_one(
+        request,
+        response,
+        campos,
+        lambda: service.get_versao_criatura_by_id(id),
+        lambda: service.get_criatura_by_id(id),
+        lambda campos: service.get_campos_criatura_by_id(id, campos)
+    )
 
 @router.get("/nome/{nome}", response_model=CriaturaResponse)
-async def get_criatura_by_name(nome: str, service: CriaturaService = Depends(get_criatura_service)):
-    return await service.get_criatura_by_name(nome)
+async def get_criatura_by_name(
+    nome: str,
+    request: Request,
+    response: Response,
+    campos: Optional[tuple[str, ...]] = Depends(get_campos),
+    service: CriaturaService = Depends(get_criatura_service)
+):
+    return await get_one(
+        request,
+        response,
+        campos,
+        lambda: service.get_versao_criatura_by_name(nome),
+        lambda: service.get_criatura_by_name(nome),
+        lambda campos: service.get_campos_criatura_by_name(nome, campos)
+    )
 
 @router.put("/id/{id}", response_model=CriaturaResponse)
-async def update_criatura_by_id(id: int, update_data: CriaturaUpdate, service: CriaturaService = Depends(get_criatura_service)):
-    return await service.update_criatura_by_id(id, update_data)
+async def update_criatura_by_id(id: int, update_data: CriaturaUpdate, request: Request, response: Response, service: CriaturaService = Depends(get_criatura_service)):
+    return await update_one(
+        request,
+        response,
+        lambda: service.get_versao_criatura_by_id(id, cached=False),
+        lambda versao: service.update_criatura_by_id(id, update_data, versao=versao)
+    )
 
 @router.put("/nome/{nome}", response_model=CriaturaResponse)
-async def update_criatura_by_name(nome: str, update_data: CriaturaUpdate, service: CriaturaService = Depends(get_criatura_service)):
-    return await service.update_criatura_by_name(nome, update_data)
+async def update_criatura_by_name(nome: str, update_data: CriaturaUpdate, request: Request, response: Response, service: CriaturaService = Depends(get_criatura_service)):
+    return await update_one(
+        request,
+        response,
+        lambda: service.get_versao_criatura_by_name(nome, cached=False),
+        lambda versao: service.update_criatura_by_name(nome, update_data, versao=versao)
+    )
 
 @router.delete("/id/{id}", status_code=204)
 async def delete_criatura_by_id(id: int, service: CriaturaService = Depends(get_criatura_service)):
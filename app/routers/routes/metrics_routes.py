@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Response
+from app.metrics.instrumentation import REGISTRY
+from app.metrics.registry import CONTENT_TYPE
+
+router = APIRouter(tags=["Métricas"])
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """
+        Métricas do processo no formato texto do Prometheus. Com vários workers,
+        cada processo tem as suas: o Prometheus deve coletar cada um deles.
+    """
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -1,6 +1,8 @@
-from pydantic import BaseModel, Field
+from functools import lru_cache
+from pydantic import BaseModel, Field, create_model
+from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import Optional, Sequence
 
 class RegiaoEnum(str, Enum):
     norte = "Norte"
@@ -9,6 +11,9 @@ class RegiaoEnum(str, Enum):
     sudeste = "Sudeste"
     sul = "Sul"
 
+# Níveis de periculosidade aceitos em 'CriaturaCreate' e 'CriaturaUpdate'
+NIVEIS_PERICULOSIDADE = range(1, 6)
+
 class CriaturaCreate(BaseModel):
     nome: str = Field(..., min_length=2, max_length=50, description="Nome da criatura")
     regiao: RegiaoEnum
@@ -23,7 +28,108 @@ class CriaturaUpdate(BaseModel):
 
 class CriaturaResponse(CriaturaCreate):
     id: int
+    versao: Optional[int] = Field(None, description="Versão da criatura, incrementada a cada alteração")
+    atualizado_em: Optional[datetime] = Field(None, description="Data da última alteração (UTC)")
     
     model_config = {
         "from_attributes": True
-    }
\ No newline at end of file
+    }
+
+@lru_cache(maxsize=128)
+def criatura_projection_model(campos: tuple[str, ...]) -> type[BaseModel]:
+    """
+        Modelo de resposta com apenas os 'campos' pedidos em 'fields=', com as
+        mesmas definições do 'CriaturaResponse'. Cada combinação é criada uma
+        única vez.
+    """
+    definicoes = {campo: (CriaturaResponse.model_fields[campo].annotation, CriaturaResponse.model_fields[campo]) for campo in campos}
+    return create_model("CriaturaProjecao", __config__={"from_attributes": True}, **definicoes)
+
+def parse_campos(fields: Optional[str]) -> Optional[tuple[str, ...]]:
+    """
+        Converte o parâmetro 'fields' (campos separados por vírgula) na tupla de
+        campos do 'CriaturaResponse', sempre na ordem do modelo. Retorna None
+        quando todos os campos são pedidos.
+    """
+    if fields is None:
+        return None
+    pedidos = {campo.strip() for campo in fields.split(",") if campo.strip()}
+    desconhecidos = pedidos - CriaturaResponse.model_fields.keys()
+    if not pedidos or desconhecidos:
+        raise ValueError(
+            f"Campos inválidos em 'fields': {', '.join(sorted(desconhecidos)) or '(vazio)'}. "
+            f"Use: {', '.join(CriaturaResponse.model_fields)}."
+        )
+    campos = tuple(campo for campo in CriaturaResponse.model_fields if campo in pedidos)
+    return None if len(campos) == len(CriaturaResponse.model_fields) else campos
+
+class OrdenacaoEnum(str, Enum):
+    id = "id"
+    id_desc = "-id"
+    nome = "nome"
+    nome_desc = "-nome"
+    periculosidade = "periculosidade"
+    periculosidade_desc = "-periculosidade"
+
+class CriaturaFiltro(BaseModel):
+    regiao: Optional[RegiaoEnum] = Field(None, description="Filtra pela região da criatura")
+    periculosidade_min: Optional[int] = Field(None, ge=1, le=5, description="Periculosidade mínima (inclusiva)")
+    periculosidade_max: Optional[int] = Field(None, ge=1, le=5, description="Periculosidade máxima (inclusiva)")
+    ordenar: OrdenacaoEnum = Field(OrdenacaoEnum.id, description="Campo de ordenação; prefixo '-' para ordem decrescente")
+
+    @property
+    def campo_ordenacao(self) -> str:
+        return self.ordenar.value.lstrip("-")
+
+    @property
+    def ordem_decrescente(self) -> bool:
+        return self.ordenar.value.startswith("-")
+
+class CriaturaBuscaResponse(BaseModel):
+    id: int
+    nome: str
+    regiao: RegiaoEnum
+    periculosidade: int
+    trecho: str = Field(..., description="Trecho da lenda com os termos encontrados destacados")
+    relevancia: float = Field(..., description="Pontuação bm25 (quanto menor, mais relevante)")
+
+    model_config = {
+        "from_attributes": True
+    }
+
+class StatusLoteEnum(str, Enum):
+    criada = "criada"
+    conflito = "conflito"
+    invalida = "invalida"
+
+class CriaturaLoteItem(BaseModel):
+    indice: int = Field(..., description="Posição do item no corpo da requisição")
+    status: StatusLoteEnum
+    id: Optional[int] = None
+    nome: Optional[str] = None
+    erro: Optional[str] = None
+
+class CriaturaLoteResponse(BaseModel):
+    criadas: int
+    conflitos: int
+    invalidas: int
+    resultados: list[CriaturaLoteItem]
+
+class CriaturaLoteBusca(BaseModel):
+    ids: list[int] = Field(default_factory=list, description="IDs das criaturas")
+    nomes: list[str] = Field(default_factory=list, description="Nomes das criaturas")
+
+class CriaturaLoteBuscaResponse(BaseModel):
+    criaturas: list[CriaturaResponse] = Field(..., description="Criaturas encontradas, na ordem pedida (IDs e depois nomes)")
+    ids_nao_encontrados: list[int]
+    nomes_nao_encontrados: list[str]
+
+class CriaturaSugestao(BaseModel):
+    id: int
+    nome: str
+
+class CriaturaEstatisticasResponse(BaseModel):
+    total: int = Field(..., description="Total de criaturas")
+    por_regiao: dict[str, int] = Field(..., description="Criaturas por região, com todas as regiões")
+    por_periculosidade: dict[int, int] = Field(..., description="Histograma da periculosidade, de 1 a 5")
+    por_regiao_e_periculosidade: dict[str, dict[int, int]] = Field(..., description="Histograma da periculosidade em cada região")
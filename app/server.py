@@ -0,0 +1,49 @@
+"""
+    Servidor de produção: uvicorn sem reload, com as opções de
+    'app/config/settings.py'.
+
+    Uso: python -m app.server
+
+    Usa o uvloop e o parser httptools quando estão instalados (ver
+    'requirements.txt'), caindo para o loop padrão do asyncio e o h11. No
+    SIGTERM/SIGINT o servidor para de aceitar conexões, espera as requisições em
+    andamento por até 'SERVER_GRACEFUL_TIMEOUT' segundos e só então executa o
+    desligamento do lifespan, que esvazia o escritor e descarta os pools.
+"""
+import importlib.util
+import uvicorn
+from app.config.settings import (
+    SERVER_ACCESS_LOG,
+    SERVER_BACKLOG,
+    SERVER_GRACEFUL_TIMEOUT,
+    SERVER_HOST,
+    SERVER_KEEPALIVE,
+    SERVER_PORT,
+    SERVER_WORKERS,
+)
+
+def is_installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+def server_options() -> dict:
+    return {
+        "host": SERVER_HOST,
+        "port": SERVER_PORT,
+        "workers": SERVER_WORKERS,
+        "loop": "uvloop" if is_installed("uvloop") else "asyncio",
+        "http": "httptools" if is_installed("httptools") else "h11",
+        "timeout_keep_alive": SERVER_KEEPALIVE,
+        "backlog": SERVER_BACKLOG,
+        "timeout_graceful_shutdown": SERVER_GRACEFUL_TIMEOUT,
+        "access_log": SERVER_ACCESS_LOG,
+        "lifespan": "on",
+        "reload": False,
+    }
+
+def main() -> None:
+    # Com mais de um worker o uvicorn precisa do caminho da aplicação, que cada
+    # processo importa por conta própria (cada um com engine e cache próprios)
+    uvicorn.run("app.main:app", **server_options())
+
+if __name__ == "__main__":
+    main()
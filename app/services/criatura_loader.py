@@ -0,0 +1,160 @@
+import asyncio
+import contextvars
+from typing import Awaitable, Callable, Generic, Hashable, Optional, Sequence, TypeVar
+from app.models.criatura import Criatura
+from app.schemas.criatura_schema import CriaturaResponse
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+LoadMany = Callable[[list[K]], Awaitable[dict[K, V]]]
+
+class BatchLoader(Generic[K, V]):
+    """
+        Agrupa buscas por chave feitas por requisições concorrentes, no estilo
+        do DataLoader.
+
+        Chaves distintas pedidas no mesmo ciclo do event loop (ou dentro de
+        'window' segundos após a primeira) são buscadas juntas, com uma única
+        chamada a 'load_many', e cada requisição recebe o próprio resultado.
+        Uma chave já pedida e ainda sem resposta não gera outra busca: quem a
+        pede espera a que está em andamento ("single-flight"). Um lote é
+        enviado antes do prazo ao chegar a 'max_batch' chaves.
+
+        'load_many' recebe as chaves e devolve um dict só com as encontradas;
+        as demais resultam em None. Um erro na busca é repassado a todas as
+        requisições do lote.
+    """
+    def __init__(self, load_many: LoadMany, window: float = 0.0, max_batch: int = 500) -> None:
+        self.__load_many = load_many
+        self.__window = window
+        self.__max_batch = max_batch
+        self.__pending: dict[K, asyncio.Future] = {}
+        self.__in_flight: dict[K, asyncio.Future] = {}
+        self.__handle: Optional[asyncio.Handle] = None
+        self.__tasks: set[asyncio.Task] = set()
+        self.requests = 0
+        self.shared = 0
+        self.batches = 0
+        self.keys = 0
+
+    async def load(self, key: K) -> Optional[V]:
+        self.requests += 1
+        future = self.__pending.get(key) or self.__in_flight.get(key)
+        if future is not None:
+            self.shared += 1
+        else:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            # Se todas as requisições que esperavam a chave forem canceladas, o
+            # erro do lote não é lido por ninguém; marcá-lo como lido evita o
+            # aviso "Future exception was never retrieved"
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self.__pending[key] = future
+            if len(self.__pending) >= self.__max_batch:
+                self.__dispatch()
+            elif self.__handle is None:
+                self.__handle = (
+                    loop.call_later(self.__window, self.__dispatch) if self.__window > 0
+                    else loop.call_soon(self.__dispatch)
+                )
+        # O shield impede que o cancelamento de uma requisição cancele a busca
+        # compartilhada com as outras
+        return await asyncio.shield(future)
+
+    def forget_in_flight(self) -> None:
+        """
+            Faz com que as próximas requisições não se juntem às buscas já em
+            andamento, que podem ter lido o banco antes de uma escrita. Quem já
+            as espera continua recebendo o resultado delas.
+        """
+        self.__in_flight.clear()
+
+    def __dispatch(self) -> None:
+        if self.__handle is not None:
+            self.__handle.cancel()
+            self.__handle = None
+        lote, self.__pending = self.__pending, {}
+        if not lote:
+            return
+        self.__in_flight.update(lote)
+        # O lote roda em um contexto (contextvars) vazio, e não no da requisição
+        # que o abriu: a consulta serve a todas, e o rastro de SQL de uma só
+        # (ver 'instrument_tracing') não deve recebê-la
+        task = asyncio.get_running_loop().create_task(self.__run(lote), context=contextvars.Context())
+        self.__tasks.add(task)
+        task.add_done_callback(self.__tasks.discard)
+
+    async def __run(self, lote: dict[K, asyncio.Future]) -> None:
+        self.batches += 1
+        self.keys += len(lote)
+        try:
+            valores = await self.__load_many(list(lote))
+        except Exception as e:
+            for future in lote.values():
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for key, future in lote.items():
+                if not future.done():
+                    future.set_result(valores.get(key))
+        finally:
+            for key, future in lote.items():
+                if self.__in_flight.get(key) is future:
+                    del self.__in_flight[key]
+
+class CriaturaLoader:
+    """
+        Buscas de criaturas por ID e por nome agrupadas entre as requisições
+        (ver 'BatchLoader'): muitas requisições simultâneas pela mesma criatura
+        geram uma única consulta, e por criaturas diferentes, uma consulta
+        'IN (...)'.
+
+        É único por processo. Como o repositório de cada requisição tem a
+        própria sessão, cada lote usa um repositório novo de
+        'repository_factory'. O loader é um observador do 'CriaturaRepository':
+        depois de uma escrita, as novas buscas não aproveitam as que já estavam
+        em andamento.
+    """
+    def __init__(self, repository_factory: Callable[[], object], window: float = 0.0, max_batch: int = 500) -> None:
+        self.__repository_factory = repository_factory
+        self.__by_id: BatchLoader[int, CriaturaResponse] = BatchLoader(self.__select_by_ids, window, max_batch)
+        self.__by_name: BatchLoader[str, CriaturaResponse] = BatchLoader(self.__select_by_names, window, max_batch)
+
+    async def load_by_id(self, id: int) -> Optional[CriaturaResponse]:
+        return await self.__by_id.load(id)
+
+    async def load_by_name(self, nome: str) -> Optional[CriaturaResponse]:
+        return await self.__by_name.load(nome)
+
+    async def __select_by_ids(self, ids: list[int]) -> dict[int, CriaturaResponse]:
+        rows = await self.__repository_factory().select_rows_by_ids(ids, tuple(CriaturaResponse.model_fields))
+        return {row.id: CriaturaResponse.model_validate(row) for row in rows}
+
+    async def __select_by_names(self, nomes: list[str]) -> dict[str, CriaturaResponse]:
+        rows = await self.__repository_factory().select_rows_by_names(nomes, tuple(CriaturaResponse.model_fields))
+        return {row.nome: CriaturaResponse.model_validate(row) for row in rows}
+
+    @property
+    def requests(self) -> int:
+        return self.__by_id.requests + self.__by_name.requests
+
+    @property
+    def shared(self) -> int:
+        return self.__by_id.shared + self.__by_name.shared
+
+    @property
+    def batches(self) -> int:
+        return self.__by_id.batches + self.__by_name.batches
+
+    @property
+    def keys(self) -> int:
+        return self.__by_id.keys + self.__by_name.keys
+
+    def on_saved(self, criaturas: Sequence[Criatura]) -> None:
+        self.__by_id.forget_in_flight()
+        self.__by_name.forget_in_flight()
+
+    def on_deleted(self, ids: Sequence[int]) -> None:
+        self.__by_id.forget_in_flight()
+        self.__by_name.forget_in_flight()
@@ -1,9 +1,54 @@
-from app.schemas.criatura_schema import CriaturaCreate, CriaturaUpdate, CriaturaResponse
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Hashable, Optional, Sequence
+from pydantic import ValidationError
+from sqlalchemy import Row
+from app.cache.autocomplete_index import AutocompleteIndex
+from app.cache.criatura_cache import CriaturaCache
+from app.cache.criatura_replica import CriaturaReplica
+from app.schemas.criatura_schema import (
+    CriaturaBuscaResponse,
+    CriaturaCreate,
+    CriaturaEstatisticasResponse,
+    CriaturaFiltro,
+    CriaturaLoteBuscaResponse,
+    CriaturaLoteItem,
+    CriaturaLoteResponse,
+    CriaturaResponse,
+    CriaturaSugestao,
+    CriaturaUpdate,
+    NIVEIS_PERICULOSIDADE,
+    RegiaoEnum,
+    StatusLoteEnum,
+)
 from app.exceptions.repository_exceptions import RepositoryError, EntityNotFoundError
+from app.exceptions.service_exceptions import AutocompleteDisabledError, InvalidCursorError
+from app.services.criatura_loader import CriaturaLoader
+from app.services.pagination import encode_cursor, decode_cursor
 
 class CriaturaService:
-    def __init__(self, repository) -> None:
+    def __init__(
+        self,
+        repository,
+        cache: Optional[CriaturaCache] = None,
+        autocomplete: Optional[AutocompleteIndex] = None,
+        loader: Optional[CriaturaLoader] = None,
+        replica: Optional[CriaturaReplica] = None
+    ) -> None:
+        """
+            Com 'loader', as buscas de uma criatura por ID e por nome que não
+            acertam o cache são agrupadas com as de outras requisições (ver
+            'CriaturaLoader') em vez de irem direto ao repositório.
+
+            Com 'replica', as leituras (exceto a busca textual e a versão do
+            catálogo) são feitas na réplica em memória, que tem os mesmos
+            métodos de leitura do repositório; as escritas vão sempre ao
+            repositório.
+        """
         self.__repo = repository
+        self.__reads = replica if replica is not None else repository
+        self.__cache = cache
+        self.__autocomplete = autocomplete
+        self.__loader = loader
 
     async def create_criatura(self, criatura_data: CriaturaCreate) -> CriaturaResponse:
         try:
@@ -12,32 +57,376 @@ class CriaturaService:
         except RepositoryError as e:
             raise e
     
+    async def create_criaturas_bulk(self, itens: Sequence[Any]) -> CriaturaLoteResponse:
+        """
+            Valida e insere um lote de criaturas, retornando o resultado de cada
+            item na ordem recebida. Itens inválidos e nomes já existentes são
+            reportados individualmente sem impedir a gravação dos demais.
+        """
+        resultados: list[Optional[CriaturaLoteItem]] = [None] * len(itens)
+        validos: list[CriaturaCreate] = []
+        indices: list[int] = []
+        for indice, item in enumerate(itens):
+            try:
+                validos.append(CriaturaCreate.model_validate(item))
+                indices.append(indice)
+            except ValidationError as e:
+                erro = "; ".join(f"{'.'.join(map(str, err['loc'])) or 'item'}: {err['msg']}" for err in e.errors())
+                resultados[indice] = CriaturaLoteItem(indice=indice, status=StatusLoteEnum.invalida, erro=erro)
+
+        criadas = await self.__repo.bulk_insert(validos)
+        for indice, criatura_data, criatura in zip(indices, validos, criadas):
+            if criatura is None:
+                resultados[indice] = CriaturaLoteItem(
+                    indice=indice,
+                    status=StatusLoteEnum.conflito,
+                    nome=criatura_data.nome,
+                    erro="Já existe uma criatura com esse nome."
+                )
+            else:
+                resultados[indice] = CriaturaLoteItem(indice=indice, status=StatusLoteEnum.criada, id=criatura.id, nome=criatura.nome)
+
+        contagem = {status: 0 for status in StatusLoteEnum}
+        for resultado in resultados:
+            contagem[resultado.status] += 1
+        return CriaturaLoteResponse(
+            criadas=contagem[StatusLoteEnum.criada],
+            conflitos=contagem[StatusLoteEnum.conflito],
+            invalidas=contagem[StatusLoteEnum.invalida],
+            resultados=resultados
+        )
+
     async def get_all_criaturas(self) -> list[CriaturaResponse]:
-        criaturas = await self.__repo.select_all()
+        criaturas = await self.__reads.select_all()
         if not criaturas:
             raise EntityNotFoundError("Nenhuma criatura encontrada.")
         return [CriaturaResponse.model_validate(c) for c in criaturas]
 
+    async def get_criaturas_page(
+        self,
+        filtro: Optional[CriaturaFiltro] = None,
+        limit: Optional[int] = None,
+        after: Optional[str] = None
+    ) -> tuple[list[CriaturaResponse], Optional[str]]:
+        """
+            Retorna uma página de criaturas e o cursor da próxima página, ou None
+            quando não há mais resultados. Uma linha a mais é buscada apenas para
+            saber se a próxima página existe. Sem 'limit', retorna todas as
+            criaturas que atendem ao filtro.
+        """
+        filtro = filtro or CriaturaFiltro()
+        fetch_limit = limit + 1 if limit is not None else None
+        criaturas = await self.__reads.select_all(filtro=filtro, limit=fetch_limit, after=self.__decode_after(after, filtro))
+        page = [CriaturaResponse.model_validate(c) for c in criaturas[:limit]]
+        next_cursor = None
+        if limit is not None and len(criaturas) > limit:
+            next_cursor = encode_cursor(*self.__cursor_key(page[-1], filtro))
+        return page, next_cursor
+
+    async def get_all_criaturas_rows(self, campos: Sequence[str], primary: bool = False) -> list[Row]:
+        """
+            Versão de 'get_all_criaturas' que devolve as linhas como tuplas com os
+            valores de 'campos', para serem serializadas direto em JSON. Com
+            'primary', a réplica e o pool de leitura são ignorados.
+        """
+        if primary:
+            rows = await self.__repo.select_all_rows(campos, primary=True)
+        else:
+            rows = await self.__reads.select_all_rows(campos)
+        if not rows:
+            raise EntityNotFoundError("Nenhuma criatura encontrada.")
+        return rows
+
+    async def get_criaturas_page_rows(
+        self,
+        campos: Sequence[str],
+        filtro: Optional[CriaturaFiltro] = None,
+        limit: Optional[int] = None,
+        after: Optional[str] = None
+    ) -> tuple[list[Row], Optional[str]]:
+        """
+            Versão de 'get_criaturas_page' que devolve as linhas como tuplas com os
+            valores de 'campos'. O ID e o campo de ordenação são sempre lidos, para
+            montar o cursor da próxima página.
+        """
+        filtro = filtro or CriaturaFiltro()
+        consulta = list(campos)
+        for campo in (filtro.campo_ordenacao, "id"):
+            if campo not in consulta:
+                consulta.append(campo)
+        fetch_limit = limit + 1 if limit is not None else None
+        rows = await self.__reads.select_all_rows(consulta, filtro=filtro, limit=fetch_limit, after=self.__decode_after(after, filtro))
+        page = rows[:limit]
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            ultima = page[-1]
+            key = [ultima[consulta.index("id")]]
+            if filtro.campo_ordenacao != "id":
+                key.insert(0, ultima[consulta.index(filtro.campo_ordenacao)])
+            next_cursor = encode_cursor(*key)
+        return page, next_cursor
+
+    async def count_criaturas(self, filtro: Optional[CriaturaFiltro] = None) -> int:
+        return await self.__reads.count(filtro)
+
+    async def search_criaturas(self, termo: str, limit: int) -> list[CriaturaBuscaResponse]:
+        resultados = await self.__repo.search(termo, limit)
+        return [CriaturaBuscaResponse.model_validate(r) for r in resultados]
+
+    async def autocomplete_criaturas(self, termo: str, limit: int) -> list[CriaturaSugestao]:
+        """
+            Sugestões de nomes para o texto digitado, respondidas pelo índice em
+            memória, sem consultar o banco.
+        """
+        if self.__autocomplete is None:
+            raise AutocompleteDisabledError()
+        return [CriaturaSugestao(id=id, nome=nome) for id, nome in self.__autocomplete.search(termo, limit)]
+
+    def stream_criaturas(self, filtro: Optional[CriaturaFiltro] = None, after: Optional[str] = None) -> AsyncIterator[CriaturaResponse]:
+        """
+            Retorna um iterador assíncrono sobre as criaturas. O cursor é validado
+            antes do início do streaming, para que um cursor inválido ainda possa
+            ser respondido com erro.
+        """
+        filtro = filtro or CriaturaFiltro()
+        return self.__validate_stream(self.__reads.stream_all(filtro=filtro, after=self.__decode_after(after, filtro)))
+
+    def stream_criaturas_rows(
+        self,
+        campos: Sequence[str],
+        filtro: Optional[CriaturaFiltro] = None,
+        after: Optional[str] = None
+    ) -> AsyncIterator[Row]:
+        """
+            Versão de 'stream_criaturas' que entrega as linhas como tuplas com os
+            valores de 'campos'. O cursor também é validado antes do streaming.
+        """
+        filtro = filtro or CriaturaFiltro()
+        return self.__reads.stream_all_rows(campos, filtro=filtro, after=self.__decode_after(after, filtro))
+
+    @staticmethod
+    async def __validate_stream(criaturas: AsyncIterator) -> AsyncIterator[CriaturaResponse]:
+        async for criatura in criaturas:
+            yield CriaturaResponse.model_validate(criatura)
+
+    @staticmethod
+    def __cursor_key(criatura: CriaturaResponse, filtro: CriaturaFiltro) -> list:
+        if filtro.campo_ordenacao == "id":
+            return [criatura.id]
+        return [getattr(criatura, filtro.campo_ordenacao), criatura.id]
+
+    @staticmethod
+    def __decode_after(after: Optional[str], filtro: CriaturaFiltro) -> Optional[list]:
+        """
+            Decodifica o cursor e confere se ele corresponde à ordenação pedida:
+            apenas o ID quando a ordenação é por ID, ou o valor do campo seguido
+            do ID nas demais.
+        """
+        if after is None:
+            return None
+        key = decode_cursor(after)
+        value_type = {"id": None, "nome": str, "periculosidade": int}[filtro.campo_ordenacao]
+        expected_types = (int,) if value_type is None else (value_type, int)
+        if len(key) != len(expected_types) or not all(type(k) is t for k, t in zip(key, expected_types)):
+            raise InvalidCursorError(f"Cursor de paginação inválido para a ordenação '{filtro.ordenar.value}'.")
+        return key
+
+    async def get_estatisticas(self) -> CriaturaEstatisticasResponse:
+        """
+            Monta as contagens por região e o histograma de periculosidade a
+            partir da tabela de resumo, com zeros para as combinações sem
+            criaturas.
+        """
+        por_regiao_e_periculosidade = {
+            regiao.value: {nivel: 0 for nivel in NIVEIS_PERICULOSIDADE} for regiao in RegiaoEnum
+        }
+        for row in await self.__reads.select_statistics():
+            por_regiao_e_periculosidade.setdefault(row.regiao, {})[row.periculosidade] = row.quantidade
+        por_periculosidade = {nivel: 0 for nivel in NIVEIS_PERICULOSIDADE}
+        for niveis in por_regiao_e_periculosidade.values():
+            for nivel, quantidade in niveis.items():
+                por_periculosidade[nivel] = por_periculosidade.get(nivel, 0) + quantidade
+        return CriaturaEstatisticasResponse(
+            total=sum(por_periculosidade.values()),
+            por_regiao={regiao: sum(niveis.values()) for regiao, niveis in por_regiao_e_periculosidade.items()},
+            por_periculosidade=por_periculosidade,
+            por_regiao_e_periculosidade=por_regiao_e_periculosidade
+        )
+
     async def get_criatura_by_id(self, id: int) -> CriaturaResponse:
-        criatura = await self.__repo.select_by_id(id)
-        if not criatura:
-            raise EntityNotFoundError(f"Criatura com ID '{id}' não encontrada.")
-        return CriaturaResponse.model_validate(criatura)
-    
+        select = self.__reads.select_by_id if self.__loader is None else self.__loader.load_by_id
+        return await self.__get_one(
+            CriaturaCache.id_key(id),
+            lambda: select(id),
+            f"Criatura com ID '{id}' não encontrada."
+        )
+
     async def get_criatura_by_name(self, nome: str) -> CriaturaResponse:
-        criatura = await self.__repo.select_by_name(nome)
-        if not criatura:
-            raise EntityNotFoundError(f"Criatura com nome '{nome}' não encontrada.")
-        return CriaturaResponse.model_validate(criatura)
-    
-    async def update_criatura_by_id(self, id: int, update_data: CriaturaUpdate) -> CriaturaResponse:
-        criatura = await self.__repo.update_by_id(id, update_data)
+        select = self.__reads.select_by_name if self.__loader is None else self.__loader.load_by_name
+        return await self.__get_one(
+            CriaturaCache.name_key(nome),
+            lambda: select(nome),
+            f"Criatura com nome '{nome}' não encontrada."
+        )
+
+    async def get_criaturas_lote(self, ids: Sequence[int], nomes: Sequence[str]) -> CriaturaLoteBuscaResponse:
+        """
+            Busca várias criaturas por ID e por nome com uma consulta 'IN' para
+            cada tipo de chave, em vez de uma consulta por criatura. Com o cache
+            habilitado, só as chaves que não estão nele vão ao banco, e o que o
+            banco devolve (ou não) é guardado como em 'get_criatura_by_id'.
+
+            As criaturas voltam na ordem pedida (IDs e depois nomes), sem repetir
+            uma criatura pedida mais de uma vez, e as chaves que não existem são
+            reportadas à parte.
+        """
+        ids = list(dict.fromkeys(ids))
+        nomes = list(dict.fromkeys(nomes))
+        por_id = await self.__get_lote(ids, CriaturaCache.id_key, "id", self.__reads.select_rows_by_ids)
+        por_nome = await self.__get_lote(nomes, CriaturaCache.name_key, "nome", self.__reads.select_rows_by_names)
+
+        criaturas = []
+        vistas = set()
+        for criatura in [por_id.get(id) for id in ids] + [por_nome.get(nome) for nome in nomes]:
+            if criatura is not None and criatura.id not in vistas:
+                vistas.add(criatura.id)
+                criaturas.append(criatura)
+        return CriaturaLoteBuscaResponse(
+            criaturas=criaturas,
+            ids_nao_encontrados=[id for id in ids if id not in por_id],
+            nomes_nao_encontrados=[nome for nome in nomes if nome not in por_nome]
+        )
+
+    async def __get_lote(
+        self,
+        chaves: Sequence[Hashable],
+        cache_key: Callable[[Hashable], Hashable],
+        campo: str,
+        select_rows: Callable[[Sequence, Sequence[str]], Awaitable[list[Row]]]
+    ) -> dict[Hashable, CriaturaResponse]:
+        encontradas: dict[Hashable, CriaturaResponse] = {}
+        buscar = list(chaves)
+        generation = None
+        if self.__cache is not None:
+            buscar = []
+            for chave in chaves:
+                found, cached = self.__cache.get(cache_key(chave))
+                if not found:
+                    buscar.append(chave)
+                elif cached is not None:
+                    encontradas[chave] = cached
+            generation = self.__cache.generation
+        if not buscar:
+            return encontradas
+
+        for row in await select_rows(buscar, tuple(CriaturaResponse.model_fields)):
+            criatura = CriaturaResponse.model_validate(row)
+            encontradas[getattr(criatura, campo)] = criatura
+            if self.__cache is not None:
+                self.__cache.set(criatura, generation)
+        if self.__cache is not None:
+            for chave in buscar:
+                if chave not in encontradas:
+                    self.__cache.set_missing(cache_key(chave), generation)
+        return encontradas
+
+    async def get_campos_criatura_by_id(self, id: int, campos: Sequence[str]) -> dict[str, Any]:
+        """
+            Retorna apenas os 'campos' da criatura, mais o ID, a versão e a data de
+            alteração, sempre incluídos para montar o ETag. Com o cache habilitado
+            a criatura inteira passa por ele, como em 'get_criatura_by_id'; sem
+            cache, só as colunas necessárias são lidas do banco.
+        """
+        return await self.__get_campos(
+            campos,
+            lambda: self.get_criatura_by_id(id),
+            lambda consulta: self.__reads.select_row_by_id(id, consulta)
+        )
+
+    async def get_campos_criatura_by_name(self, nome: str, campos: Sequence[str]) -> dict[str, Any]:
+        return await self.__get_campos(
+            campos,
+            lambda: self.get_criatura_by_name(nome),
+            lambda consulta: self.__reads.select_row_by_name(nome, consulta)
+        )
+
+    async def __get_campos(
+        self,
+        campos: Sequence[str],
+        get_criatura: Callable[[], Awaitable[CriaturaResponse]],
+        select_row: Callable[[Sequence[str]], Awaitable]
+    ) -> dict[str, Any]:
+        consulta = list(campos) + [campo for campo in ("id", "versao", "atualizado_em") if campo not in campos]
+        if self.__cache is not None:
+            criatura = await get_criatura()
+            return {campo: getattr(criatura, campo) for campo in consulta}
+        return dict(zip(consulta, await select_row(consulta)))
+
+    async def get_versao_criatura_by_id(self, id: int, cached: bool = True) -> tuple[int, int, datetime]:
+        """
+            Retorna (ID, versão, data de alteração) da criatura, usados nos
+            headers ETag e Last-Modified. Vem do cache quando possível; caso
+            contrário, apenas essas colunas são lidas do banco. Com
+            'cached=False', o cache, a réplica e o pool de leitura são ignorados
+            e a versão vem sempre do primário: a conferência do If-Match não pode
+            usar uma versão que outro processo já alterou.
+        """
+        if not cached:
+            return await self.__get_versao(None, lambda: self.__repo.select_version_by_id(id, primary=True))
+        return await self.__get_versao(CriaturaCache.id_key(id), lambda: self.__reads.select_version_by_id(id))
+
+    async def get_versao_criatura_by_name(self, nome: str, cached: bool = True) -> tuple[int, int, datetime]:
+        if not cached:
+            return await self.__get_versao(None, lambda: self.__repo.select_version_by_name(nome, primary=True))
+        return await self.__get_versao(CriaturaCache.name_key(nome), lambda: self.__reads.select_version_by_name(nome))
+
+    async def __get_versao(self, key: Optional[Hashable], select: Callable[[], Awaitable]) -> tuple[int, int, datetime]:
+        if self.__cache is not None and key is not None:
+            found, cached = self.__cache.get(key)
+            if found and cached is not None:
+                return cached.id, cached.versao, cached.atualizado_em
+        row = await select()
+        return row.id, row.versao, row.atualizado_em
+
+    async def get_versao_catalogo(self, primary: bool = False) -> tuple[int, datetime]:
+        row = await self.__repo.select_catalog_version(primary=primary)
+        return row.versao, row.atualizado_em
+
+    async def __get_one(self, key: Hashable, select: Callable[[], Awaitable], not_found_message: str) -> CriaturaResponse:
+        """
+            Busca uma criatura passando pelo cache, quando habilitado: acertos
+            (inclusive negativos) não chegam ao repositório, e o resultado da
+            consulta, encontrado ou não, é guardado para as próximas buscas.
+        """
+        generation = None
+        if self.__cache is not None:
+            found, cached = self.__cache.get(key)
+            if found:
+                if cached is None:
+                    raise EntityNotFoundError(not_found_message)
+                return cached
+            generation = self.__cache.generation
+        try:
+            criatura = await select()
+            if not criatura:
+                raise EntityNotFoundError(not_found_message)
+        except EntityNotFoundError:
+            if self.__cache is not None:
+                self.__cache.set_missing(key, generation)
+            raise
+        response = CriaturaResponse.model_validate(criatura)
+        if self.__cache is not None:
+            self.__cache.set(response, generation)
+        return response
+
+    async def update_criatura_by_id(self, id: int, update_data: CriaturaUpdate, versao: Optional[int] = None) -> CriaturaResponse:
+        criatura = await self.__repo.update_by_id(id, update_data, versao=versao)
         if not criatura:
             raise EntityNotFoundError(f"Criatura com ID '{id}' não encontrada")
         return CriaturaResponse.model_validate(criatura)
 
-    async def update_criatura_by_name(self, nome: str, update_data: CriaturaUpdate) -> CriaturaResponse:
-        criatura = await self.__repo.update_by_name(nome, update_data)
+    async def update_criatura_by_name(self, nome: str, update_data: CriaturaUpdate, versao: Optional[int] = None) -> CriaturaResponse:
+        criatura = await self.__repo.update_by_name(nome, update_data, versao=versao)
         if not criatura:
             raise EntityNotFoundError(f"Criatura com nome '{nome}' não encontrada")
         return CriaturaResponse.model_validate(criatura)
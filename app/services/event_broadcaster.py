@@ -0,0 +1,286 @@
+import asyncio
+import json
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Optional, Sequence
+from app.exceptions.logger import logger
+from app.models.criatura import Criatura
+
+# Comentário SSE enviado quando não há eventos, para manter a conexão aberta
+# em proxies com timeout de inatividade e perceber clientes que já saíram
+HEARTBEAT = b": ping\n\n"
+
+def format_event(id: int, event: str, data: dict) -> bytes:
+    """
+        Um evento no formato do Server-Sent Events. O 'id' é o que o
+        EventSource devolve no header Last-Event-ID ao reconectar.
+    """
+    return f"id: {id}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode()
+
+def format_row(row) -> bytes:
+    """
+        Evento SSE de uma linha do outbox (ver 'select_events_after'): o tipo
+        ("criada", "atualizada" ou "removida") vira o nome do evento.
+    """
+    return format_event(row.id, row.tipo, {
+        "id": row.criatura_id,
+        "nome": row.nome,
+        "versao": row.versao,
+        "criado_em": row.criado_em.isoformat() if row.criado_em is not None else None,
+    })
+
+def format_retry(milliseconds: int) -> bytes:
+    return f"retry: {milliseconds}\n\n".encode()
+
+class Subscription:
+    """
+        Fila limitada de um assinante. Quando ela enche, o assinante é
+        desconectado em vez de atrasar os demais ou acumular memória.
+    """
+    __slots__ = ("queue", "closed")
+
+    def __init__(self, queue_size: int) -> None:
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+        try:
+            self.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            # Quem está lendo esvazia a fila e vê 'closed' em seguida
+            pass
+
+class EventBroadcaster:
+    """
+        Distribui os eventos do outbox 'criaturas_eventos' entre todos os
+        assinantes de 'GET /criaturas/eventos' do processo.
+
+        Uma única tarefa lê os eventos novos do banco, a cada 'poll_interval'
+        segundos enquanto houver assinantes, ou logo após uma escrita do
+        próprio processo (o broadcaster é um observador do
+        'CriaturaRepository'). Cada evento é lido e serializado uma única vez,
+        qualquer que seja o número de assinantes, e colocado na fila de cada
+        um. Os 'buffer_size' eventos mais recentes ficam em memória para as
+        reconexões com Last-Event-ID; só uma reconexão mais antiga que eles lê
+        o banco, em páginas de 'batch_size'.
+
+        Um assinante cuja fila de 'queue_size' eventos enche é desconectado
+        (ver 'Subscription'): ele recebe o que já estava na fila e reconecta
+        com o Last-Event-ID do último evento, sem perder nenhum. Sem eventos, um
+        heartbeat é enviado a cada 'heartbeat' segundos.
+
+        A cada 'prune_interval' segundos, haja ou não assinantes, os eventos
+        além dos 'retention' mais recentes são apagados do outbox; um
+        Last-Event-ID mais antigo que eles recebe um evento "reinicio" (ver
+        'listen').
+    """
+    def __init__(
+        self,
+        repository_factory: Callable[[], object],
+        poll_interval: float = 1.0,
+        buffer_size: int = 1000,
+        queue_size: int = 100,
+        batch_size: int = 500,
+        retention: int = 100_000,
+        prune_interval: float = 60.0,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        if retention < 1:
+            raise ValueError("A retenção de eventos deve ser de pelo menos 1 evento.")
+        self.__repository_factory = repository_factory
+        self.__poll_interval = poll_interval
+        self.__queue_size = queue_size
+        self.__batch_size = batch_size
+        self.__retention = retention
+        self.__prune_interval = prune_interval
+        self.__clock = clock
+        self.__buffer: deque[tuple[int, bytes]] = deque(maxlen=buffer_size)
+        # O buffer tem todos os eventos com ID em (floor, head]
+        self.__head = 0
+        self.__floor = 0
+        self.__subscribers: set[Subscription] = set()
+        self.__lock = asyncio.Lock()
+        self.__wake = asyncio.Event()
+        self.__task: Optional[asyncio.Task] = None
+        self.__running = False
+        self.__last_prune: Optional[float] = None
+        self.fetched = 0
+        self.delivered = 0
+        self.replayed = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self.__subscribers)
+
+    @property
+    def head(self) -> int:
+        return self.__head
+
+    def start(self) -> None:
+        self.__running = True
+        self.__task = asyncio.create_task(self.__run())
+
+    async def stop(self) -> None:
+        """
+            Encerra a tarefa pela flag, e não com 'cancel()': no Python 3.11 o
+            'wait_for' descarta o cancelamento quando a espera interna já
+            terminou (uma escrita acabou de acordar a tarefa), e o desligamento
+            ficaria preso.
+        """
+        if self.__task is not None:
+            self.__running = False
+            self.__wake.set()
+            await self.__task
+            self.__task = None
+        for subscription in list(self.__subscribers):
+            subscription.close()
+        self.__subscribers.clear()
+
+    def on_saved(self, criaturas: Sequence[Criatura]) -> None:
+        self.__wake.set()
+
+    def on_deleted(self, ids: Sequence[int]) -> None:
+        self.__wake.set()
+
+    async def __run(self) -> None:
+        while self.__running:
+            try:
+                await asyncio.wait_for(self.__wake.wait(), self.__poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            if not self.__running:
+                break
+            self.__wake.clear()
+            try:
+                if self.__subscribers:
+                    await self.fetch()
+                await self.__prune()
+            except Exception as e:
+                logger.error(f"Erro ao buscar eventos: {e}")
+
+    async def fetch(self) -> int:
+        """
+            Lê os eventos com ID maior que 'head' e os entrega aos assinantes.
+            Retorna quantos foram lidos.
+        """
+        total = 0
+        async with self.__lock:
+            while True:
+                rows = await self.__repository_factory().select_events_after(self.__head, self.__batch_size)
+                for row in rows:
+                    self.__publish(row.id, format_row(row))
+                total += len(rows)
+                if len(rows) < self.__batch_size:
+                    break
+        self.fetched += total
+        return total
+
+    def __publish(self, id: int, frame: bytes) -> None:
+        if len(self.__buffer) == self.__buffer.maxlen:
+            self.__floor = self.__buffer[0][0] if self.__buffer else id
+        self.__buffer.append((id, frame))
+        self.__head = id
+        for subscription in list(self.__subscribers):
+            try:
+                subscription.queue.put_nowait((id, frame))
+            except asyncio.QueueFull:
+                self.dropped += 1
+                self.__subscribers.discard(subscription)
+                subscription.close()
+                logger.warning("Assinante de eventos desconectado por não acompanhar o ritmo dos eventos.")
+
+    async def __sync(self) -> None:
+        """
+            Sem assinantes, a tarefa não lê o banco e 'head' fica para trás.
+            Antes do primeiro assinante, 'head' salta para o último evento
+            gravado, em vez de ler todos os eventos do intervalo.
+        """
+        ultimo = (await self.__repository_factory().select_event_bounds()).ultimo
+        if ultimo != self.__head:
+            self.__buffer.clear()
+            self.__head = self.__floor = ultimo
+
+    async def __prune(self) -> None:
+        agora = self.__clock()
+        if self.__last_prune is not None and agora - self.__last_prune < self.__prune_interval:
+            return
+        self.__last_prune = agora
+        repository = self.__repository_factory()
+        ultimo = (await repository.select_event_bounds()).ultimo
+        if ultimo > self.__retention:
+            await repository.delete_events_up_to(ultimo - self.__retention)
+
+    async def listen(self, after: Optional[int], heartbeat: float, retry_ms: int = 3000) -> AsyncIterator[bytes]:
+        """
+            Eventos SSE com ID maior que 'after' (o Last-Event-ID), em ordem e
+            sem repetição, seguidos dos que forem gravados enquanto a conexão
+            estiver aberta. Sem 'after', começa pelos eventos novos.
+
+            Quando eventos depois de 'after' já foram apagados pela retenção, ou
+            'after' é maior que o último evento gravado (o banco foi recriado),
+            o primeiro evento é um "reinicio" com o ID do último evento: o
+            cliente deve recarregar o catálogo e seguir a partir dele.
+        """
+        subscription = Subscription(self.__queue_size)
+        async with self.__lock:
+            if not self.__subscribers:
+                await self.__sync()
+            # Registrado antes de copiar o buffer: os eventos depois de 'head'
+            # chegam pela fila, os anteriores pelo buffer ou pelo banco
+            self.__subscribers.add(subscription)
+            head, floor = self.__head, self.__floor
+            backlog = [(id, frame) for id, frame in self.__buffer if after is not None and id > after]
+        try:
+            yield format_retry(retry_ms)
+            if after is None:
+                after = head
+            elif not floor <= after <= head:
+                async for id, frame in self.__replay(after, floor):
+                    after = id
+                    yield frame
+            for id, frame in backlog:
+                if id <= after:
+                    continue
+                after = id
+                self.delivered += 1
+                yield frame
+            while not (subscription.closed and subscription.queue.empty()):
+                try:
+                    item = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT
+                    continue
+                if item is None:
+                    break
+                id, frame = item
+                if id <= after:
+                    continue
+                after = id
+                self.delivered += 1
+                yield frame
+        finally:
+            self.__subscribers.discard(subscription)
+
+    async def __replay(self, after: int, floor: int) -> AsyncIterator[tuple[int, bytes]]:
+        """
+            Eventos de (after, floor] lidos do banco, para uma reconexão mais
+            antiga que o buffer; os seguintes vêm do buffer.
+        """
+        repository = self.__repository_factory()
+        primeiro, ultimo = await repository.select_event_bounds()
+        apagados = after + 1 < primeiro if primeiro else after < ultimo
+        if apagados or after > ultimo:
+            yield ultimo, format_event(ultimo, "reinicio", {"ultimo": ultimo})
+            return
+        while after < floor:
+            rows = await repository.select_events_after(after, self.__batch_size)
+            for row in rows:
+                if row.id > floor:
+                    return
+                after = row.id
+                self.replayed += 1
+                self.delivered += 1
+                yield row.id, format_row(row)
+            if len(rows) < self.__batch_size:
+                return
@@ -0,0 +1,21 @@
+import base64
+import json
+from app.exceptions.service_exceptions import InvalidCursorError
+
+def encode_cursor(*key) -> str:
+    """
+        Codifica a chave da última linha de uma página (por exemplo, o ID) em um
+        cursor opaco, seguro para uso em query strings.
+    """
+    raw = json.dumps(list(key), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (ValueError, TypeError):
+        raise InvalidCursorError(f"Cursor de paginação inválido: '{cursor}'.")
+    if not isinstance(key, list) or not key:
+        raise InvalidCursorError(f"Cursor de paginação inválido: '{cursor}'.")
+    return key
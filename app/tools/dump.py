@@ -0,0 +1,276 @@
+"""
+    Exporta o bestiário inteiro para NDJSON ou CSV e o importa de volta, em
+    fluxo: a exportação lê do banco em blocos de 'STREAM_YIELD_PER' linhas e a
+    importação grava em blocos de '--chunk-size' criaturas, então a memória
+    usada não depende do tamanho do arquivo.
+
+    O formato vem da extensão ('.csv' ou '.ndjson'/'.jsonl', com ou sem '.gz')
+    ou de '--format'. Na importação, cada registro é validado pelo
+    'CriaturaCreate'; registros inválidos são reportados e nomes já existentes
+    são ignorados. Depois de cada bloco gravado, o número de registros lidos vai
+    para '<arquivo>.checkpoint', e uma importação interrompida continua de onde
+    parou.
+
+    Uso:
+        python -m app.tools.dump export criaturas.ndjson.gz [--database-url URL]
+        python -m app.tools.dump import criaturas.ndjson.gz [--chunk-size N] [--restart]
+"""
+import argparse
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, Optional, TextIO
+from pydantic import ValidationError
+from app.config.settings import BULK_CHUNK_SIZE, DATABASE_URL
+from app.database.connection import DBConnectionHandler, create_engine, create_session_factory
+from app.database.schema import init_schema
+from app.repositories.criatura_repository import CriaturaRepository
+from app.routers.api.serialization import CAMPOS_CRIATURA, dump_criatura_line
+from app.schemas.criatura_schema import CriaturaCreate
+
+FORMATS = ("ndjson", "csv")
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Registros inválidos detalhados na saída; os demais só entram na contagem
+MAX_INVALID_REPORTED = 20
+
+@dataclass
+class ImportSummary:
+    lidos: int = 0
+    criadas: int = 0
+    conflitos: int = 0
+    invalidas: int = 0
+
+class ProgressReporter:
+    """
+        Escreve o progresso em 'stream' no máximo uma vez a cada 'interval'
+        segundos, com a taxa de registros por segundo desde o início.
+    """
+    def __init__(self, stream: Optional[TextIO] = None, interval: float = 1.0) -> None:
+        self.__stream = stream or sys.stderr
+        self.__interval = interval
+        self.__inicio = time.monotonic()
+        self.__ultimo = self.__inicio
+
+    def report(self, registros: int, mensagem: str, force: bool = False) -> None:
+        agora = time.monotonic()
+        if not force and agora - self.__ultimo < self.__interval:
+            return
+        self.__ultimo = agora
+        taxa = registros / max(agora - self.__inicio, 1e-9)
+        print(f"{mensagem} ({taxa:,.0f} registros/s)", file=self.__stream, flush=True)
+
+def detect_format(path: str, formato: Optional[str] = None) -> str:
+    if formato is not None:
+        return formato
+    nome = path[:-3] if path.endswith(".gz") else path
+    return "csv" if nome.endswith(".csv") else "ndjson"
+
+def open_binary_output(path: str, compress: bool) -> BinaryIO:
+    return gzip.open(path, "wb") if compress else open(path, "wb")
+
+def open_binary_input(path: str) -> BinaryIO:
+    # O gzip é reconhecido pelo conteúdo, não pela extensão
+    with open(path, "rb") as arquivo:
+        comprimido = arquivo.read(2) == GZIP_MAGIC
+    return gzip.open(path, "rb") if comprimido else open(path, "rb")
+
+async def export(
+    database_url: str,
+    path: str,
+    formato: str,
+    compress: bool,
+    progress: Optional[ProgressReporter] = None
+) -> int:
+    """
+        Grava todas as criaturas em 'path', na ordem do ID, com os campos do
+        'CriaturaResponse'. As linhas vêm do cursor do banco em blocos de
+        'STREAM_YIELD_PER' e vão direto para o arquivo. Retorna quantas foram
+        exportadas.
+    """
+    engine = create_engine(database_url)
+    total = 0
+    try:
+        repository = CriaturaRepository(DBConnectionHandler(create_session_factory(engine)))
+        with open_binary_output(path, compress) as saida:
+            if formato == "csv":
+                texto = io.TextIOWrapper(saida, encoding="utf-8", newline="")
+                writer = csv.writer(texto)
+                writer.writerow(CAMPOS_CRIATURA)
+            async for row in repository.stream_all_rows(CAMPOS_CRIATURA):
+                if formato == "csv":
+                    writer.writerow(valor.isoformat() if hasattr(valor, "isoformat") else valor for valor in row)
+                else:
+                    saida.write(dump_criatura_line(row))
+                total += 1
+                if progress is not None:
+                    progress.report(total, f"{total} criaturas exportadas")
+            if formato == "csv":
+                texto.flush()
+                texto.detach()
+    finally:
+        await engine.dispose()
+    if progress is not None:
+        progress.report(total, f"{total} criaturas exportadas", force=True)
+    return total
+
+def read_records(arquivo: BinaryIO, formato: str) -> Iterator[tuple[int, object]]:
+    """
+        Percorre os registros do arquivo um a um, como (linha, registro). No
+        NDJSON o registro é o texto da linha, decodificado só na validação,
+        para que um JSON malformado conte como registro inválido.
+    """
+    texto = io.TextIOWrapper(arquivo, encoding="utf-8", newline="" if formato == "csv" else None)
+    if formato == "csv":
+        reader = csv.DictReader(texto)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for linha, conteudo in enumerate(texto, start=1):
+        if conteudo.strip():
+            yield linha, conteudo
+
+def validate(registro: object) -> CriaturaCreate:
+    if isinstance(registro, str):
+        try:
+            registro = json.loads(registro)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"JSON inválido: {e}")
+    try:
+        return CriaturaCreate.model_validate(registro)
+    except ValidationError as e:
+        raise ValueError("; ".join(f"{'.'.join(map(str, err['loc'])) or 'item'}: {err['msg']}" for err in e.errors()))
+
+def read_checkpoint(checkpoint_path: str, path: str) -> int:
+    if not os.path.exists(checkpoint_path):
+        return 0
+    with open(checkpoint_path, encoding="utf-8") as arquivo:
+        checkpoint = json.load(arquivo)
+    if checkpoint.get("tamanho") != os.path.getsize(path):
+        raise ValueError(f"O checkpoint '{checkpoint_path}' é de outra versão do arquivo; use --restart.")
+    return checkpoint["registros"]
+
+def write_checkpoint(checkpoint_path: str, path: str, registros: int) -> None:
+    # Grava em um arquivo temporário e troca, para nunca deixar um checkpoint pela metade
+    temporario = f"{checkpoint_path}.tmp"
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump({"arquivo": os.path.abspath(path), "tamanho": os.path.getsize(path), "registros": registros}, arquivo)
+    os.replace(temporario, checkpoint_path)
+
+async def import_file(
+    database_url: str,
+    path: str,
+    formato: str,
+    chunk_size: int = BULK_CHUNK_SIZE,
+    restart: bool = False,
+    progress: Optional[ProgressReporter] = None,
+    errors: Optional[TextIO] = None
+) -> ImportSummary:
+    """
+        Importa as criaturas de 'path' com 'CriaturaRepository.bulk_insert', um
+        bloco de 'chunk_size' criaturas válidas por transação. O checkpoint é
+        gravado depois do commit de cada bloco: se o processo parar entre os
+        dois, o bloco é lido de novo e as criaturas já gravadas contam como
+        conflitos, sem duplicar nada. Ao fim da importação o checkpoint é
+        removido.
+    """
+    checkpoint_path = f"{path}.checkpoint"
+    if restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    pular = read_checkpoint(checkpoint_path, path)
+    resumo = ImportSummary(lidos=pular)
+
+    engine = create_engine(database_url)
+    try:
+        await init_schema(engine)
+        repository = CriaturaRepository(DBConnectionHandler(create_session_factory(engine)))
+        bloco: list[CriaturaCreate] = []
+
+        async def gravar_bloco() -> None:
+            if bloco:
+                criadas = await repository.bulk_insert(bloco)
+                novas = sum(criatura is not None for criatura in criadas)
+                resumo.criadas += novas
+                resumo.conflitos += len(bloco) - novas
+                bloco.clear()
+            write_checkpoint(checkpoint_path, path, resumo.lidos)
+            if progress is not None:
+                progress.report(
+                    resumo.lidos,
+                    f"{resumo.lidos} registros lidos: {resumo.criadas} criadas, "
+                    f"{resumo.conflitos} conflitos, {resumo.invalidas} inválidas"
+                )
+
+        with open_binary_input(path) as arquivo:
+            for indice, (linha, registro) in enumerate(read_records(arquivo, formato)):
+                if indice < pular:
+                    continue
+                resumo.lidos += 1
+                try:
+                    bloco.append(validate(registro))
+                except ValueError as e:
+                    resumo.invalidas += 1
+                    if resumo.invalidas <= MAX_INVALID_REPORTED:
+                        print(f"Linha {linha} inválida: {e}", file=errors or sys.stderr)
+                if len(bloco) >= chunk_size:
+                    await gravar_bloco()
+            await gravar_bloco()
+    finally:
+        await engine.dispose()
+
+    os.remove(checkpoint_path)
+    if progress is not None:
+        progress.report(
+            resumo.lidos,
+            f"{resumo.lidos} registros lidos: {resumo.criadas} criadas, "
+            f"{resumo.conflitos} conflitos, {resumo.invalidas} inválidas",
+            force=True
+        )
+    return resumo
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=DATABASE_URL, help="Banco de origem ou destino (padrão: DATABASE_URL)")
+    parser.add_argument("--quiet", action="store_true", help="Não mostra o progresso")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Exporta as criaturas para um arquivo")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--format", choices=FORMATS)
+    export_parser.add_argument("--gzip", action="store_true", help="Comprime a saída (padrão para arquivos '.gz')")
+
+    import_parser = commands.add_parser("import", help="Importa as criaturas de um arquivo")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=FORMATS)
+    import_parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE, help="Criaturas por transação")
+    import_parser.add_argument("--restart", action="store_true", help="Ignora o checkpoint e começa do início")
+
+    args = parser.parse_args(argv)
+    progress = None if args.quiet else ProgressReporter()
+    formato = detect_format(args.path, args.format)
+
+    if args.command == "export":
+        compress = args.gzip or args.path.endswith(".gz")
+        total = asyncio.run(export(args.database_url, args.path, formato, compress, progress))
+        print(f"Exportação concluída: {total} criaturas em '{args.path}'.")
+        return
+
+    try:
+        resumo = asyncio.run(import_file(args.database_url, args.path, formato, args.chunk_size, args.restart, progress))
+    except ValueError as e:
+        parser.exit(2, f"{e}\n")
+    print(
+        f"Importação concluída: {resumo.criadas} criadas, {resumo.conflitos} conflitos "
+        f"e {resumo.invalidas} inválidas em {resumo.lidos} registros."
+    )
+    if resumo.invalidas:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
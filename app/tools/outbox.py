@@ -0,0 +1,33 @@
+"""
+    Liga ou desliga as triggers do outbox 'criaturas_eventos' (feed de
+    alterações em GET /criaturas/eventos). Com SCHEMA_BOOTSTRAP=none a
+    aplicação não altera o schema na inicialização, e este é o passo explícito
+    que acompanha a mudança de EVENTS_ENABLED.
+
+    Uso: python -m app.tools.outbox (--enable | --disable) [--database-url URL]
+"""
+import argparse
+import asyncio
+from app.config.settings import DATABASE_URL
+from app.database.connection import create_engine
+from app.database.schema import set_outbox_triggers
+
+async def apply(database_url: str, enabled: bool) -> None:
+    engine = create_engine(database_url)
+    try:
+        await set_outbox_triggers(engine, enabled)
+    finally:
+        await engine.dispose()
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    estado = parser.add_mutually_exclusive_group(required=True)
+    estado.add_argument("--enable", dest="enabled", action="store_true", help="Cria as triggers do outbox")
+    estado.add_argument("--disable", dest="enabled", action="store_false", help="Remove as triggers do outbox")
+    parser.add_argument("--database-url", default=DATABASE_URL, help="Banco a alterar (padrão: DATABASE_URL)")
+    args = parser.parse_args(argv)
+    asyncio.run(apply(args.database_url, args.enabled))
+    print(f"Triggers do outbox {'criadas' if args.enabled else 'removidas'}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+    Recalcula a tabela de resumo 'criaturas_estatisticas' a partir de
+    'criaturas', para recuperar contagens divergentes (por exemplo, depois de
+    escritas feitas com as triggers desabilitadas ou de uma restauração parcial).
+
+    Uso: python -m app.tools.rebuild_stats [--database-url URL]
+"""
+import argparse
+import asyncio
+from app.config.settings import DATABASE_URL
+from app.database.connection import DBConnectionHandler, create_engine, create_session_factory
+from app.database.schema import init_schema
+from app.repositories.criatura_repository import CriaturaRepository
+
+async def rebuild(database_url: str) -> int:
+    engine = create_engine(database_url)
+    try:
+        # Garante que a tabela e as triggers existem antes do recálculo
+        await init_schema(engine)
+        repository = CriaturaRepository(DBConnectionHandler(create_session_factory(engine)))
+        return await repository.rebuild_statistics()
+    finally:
+        await engine.dispose()
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=DATABASE_URL, help="Banco a recalcular (padrão: DATABASE_URL)")
+    args = parser.parse_args(argv)
+    total = asyncio.run(rebuild(args.database_url))
+    print(f"Estatísticas recalculadas: {total} criaturas contadas.")
+
+if __name__ == "__main__":
+    main()
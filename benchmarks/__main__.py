@@ -0,0 +1,100 @@
+"""
+    Suíte de benchmarks do bestiário: carrega um banco SQLite temporário com
+    criaturas sintéticas, mede as rotas (vazão e latências p50/p95/p99 em cada
+    nível de concorrência) e os métodos do repositório e do serviço isolados,
+    e grava tudo em JSON para comparar execuções.
+
+    Uso:
+        python -m benchmarks --rows 10000 --concurrency 1,8,32 --output atual.json
+        python -m benchmarks --rows 100000 --baseline base.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="Criaturas carregadas antes das medições (1 mil a 1 milhão)")
+    parser.add_argument("--requests", type=int, default=200, help="Requisições por rota e nível de concorrência")
+    parser.add_argument("--concurrency", default="1,8,32", help="Níveis de concorrência, separados por vírgula")
+    parser.add_argument("--iterations", type=int, default=200, help="Chamadas por método nos microbenchmarks")
+    parser.add_argument("--full-list-max", type=int, default=20000, help="Maior tabela em que a listagem completa e o NDJSON são medidos")
+    parser.add_argument("--only", choices=["routes", "layers"], help="Executa apenas as rotas ou apenas o repositório/serviço")
+    parser.add_argument("--no-cache", action="store_true", help="Desabilita o cache de criaturas da aplicação")
+    parser.add_argument("--output", default="benchmark.json", help="Arquivo JSON com os resultados")
+    parser.add_argument("--baseline", help="Resultado anterior para comparar e apontar regressões")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Tolerância das regressões (0.1 = 10%%)")
+    args = parser.parse_args(argv)
+    if not 1000 <= args.rows <= 1_000_000:
+        parser.error("--rows deve estar entre 1000 e 1000000")
+    args.concurrency = [int(c) for c in args.concurrency.split(",")]
+    return args
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+async def executar(args: argparse.Namespace, database_url: str) -> list[dict]:
+    # Importados só depois de DATABASE_URL apontar para o banco temporário
+    from benchmarks import layers, routes
+    from benchmarks.common import seed
+
+    print(f"Carregando {args.rows} criaturas...")
+    duracao = await seed(database_url, args.rows)
+    print(f"  {args.rows / duracao:.0f} criaturas/s\n")
+
+    resultados = []
+    if args.only in (None, "routes"):
+        print("Rotas:")
+        resultados += await routes.run(args.rows, args.requests, args.concurrency, args.full_list_max)
+    if args.only in (None, "layers"):
+        print("\nRepositório e serviço:")
+        resultados += await layers.run(args.rows, args.iterations)
+    return resultados
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as diretorio:
+        database_url = f"sqlite+aiosqlite:///{os.path.join(diretorio, 'benchmark.db')}"
+        os.environ["DATABASE_URL"] = database_url
+        os.environ["SCHEMA_BOOTSTRAP"] = "create_all"
+        if args.no_cache:
+            os.environ["CACHE_ENABLED"] = "false"
+        resultados = asyncio.run(executar(args, database_url))
+
+    from app.routers.api import serialization
+    saida = {
+        "meta": {
+            "data": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "linhas": args.rows,
+            "requisicoes": args.requests,
+            "concorrencia": args.concurrency,
+            "iteracoes": args.iterations,
+            "cache": not args.no_cache,
+            "orjson": serialization.orjson is not None,
+        },
+        "resultados": resultados,
+    }
+    with open(args.output, "w") as arquivo:
+        json.dump(saida, arquivo, indent=2, ensure_ascii=False)
+    print(f"\nResultados gravados em {args.output}")
+
+    if args.baseline:
+        from benchmarks.compare import main as compare
+        print()
+        return compare([args.baseline, args.output, "--tolerancia", str(args.tolerance)])
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+    Peças compartilhadas pelos benchmarks: carga do banco com criaturas
+    sintéticas, medição de latências e o formato dos resultados.
+"""
+import random
+import statistics
+import time
+from typing import Awaitable, Callable, Optional
+from app.database.connection import DBConnectionHandler, create_engine, create_session_factory
+from app.database.schema import init_schema
+from app.repositories.criatura_repository import CriaturaRepository
+from app.schemas.criatura_schema import CriaturaCreate, RegiaoEnum
+
+REGIOES = [regiao.value for regiao in RegiaoEnum]
+
+# Vocabulário das lendas sintéticas, também usado nos termos da busca textual
+PALAVRAS = [
+    "floresta", "rio", "mata", "noite", "fogo", "serpente", "encanto", "caçador",
+    "lua", "pescador", "assombração", "cerrado", "sertão", "tesouro", "protetor",
+    "assobio", "boto", "curupira", "saci", "iara", "mula", "lobisomem", "cuca",
+    "vento", "pântano", "aldeia", "viajante", "feitiço", "canto", "sombra"
+]
+
+SEED_CHUNK = 20000
+
+def nome_criatura(indice: int) -> str:
+    return f"Criatura {indice:07d}"
+
+def criatura_sintetica(indice: int, rng: random.Random) -> CriaturaCreate:
+    lenda = " ".join(rng.choice(PALAVRAS) for _ in range(rng.randint(30, 90)))
+    return CriaturaCreate(
+        nome=nome_criatura(indice),
+        regiao=REGIOES[indice % len(REGIOES)],
+        periculosidade=rng.randint(1, 5),
+        lenda=lenda.capitalize() + "."
+    )
+
+async def seed(database_url: str, rows: int, seed_value: int = 42) -> float:
+    """
+        Cria o schema e insere 'rows' criaturas sintéticas (de 1 mil a 1 milhão)
+        com a inserção em lote do repositório, em blocos de 'SEED_CHUNK'.
+        Retorna o tempo gasto, em segundos.
+    """
+    engine = create_engine(database_url)
+    await init_schema(engine, "create_all")
+    repository = CriaturaRepository(DBConnectionHandler(create_session_factory(engine)))
+    rng = random.Random(seed_value)
+    inicio = time.perf_counter()
+    for bloco in range(0, rows, SEED_CHUNK):
+        criaturas = [criatura_sintetica(i, rng) for i in range(bloco + 1, min(bloco + SEED_CHUNK, rows) + 1)]
+        await repository.bulk_insert(criaturas)
+    duracao = time.perf_counter() - inicio
+    await engine.dispose()
+    return duracao
+
+def resumo(grupo: str, nome: str, latencias: list[float], duracao: float, concorrencia: int = 1, erros: int = 0) -> dict:
+    """
+        Resume uma medição: operações por segundo (pelo tempo total, que com
+        concorrência é menor que a soma das latências) e percentis de latência.
+    """
+    ordenadas = sorted(latencias)
+    return {
+        "grupo": grupo,
+        "nome": nome,
+        "concorrencia": concorrencia,
+        "operacoes": len(latencias),
+        "erros": erros,
+        "ops_por_s": round(len(latencias) / duracao, 1) if duracao > 0 else None,
+        "media_ms": round(statistics.fmean(ordenadas) * 1000, 3) if ordenadas else None,
+        "p50_ms": percentil_ms(ordenadas, 50),
+        "p95_ms": percentil_ms(ordenadas, 95),
+        "p99_ms": percentil_ms(ordenadas, 99),
+    }
+
+def percentil_ms(ordenadas: list[float], p: int) -> Optional[float]:
+    # Percentil pelo método do posto mais próximo, sobre latências já ordenadas
+    if not ordenadas:
+        return None
+    posto = max(1, -(-p * len(ordenadas) // 100))
+    return round(ordenadas[posto - 1] * 1000, 3)
+
+async def medir_sequencial(
+    grupo: str,
+    nome: str,
+    operacao: Callable[[int], Awaitable],
+    iteracoes: int,
+    aquecimento: int = 5
+) -> dict:
+    """
+        Executa 'operacao(i)' 'iteracoes' vezes, uma após a outra, medindo cada
+        chamada. As primeiras 'aquecimento' chamadas não entram no resultado.
+    """
+    for i in range(aquecimento):
+        await operacao(i)
+    latencias = []
+    inicio = time.perf_counter()
+    for i in range(aquecimento, aquecimento + iteracoes):
+        antes = time.perf_counter()
+        await operacao(i)
+        latencias.append(time.perf_counter() - antes)
+    return resumo(grupo, nome, latencias, time.perf_counter() - inicio)
@@ -0,0 +1,64 @@
+"""
+    Compara dois resultados do 'python -m benchmarks' e aponta regressões:
+    queda de vazão ou aumento do p95 acima da tolerância.
+
+    Uso: python -m benchmarks.compare base.json atual.json --tolerancia 0.1
+"""
+import argparse
+import json
+import sys
+
+def chave(resultado: dict) -> tuple:
+    return resultado["grupo"], resultado["nome"], resultado["concorrencia"]
+
+def compare(base: dict, atual: dict, tolerancia: float = 0.1) -> list[dict]:
+    """
+        Compara as medições presentes nos dois resultados. Uma medição regrediu
+        quando as operações por segundo caíram ou o p95 subiu mais que
+        'tolerancia' (0.1 = 10%).
+    """
+    anteriores = {chave(r): r for r in base["resultados"]}
+    comparacoes = []
+    for resultado in atual["resultados"]:
+        anterior = anteriores.get(chave(resultado))
+        if anterior is None or not anterior["ops_por_s"] or not anterior["p95_ms"]:
+            continue
+        vazao = resultado["ops_por_s"] / anterior["ops_por_s"] - 1
+        p95 = resultado["p95_ms"] / anterior["p95_ms"] - 1
+        comparacoes.append({
+            "grupo": resultado["grupo"],
+            "nome": resultado["nome"],
+            "concorrencia": resultado["concorrencia"],
+            "ops_por_s": (anterior["ops_por_s"], resultado["ops_por_s"]),
+            "p95_ms": (anterior["p95_ms"], resultado["p95_ms"]),
+            "variacao_vazao": round(vazao, 4),
+            "variacao_p95": round(p95, 4),
+            "regressao": vazao < -tolerancia or p95 > tolerancia,
+        })
+    return comparacoes
+
+def imprimir(comparacoes: list[dict]) -> None:
+    for c in comparacoes:
+        marca = "REGRESSÃO" if c["regressao"] else ""
+        print(
+            f"{c['grupo'] + ' ' + c['nome']:<50} c={c['concorrencia']:<3} "
+            f"vazão {c['ops_por_s'][0]:>9} -> {c['ops_por_s'][1]:>9} ({c['variacao_vazao']:+.1%})  "
+            f"p95 {c['p95_ms'][0]:>8} -> {c['p95_ms'][1]:>8} ms ({c['variacao_p95']:+.1%})  {marca}"
+        )
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("atual")
+    parser.add_argument("--tolerancia", type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    with open(args.base) as base, open(args.atual) as atual:
+        comparacoes = compare(json.load(base), json.load(atual), args.tolerancia)
+    imprimir(comparacoes)
+    regressoes = sum(c["regressao"] for c in comparacoes)
+    print(f"\n{len(comparacoes)} medições comparadas, {regressoes} regressões (tolerância de {args.tolerancia:.0%}).")
+    return 1 if regressoes else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+    Microbenchmarks do 'CriaturaRepository' e do 'CriaturaService' isolados,
+    sem HTTP, sobre o mesmo banco carregado para as rotas.
+"""
+import random
+import time
+from contextlib import aclosing
+from app.cache.criatura_cache import CriaturaCache
+from app.config.settings import DATABASE_URL
+from app.database.connection import DBConnectionHandler, create_engine, create_session_factory
+from app.repositories.criatura_repository import CriaturaRepository
+from app.routers.api.serialization import CAMPOS_CRIATURA
+from app.schemas.criatura_schema import CriaturaCreate, CriaturaFiltro, CriaturaUpdate
+from app.services.criatura_service import CriaturaService
+from benchmarks.common import PALAVRAS, REGIOES, medir_sequencial, nome_criatura
+
+LENDA = "Lenda criada pelo benchmark para medir a camada de dados do bestiário."
+
+async def run(rows: int, iteracoes: int, seed_value: int = 42) -> list[dict]:
+    rng = random.Random(seed_value)
+    engine = create_engine(DATABASE_URL)
+    session_factory = create_session_factory(engine)
+    execucao = int(time.time())
+
+    def qualquer_id() -> int:
+        return rng.randint(1, rows)
+
+    def repository(cache=None) -> CriaturaRepository:
+        return CriaturaRepository(DBConnectionHandler(session_factory), observers=[cache] if cache is not None else [])
+
+    repo = repository()
+    servico = CriaturaService(repo)
+    cache = CriaturaCache(max_size=rows, ttl=3600, negative_ttl=60)
+    servico_com_cache = CriaturaService(repository(cache), cache=cache)
+    filtro = CriaturaFiltro(regiao=REGIOES[0], periculosidade_min=3, ordenar="-periculosidade")
+
+    async def stream_mil(i: int) -> None:
+        # Fecha o gerador ao interromper a leitura, devolvendo a conexão ao pool
+        lidas = 0
+        async with aclosing(repo.stream_all_rows(CAMPOS_CRIATURA)) as rows:
+            async for _ in rows:
+                lidas += 1
+                if lidas == 1000:
+                    break
+
+    medicoes = [
+        ("repositorio", "select_by_id", lambda i: repo.select_by_id(qualquer_id())),
+        ("repositorio", "select_by_name", lambda i: repo.select_by_name(nome_criatura(qualquer_id()))),
+        ("repositorio", "select_all (100, ORM)", lambda i: repo.select_all(limit=100, after=[qualquer_id()])),
+        ("repositorio", "select_all_rows (100)", lambda i: repo.select_all_rows(CAMPOS_CRIATURA, limit=100, after=[qualquer_id()])),
+        ("repositorio", "select_all_rows (filtro, 100)", lambda i: repo.select_all_rows(CAMPOS_CRIATURA, filtro=filtro, limit=100)),
+        ("repositorio", "stream_all_rows (1000)", stream_mil),
+        ("repositorio", "count (filtro)", lambda i: repo.count(filtro)),
+        ("repositorio", "search", lambda i: repo.search(rng.choice(PALAVRAS), 20)),
+        ("repositorio", "select_version_by_id", lambda i: repo.select_version_by_id(qualquer_id())),
+        ("repositorio", "insert", lambda i: repo.insert(
+            CriaturaCreate(nome=f"Repo {execucao} {i}", regiao=rng.choice(REGIOES), periculosidade=3, lenda=LENDA)
+        )),
+        ("repositorio", "bulk_insert (100)", lambda i: repo.bulk_insert([
+            CriaturaCreate(nome=f"Repo lote {execucao} {i} {j}", regiao=rng.choice(REGIOES), periculosidade=3, lenda=LENDA)
+            for j in range(100)
+        ])),
+        ("repositorio", "update_by_id", lambda i: repo.update_by_id(qualquer_id(), CriaturaUpdate(periculosidade=rng.randint(1, 5)))),
+        ("servico", "get_criatura_by_id (sem cache)", lambda i: servico.get_criatura_by_id(qualquer_id())),
+        ("servico", "get_criatura_by_id (cache)", lambda i: servico_com_cache.get_criatura_by_id(rng.randint(1, min(rows, 100)))),
+        ("servico", "get_criaturas_page_rows (100)", lambda i: servico.get_criaturas_page_rows(CAMPOS_CRIATURA, limit=100)),
+        ("servico", "get_criaturas_page (100, ORM)", lambda i: servico.get_criaturas_page(limit=100)),
+        ("servico", "search_criaturas", lambda i: servico.search_criaturas(rng.choice(PALAVRAS), 20)),
+        ("servico", "get_versao_catalogo", lambda i: servico.get_versao_catalogo()),
+        ("servico", "create_criatura", lambda i: servico.create_criatura(
+            CriaturaCreate(nome=f"Servico {execucao} {i}", regiao=rng.choice(REGIOES), periculosidade=2, lenda=LENDA)
+        )),
+        ("servico", "update_criatura_by_id", lambda i: servico.update_criatura_by_id(
+            qualquer_id(), CriaturaUpdate(periculosidade=rng.randint(1, 5))
+        )),
+    ]
+
+    resultados = []
+    try:
+        # Com o cache aquecido, a medição com cache mede apenas acertos
+        for id in range(1, min(rows, 100) + 1):
+            await servico_com_cache.get_criatura_by_id(id)
+        for grupo, nome, operacao in medicoes:
+            resultado = await medir_sequencial(grupo, nome, operacao, iteracoes)
+            print(
+                f"  {grupo + '.' + nome:<44} {resultado['ops_por_s']:>9} ops/s  "
+                f"p50={resultado['p50_ms']}ms p95={resultado['p95_ms']}ms p99={resultado['p99_ms']}ms"
+            )
+            resultados.append(resultado)
+    finally:
+        await engine.dispose()
+    return resultados
@@ -0,0 +1,86 @@
+"""
+    Compara a serialização da listagem de criaturas antes e depois do caminho
+    rápido: ORM + 'CriaturaResponse.model_validate' + 'response_model' contra
+    tuplas do banco serializadas direto em bytes por 'dump_criaturas'.
+
+    Uso: python -m benchmarks.list_serialization --rows 50000 --repeat 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from pydantic import TypeAdapter
+from app.database.connection import DBConnectionHandler, create_engine, create_session_factory
+from app.database.schema import init_schema
+from app.repositories.criatura_repository import CriaturaRepository
+from app.routers.api import serialization
+from app.routers.api.serialization import CAMPOS_CRIATURA, dump_criaturas
+from app.schemas.criatura_schema import CriaturaCreate, CriaturaResponse
+
+LENDA = "Criatura lendária que assombra as matas e os rios do interior do Brasil. " * 3
+REGIOES = ["Norte", "Nordeste", "Centro-Oeste", "Sudeste", "Sul"]
+
+_RESPONSE_ADAPTER = TypeAdapter(list[CriaturaResponse])
+
+async def seed(repository: CriaturaRepository, rows: int) -> None:
+    criaturas = [
+        CriaturaCreate(nome=f"Criatura {i}", regiao=REGIOES[i % 5], periculosidade=i % 5 + 1, lenda=LENDA)
+        for i in range(rows)
+    ]
+    await repository.bulk_insert(criaturas)
+
+async def legado(repository: CriaturaRepository) -> bytes:
+    # Mesmo trabalho do caminho antigo: ORM, model_validate por linha e a
+    # validação + serialização do 'response_model' feitas pelo FastAPI
+    criaturas = [CriaturaResponse.model_validate(c) for c in await repository.select_all()]
+    validadas = _RESPONSE_ADAPTER.validate_python(criaturas)
+    conteudo = _RESPONSE_ADAPTER.dump_python(validadas, mode="json")
+    return json.dumps(conteudo, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+async def rapido(repository: CriaturaRepository) -> bytes:
+    return dump_criaturas(await repository.select_all_rows(CAMPOS_CRIATURA))
+
+async def medir(nome: str, caminho, repository: CriaturaRepository, rows: int, repeat: int) -> dict:
+    await caminho(repository)
+    tempos = []
+    for _ in range(repeat):
+        inicio = time.perf_counter()
+        await caminho(repository)
+        tempos.append(time.perf_counter() - inicio)
+    melhor = min(tempos)
+    return {"caminho": nome, "linhas": rows, "melhor_s": round(melhor, 4), "linhas_por_s": round(rows / melhor)}
+
+async def main(rows: int, repeat: int) -> list[dict]:
+    with tempfile.TemporaryDirectory() as diretorio:
+        engine = create_engine(f"sqlite+aiosqlite:///{os.path.join(diretorio, 'bench.db')}")
+        await init_schema(engine, "create_all")
+        repository = CriaturaRepository(DBConnectionHandler(create_session_factory(engine)))
+        await seed(repository, rows)
+
+        resultados = [await medir("legado", legado, repository, rows, repeat)]
+        biblioteca = serialization.orjson
+        if biblioteca is not None:
+            resultados.append(await medir("rapido (orjson)", rapido, repository, rows, repeat))
+        serialization.orjson = None
+        try:
+            resultados.append(await medir("rapido (TypeAdapter)", rapido, repository, rows, repeat))
+        finally:
+            serialization.orjson = biblioteca
+        await engine.dispose()
+    return resultados
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Imprime os resultados em JSON")
+    args = parser.parse_args()
+
+    resultados = asyncio.run(main(args.rows, args.repeat))
+    if args.json:
+        print(json.dumps(resultados, indent=2))
+    else:
+        for r in resultados:
+            print(f"{r['caminho']:<22} {r['linhas_por_s']:>10} linhas/s  ({r['melhor_s']} s para {r['linhas']} linhas)")
@@ -0,0 +1,153 @@
+"""
+    Benchmarks das rotas de 'criatura_routes.py', chamadas pelo transporte ASGI
+    do httpx (sem rede) com a aplicação completa, inclusive o lifespan.
+"""
+import asyncio
+import itertools
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+from httpx import ASGITransport, AsyncClient
+from app.routers.api.api import create_app
+from app.services.pagination import encode_cursor
+from benchmarks.common import PALAVRAS, REGIOES, nome_criatura, resumo
+
+LENDA = "Lenda criada pelo benchmark para medir as rotas de escrita do bestiário."
+
+@dataclass
+class Cenario:
+    nome: str
+    montar: Callable[[int], dict]
+    requisicoes: Optional[int] = None
+
+async def medir_concorrente(client: AsyncClient, cenario: Cenario, total: int, concorrencia: int, indices) -> dict:
+    """
+        Dispara 'total' requisições com até 'concorrencia' em andamento ao mesmo
+        tempo. 'indices' é compartilhado entre os níveis de concorrência, para que
+        cenários de escrita nunca repitam o alvo.
+    """
+    restantes = iter(range(total))
+    latencias = []
+    erros = 0
+
+    async def trabalhador() -> None:
+        nonlocal erros
+        for _ in restantes:
+            requisicao = cenario.montar(next(indices))
+            antes = time.perf_counter()
+            response = await client.request(**requisicao)
+            latencias.append(time.perf_counter() - antes)
+            if response.status_code >= 400:
+                erros += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabalhador() for _ in range(concorrencia)))
+    return resumo("rotas", cenario.nome, latencias, time.perf_counter() - inicio, concorrencia, erros)
+
+async def criar_descartaveis(client: AsyncClient, prefixo: str, quantidade: int) -> list[tuple[int, str]]:
+    # Criaturas usadas apenas pelos cenários de DELETE, criadas fora da medição
+    criadas = []
+    for inicio in range(0, quantidade, 1000):
+        itens = [
+            {"nome": f"{prefixo} {i}", "regiao": "Sul", "periculosidade": 1, "lenda": LENDA}
+            for i in range(inicio, min(inicio + 1000, quantidade))
+        ]
+        response = await client.post("/criaturas/bulk", json=itens)
+        criadas += [(r["id"], r["nome"]) for r in response.json()["resultados"]]
+    return criadas
+
+async def cenarios(client: AsyncClient, rows: int, total: int, niveis: list[int], full_list_max: int, rng: random.Random) -> list[Cenario]:
+    def qualquer_id() -> int:
+        return rng.randint(1, rows)
+
+    etags = {}
+    for id in range(1, min(rows, 100) + 1):
+        etags[id] = (await client.get(f"/criaturas/id/{id}")).headers["ETag"]
+
+    def condicional(i: int) -> dict:
+        id = rng.choice(list(etags))
+        return {"method": "GET", "url": f"/criaturas/id/{id}", "headers": {"If-None-Match": etags[id]}}
+
+    consumo = total * len(niveis) + 10
+    por_id = await criar_descartaveis(client, "Descartavel id", consumo)
+    por_nome = await criar_descartaveis(client, "Descartavel nome", consumo)
+    execucao = int(time.time())
+
+    lista = [
+        Cenario("GET /criaturas/ (página)", lambda i: {
+            "method": "GET", "url": "/criaturas/", "params": {"limit": 100, "after": encode_cursor(rng.randint(0, max(rows - 100, 0)))}
+        }),
+        Cenario("GET /criaturas/ (filtro)", lambda i: {
+            "method": "GET", "url": "/criaturas/", "params": {
+                "regiao": rng.choice(REGIOES), "periculosidade_min": rng.randint(1, 5), "ordenar": "-periculosidade", "limit": 100
+            }
+        }),
+        Cenario("GET /criaturas/ (fields)", lambda i: {
+            "method": "GET", "url": "/criaturas/", "params": {"limit": 1000, "fields": "id,nome,regiao,periculosidade"}
+        }),
+        Cenario("GET /criaturas/ (304)", lambda i: {
+            "method": "GET", "url": "/criaturas/", "params": {"limit": 100}, "headers": {"If-None-Match": etag_lista}
+        }),
+        Cenario("GET /criaturas/busca", lambda i: {
+            "method": "GET", "url": "/criaturas/busca", "params": {"q": f"{rng.choice(PALAVRAS)} {rng.choice(PALAVRAS)}"}
+        }),
+        Cenario("GET /criaturas/id/{id}", lambda i: {"method": "GET", "url": f"/criaturas/id/{qualquer_id()}"}),
+        Cenario("GET /criaturas/id/{id} (304)", condicional),
+        Cenario("GET /criaturas/nome/{nome}", lambda i: {"method": "GET", "url": f"/criaturas/nome/{nome_criatura(qualquer_id())}"}),
+        Cenario("POST /criaturas/", lambda i: {
+            "method": "POST", "url": "/criaturas/", "json": {
+                "nome": f"Bench {execucao} {i}", "regiao": rng.choice(REGIOES), "periculosidade": rng.randint(1, 5), "lenda": LENDA
+            }
+        }),
+        Cenario("POST /criaturas/bulk (100)", lambda i: {
+            "method": "POST", "url": "/criaturas/bulk", "json": [
+                {"nome": f"Lote {execucao} {i} {j}", "regiao": rng.choice(REGIOES), "periculosidade": rng.randint(1, 5), "lenda": LENDA}
+                for j in range(100)
+            ]
+        }),
+        Cenario("PUT /criaturas/id/{id}", lambda i: {
+            "method": "PUT", "url": f"/criaturas/id/{qualquer_id()}", "json": {"periculosidade": rng.randint(1, 5)}
+        }),
+        Cenario("PUT /criaturas/nome/{nome}", lambda i: {
+            "method": "PUT", "url": f"/criaturas/nome/{nome_criatura(qualquer_id())}", "json": {"periculosidade": rng.randint(1, 5)}
+        }),
+        Cenario("DELETE /criaturas/id/{id}", lambda i: {"method": "DELETE", "url": f"/criaturas/id/{por_id[i][0]}"}),
+        Cenario("DELETE /criaturas/nome/{nome}", lambda i: {"method": "DELETE", "url": f"/criaturas/nome/{por_nome[i][1]}"}),
+    ]
+    if rows <= full_list_max:
+        # A listagem completa e o NDJSON percorrem a tabela inteira a cada requisição
+        poucas = max(total // 10, 5)
+        lista[:0] = [
+            Cenario("GET /criaturas/ (completa)", lambda i: {"method": "GET", "url": "/criaturas/"}, poucas),
+            Cenario("GET /criaturas/ (NDJSON)", lambda i: {
+                "method": "GET", "url": "/criaturas/", "headers": {"Accept": "application/x-ndjson"}
+            }, poucas),
+        ]
+    # O ETag da listagem muda a cada escrita, então é lido depois da preparação
+    etag_lista = (await client.get("/criaturas/", params={"limit": 100})).headers["ETag"]
+    return lista
+
+async def run(rows: int, total: int, niveis: list[int], full_list_max: int, seed_value: int = 42) -> list[dict]:
+    """
+        Mede cada rota em cada nível de concorrência. Os cenários de leitura rodam
+        antes dos de escrita, que alteram o banco (e o ETag da listagem).
+    """
+    rng = random.Random(seed_value)
+    app = create_app()
+    resultados = []
+    async with app.router.lifespan_context(app):
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            for cenario in await cenarios(client, rows, total, niveis, full_list_max, rng):
+                indices = itertools.count()
+                requisicoes = cenario.requisicoes or total
+                for concorrencia in niveis:
+                    resultado = await medir_concorrente(client, cenario, requisicoes, concorrencia, indices)
+                    print(
+                        f"  {cenario.nome:<34} c={concorrencia:<3} {resultado['ops_por_s']:>9} req/s  "
+                        f"p50={resultado['p50_ms']}ms p95={resultado['p95_ms']}ms p99={resultado['p99_ms']}ms"
+                        + (f"  erros={resultado['erros']}" if resultado["erros"] else "")
+                    )
+                    resultados.append(resultado)
+    return resultados
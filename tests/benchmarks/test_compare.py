@@ -0,0 +1,51 @@
+from benchmarks.common import percentil_ms, resumo
+from benchmarks.compare import compare
+
+def medicao(nome, ops_por_s, p95_ms, concorrencia=1):
+    return {"grupo": "rotas", "nome": nome, "concorrencia": concorrencia, "ops_por_s": ops_por_s, "p95_ms": p95_ms}
+
+def test_percentil_ms_nearest_rank():
+    """
+    Os percentis devem usar o posto mais próximo sobre as latências ordenadas
+    """
+    latencias = [i / 1000 for i in range(1, 101)]
+
+    assert percentil_ms(latencias, 50) == 50.0
+    assert percentil_ms(latencias, 95) == 95.0
+    assert percentil_ms(latencias, 99) == 99.0
+    assert percentil_ms([], 95) is None
+
+def test_resumo_uses_total_duration_for_throughput():
+    """
+    A vazão deve vir do tempo total da medição, não da soma das latências
+    """
+    resultado = resumo("rotas", "GET", [0.002, 0.001, 0.003, 0.004], duracao=0.002, concorrencia=4, erros=1)
+
+    assert resultado["operacoes"] == 4
+    assert resultado["erros"] == 1
+    assert resultado["ops_por_s"] == 2000.0
+    assert resultado["p50_ms"] == 2.0
+    assert resultado["p99_ms"] == 4.0
+
+def test_compare_flags_throughput_and_p95_regressions():
+    """
+    Queda de vazão ou alta do p95 acima da tolerância deve ser regressão
+    """
+    base = {"resultados": [medicao("a", 1000, 1.0), medicao("b", 1000, 1.0), medicao("c", 1000, 1.0)]}
+    atual = {"resultados": [medicao("a", 950, 1.05), medicao("b", 800, 1.0), medicao("c", 1000, 1.5)]}
+
+    comparacoes = {c["nome"]: c for c in compare(base, atual, tolerancia=0.1)}
+
+    assert comparacoes["a"]["regressao"] is False
+    assert comparacoes["b"]["regressao"] is True
+    assert comparacoes["c"]["regressao"] is True
+    assert comparacoes["b"]["variacao_vazao"] == -0.2
+
+def test_compare_skips_measurements_missing_from_base():
+    """
+    Medições sem correspondente na base (nome ou concorrência) devem ser ignoradas
+    """
+    base = {"resultados": [medicao("a", 1000, 1.0)]}
+    atual = {"resultados": [medicao("a", 1000, 1.0, concorrencia=8), medicao("novo", 10, 1.0)]}
+
+    assert compare(base, atual) == []
@@ -0,0 +1,17 @@
+from app.cache.criatura_cache import CriaturaCache
+import pytest
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def cache(clock):
+    return CriaturaCache(max_size=4, ttl=60, negative_ttl=5, clock=clock)
@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+from app.cache.autocomplete_index import AutocompleteIndex, fold, trigrams
+
+NOMES = [(1, "Curupira"), (2, "Saci-Pererê"), (3, "Iara"), (4, "Mula sem cabeça"), (5, "Cuca"), (6, "Boitatá")]
+
+def make_index() -> AutocompleteIndex:
+    index = AutocompleteIndex()
+    index.build(NOMES)
+    return index
+
+def test_fold_and_trigrams():
+    assert fold("Saci-Pererê") == "saci-perere"
+    assert fold("MULA SEM CABEÇA") == "mula sem cabeca"
+    assert trigrams("iara") == {"  i", " ia", "iar", "ara", "ra "}
+
+def test_prefix_ignores_accents_and_case():
+    """
+    Nomes que começam pelo termo vêm antes dos que só têm uma palavra
+    começando por ele, ambos em ordem alfabética
+    """
+    index = make_index()
+
+    assert index.search("cu", 10) == [(5, "Cuca"), (1, "Curupira")]
+    assert index.search("SACI", 10) == [(2, "Saci-Pererê")]
+    assert index.search("perere", 10) == [(2, "Saci-Pererê")]
+    assert index.search("cabeca", 10) == [(4, "Mula sem cabeça")]
+    assert index.search("boitata", 10) == [(6, "Boitatá")]
+    assert index.search("cu", 1) == [(5, "Cuca")]
+    assert index.search("  ", 10) == []
+
+def test_fuzzy_fallback_for_typos():
+    index = make_index()
+
+    assert index.search("curupria", 10) == [(1, "Curupira")]
+    assert index.search("xyz", 10) == []
+
+def test_follows_repository_writes():
+    """
+    Inserts, renomeações e deletes avisados pelo repositório devem atualizar o
+    índice, sem deixar o nome antigo para trás
+    """
+    index = make_index()
+
+    index.on_saved([SimpleNamespace(id=7, nome="Caipora")])
+    assert index.search("caip", 10) == [(7, "Caipora")]
+
+    index.on_saved([SimpleNamespace(id=1, nome="Curupira das Matas")])
+    assert index.search("matas", 10) == [(1, "Curupira das Matas")]
+    assert index.search("curupira", 10) == [(1, "Curupira das Matas")]
+
+    index.on_deleted([1, 99])
+    assert index.search("curu", 10) == []
+    assert index.search("matas", 10) == []
+    assert len(index) == 6
+
+def test_batch_of_writes_matches_build():
+    """
+    Um lote de inserts e renomeações avisado de uma vez deve deixar o índice
+    igual ao montado do zero com os mesmos nomes
+    """
+    index = make_index()
+    lote = [(id, f"Criatura {id} do Lote") for id in range(100, 0, -7)] + [(3, "Iara dos Rios"), (5, "Cuca")]
+
+    index.on_saved([SimpleNamespace(id=id, nome=nome) for id, nome in lote])
+
+    esperado = AutocompleteIndex()
+    esperado.build({**dict(NOMES), **dict(lote)}.items())
+    for termo in ("cri", "lote", "iara", "rios", "cu", "saci", "criatura 9"):
+        assert index.search(termo, 50) == esperado.search(termo, 50)
+    assert len(index) == len(esperado)
@@ -0,0 +1,68 @@
+import gzip
+from datetime import datetime
+from app.cache import catalog_cache
+from app.cache.catalog_cache import CatalogCache, CatalogEntry, compress_variants
+
+def make_entry(tamanho: int, versao: int = 1) -> CatalogEntry:
+    return CatalogEntry({"identity": b"x" * tamanho}, versao, datetime(2024, 1, 1), 1)
+
+def test_compress_variants(monkeypatch):
+    corpo = b'[{"id":1,"nome":"Curupira"}]' * 100
+    variantes = compress_variants(corpo)
+
+    assert variantes["identity"] == corpo
+    assert gzip.decompress(variantes["gzip"]) == corpo
+    # O gzip é determinístico (mtime=0): o mesmo corpo gera os mesmos bytes
+    assert compress_variants(corpo)["gzip"] == variantes["gzip"]
+
+    monkeypatch.setattr(catalog_cache, "brotli", None)
+    assert set(compress_variants(corpo)) == {"identity", "gzip"}
+
+def test_get_and_ttl(clock):
+    cache = CatalogCache(max_bytes=1000, ttl=60, clock=clock)
+    entry = make_entry(10)
+    cache.set(("id", "nome"), entry, cache.generation)
+
+    assert cache.get(("id", "nome")) is entry
+    assert cache.get(("id",)) is None
+    assert cache.get(("id", "nome"), count=False) is entry
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    clock.now = 61
+    assert cache.get(("id", "nome")) is None
+    assert cache.size_bytes == 0
+
+def test_lru_eviction_by_bytes(clock):
+    cache = CatalogCache(max_bytes=100, ttl=60, clock=clock)
+    cache.set("a", make_entry(40), cache.generation)
+    cache.set("b", make_entry(40), cache.generation)
+
+    # Acessar "a" o torna o mais recente; "b" é despejada para caber "c"
+    cache.get("a")
+    cache.set("c", make_entry(40), cache.generation)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.size_bytes == 80
+
+    # Uma entrada maior que o limite não é guardada nem despeja as outras
+    cache.set("d", make_entry(101), cache.generation)
+    assert cache.get("d") is None
+    assert len(cache) == 2
+
+def test_write_clears_and_rejects_stale_entries(clock):
+    cache = CatalogCache(max_bytes=1000, ttl=60, clock=clock)
+    cache.set("a", make_entry(10), cache.generation)
+
+    # Leitura iniciada antes da escrita: a entrada montada com ela é recusada
+    generation = cache.generation
+    cache.on_saved([])
+    assert cache.get("a") is None
+    cache.set("a", make_entry(10), generation)
+    assert cache.get("a") is None
+
+    cache.set("a", make_entry(10, versao=2), cache.generation)
+    assert cache.get("a").versao == 2
+    cache.on_deleted([1])
+    assert len(cache) == 0
+    assert cache.size_bytes == 0
@@ -0,0 +1,72 @@
+from app.cache.criatura_cache import CriaturaCache
+from app.models.criatura import Criatura
+from app.schemas.criatura_schema import CriaturaResponse
+
+def make_response(id: int, nome: str) -> CriaturaResponse:
+    return CriaturaResponse(id=id, nome=nome, regiao="Norte", periculosidade=3, lenda="Protetor das florestas")
+
+def test_get_by_id_and_name(cache):
+    curupira = make_response(1, "Curupira")
+    cache.set(curupira, cache.generation)
+
+    assert cache.get(CriaturaCache.id_key(1)) == (True, curupira)
+    assert cache.get(CriaturaCache.name_key("Curupira")) == (True, curupira)
+    assert cache.get(CriaturaCache.id_key(2)) == (False, None)
+    assert cache.stats() == {"size": 2, "hits": 2, "misses": 1, "evictions": 0}
+
+def test_ttl_and_negative_ttl(cache, clock):
+    cache.set(make_response(1, "Curupira"), cache.generation)
+    cache.set_missing(CriaturaCache.name_key("Mapinguari"), cache.generation)
+
+    assert cache.get(CriaturaCache.name_key("Mapinguari")) == (True, None)
+
+    clock.now = 10
+    assert cache.get(CriaturaCache.name_key("Mapinguari")) == (False, None)
+    assert cache.get(CriaturaCache.id_key(1))[0] is True
+
+    clock.now = 61
+    assert cache.get(CriaturaCache.id_key(1)) == (False, None)
+
+def test_lru_eviction(cache):
+    for id, nome in [(1, "Curupira"), (2, "Iara")]:
+        cache.set(make_response(id, nome), cache.generation)
+
+    # Acessar o Curupira o torna o mais recente; a Iara é despejada primeiro
+    cache.get(CriaturaCache.id_key(1))
+    cache.get(CriaturaCache.name_key("Curupira"))
+    cache.set(make_response(3, "Cuca"), cache.generation)
+
+    assert len(cache) == 4
+    assert cache.get(CriaturaCache.id_key(2)) == (False, None)
+    assert cache.get(CriaturaCache.id_key(1))[0] is True
+    assert cache.evictions == 2
+
+def test_saved_invalidates_old_name_and_negative_entries(cache):
+    cache.set(make_response(1, "Curupira"), cache.generation)
+    cache.set_missing(CriaturaCache.name_key("Curupirão"), cache.generation)
+
+    # Renomeação pelo ID: o nome antigo e a entrada negativa do novo saem do cache
+    cache.on_saved([Criatura(id=1, nome="Curupirão", regiao="Norte", periculosidade=3, lenda="Lenda")])
+
+    assert cache.get(CriaturaCache.id_key(1)) == (False, None)
+    assert cache.get(CriaturaCache.name_key("Curupira")) == (False, None)
+    assert cache.get(CriaturaCache.name_key("Curupirão")) == (False, None)
+
+def test_deleted_invalidates_entries(cache):
+    cache.set(make_response(1, "Curupira"), cache.generation)
+
+    cache.on_deleted([1])
+
+    assert len(cache) == 0
+
+def test_stale_generation_is_discarded(cache):
+    """
+    Um resultado lido antes de uma escrita não deve ser guardado depois dela
+    """
+    generation = cache.generation
+    cache.on_deleted([1])
+
+    cache.set(make_response(1, "Curupira"), generation)
+    cache.set_missing(CriaturaCache.id_key(2), generation)
+
+    assert len(cache) == 0
@@ -0,0 +1,133 @@
+import random
+from datetime import datetime
+from sqlalchemy import text
+from app.cache.criatura_replica import CAMPOS_REPLICA, CriaturaRecord, CriaturaReplica, find_divergences
+from app.database.connection import DBConnectionHandler, create_engine, create_session_factory
+from app.database.schema import init_schema
+from app.exceptions.repository_exceptions import EntityNotFoundError
+from app.repositories.criatura_repository import CriaturaRepository
+from app.schemas.criatura_schema import CriaturaCreate, CriaturaFiltro, CriaturaUpdate, OrdenacaoEnum, RegiaoEnum
+import pytest
+import pytest_asyncio
+
+NOMES = ["Curupira", "Iara", "Saci-Pererê", "Boitatá", "Cuca", "Mula sem cabeça", "Boto", "Mapinguari", "Ípupiara", "Caipora"]
+
+@pytest_asyncio.fixture
+async def banco(tmp_path):
+    """
+    Banco SQLite com 60 criaturas e uma réplica carregada dele, registrada
+    como observadora do repositório
+    """
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    await init_schema(engine, "create_all")
+    replica = CriaturaReplica()
+    repository = CriaturaRepository(DBConnectionHandler(create_session_factory(engine)), observers=[replica])
+    aleatorio = random.Random(7)
+    await repository.bulk_insert([
+        CriaturaCreate(
+            nome=f"{NOMES[i % len(NOMES)]} {i // len(NOMES)}",
+            regiao=aleatorio.choice(list(RegiaoEnum)),
+            periculosidade=aleatorio.randint(1, 5),
+            lenda=f"Lenda antiga de número {i}"
+        )
+        for i in range(60)
+    ])
+    await replica.load(repository)
+    yield engine, repository, replica
+    await engine.dispose()
+
+def filtros():
+    for regiao in (None, RegiaoEnum.norte, RegiaoEnum.sul):
+        for minimo, maximo in ((None, None), (2, None), (None, 3), (2, 4)):
+            for ordenar in OrdenacaoEnum:
+                yield CriaturaFiltro(regiao=regiao, periculosidade_min=minimo, periculosidade_max=maximo, ordenar=ordenar)
+
+def cursor(row, filtro: CriaturaFiltro) -> list:
+    if filtro.campo_ordenacao == "id":
+        return [row[0]]
+    return [row[CAMPOS_REPLICA.index(filtro.campo_ordenacao)], row[0]]
+
+async def assert_same_as_database(repository, replica) -> None:
+    for filtro in filtros():
+        assert await replica.count(filtro) == await repository.count(filtro)
+        esperado = await repository.select_all_rows(CAMPOS_REPLICA, filtro=filtro)
+        assert await replica.select_all_rows(CAMPOS_REPLICA, filtro=filtro) == [tuple(row) for row in esperado]
+        # Paginação por cursor, página a página
+        after = None
+        while True:
+            pagina = await replica.select_all_rows(CAMPOS_REPLICA, filtro=filtro, limit=7, after=after)
+            assert pagina == [tuple(r) for r in await repository.select_all_rows(CAMPOS_REPLICA, filtro=filtro, limit=7, after=after)]
+            if len(pagina) < 7:
+                break
+            after = cursor(pagina[-1], filtro)
+    assert sorted(await replica.select_statistics()) == sorted(tuple(r) for r in await repository.select_statistics())
+    assert await find_divergences(replica, repository) == []
+
+@pytest.mark.asyncio
+async def test_replica_matches_database(banco):
+    engine, repository, replica = banco
+    assert len(replica) == 60
+    await assert_same_as_database(repository, replica)
+
+@pytest.mark.asyncio
+async def test_writes_are_applied_to_replica(banco):
+    engine, repository, replica = banco
+    await repository.insert(CriaturaCreate(nome="Anhangá", regiao="Norte", periculosidade=5, lenda="Veado branco de olhos de fogo"))
+    await repository.update_by_id(1, CriaturaUpdate(nome="Curupira renomeado", regiao="Sul", periculosidade=1))
+    await repository.update_by_name("Iara 0", CriaturaUpdate(lenda="Sereia que encanta os pescadores"))
+    await repository.delete_by_id(3)
+
+    await assert_same_as_database(repository, replica)
+    assert (await replica.select_by_name("Curupira renomeado")).id == 1
+    with pytest.raises(EntityNotFoundError):
+        await replica.select_by_name("Curupira 0")
+    with pytest.raises(EntityNotFoundError):
+        await replica.select_by_id(3)
+    assert [r.id for r in await replica.select_rows_by_ids([2, 3, 1], CAMPOS_REPLICA)] == [2, 1]
+    assert await replica.select_row_by_id(1, ("nome",)) == ("Curupira renomeado",)
+
+@pytest.mark.asyncio
+async def test_find_divergences_detects_external_writes(banco):
+    """
+    Escritas que não passaram pelo repositório deste processo aparecem na
+    conferência, e a recarga as incorpora
+    """
+    engine, repository, replica = banco
+    async with engine.begin() as conn:
+        await conn.execute(text("UPDATE criaturas SET periculosidade = 5 WHERE id = 4"))
+        await conn.execute(text("DELETE FROM criaturas WHERE id = 9"))
+
+    assert await find_divergences(replica, repository) == [4, 9]
+
+    await replica.load(repository)
+    assert await find_divergences(replica, repository) == []
+    assert len(replica) == 59
+
+def test_record_interns_region():
+    regiao = "".join(["Centro", "-Oeste"])
+    record = CriaturaRecord(1, "Cuca", regiao, 4, "Bruxa", 1, datetime(2024, 1, 1))
+    assert record.regiao is CriaturaRecord(2, "Saci", "Centro-Oeste", 2, "Travesso", 1, datetime(2024, 1, 1)).regiao
+    assert not hasattr(record, "__dict__")
+
+@pytest.mark.asyncio
+async def test_writes_during_load_are_replayed():
+    """
+    Uma escrita confirmada enquanto a réplica é recarregada não pode se perder
+    quando a carga (lida antes dela) substitui os índices
+    """
+    replica = CriaturaReplica()
+    antiga = CriaturaRecord(1, "Curupira", "Norte", 4, "Protetor", 1, datetime(2024, 1, 1))
+    nova = CriaturaRecord(1, "Curupira", "Norte", 5, "Protetor", 2, datetime(2024, 1, 2))
+
+    class Repositorio:
+        async def select_catalog_version(self):
+            return type("Versao", (), {"versao": 3})
+
+        async def stream_all_rows(self, campos):
+            # A escrita é confirmada no meio da leitura do banco
+            replica.on_saved([nova])
+            yield antiga.as_tuple()
+
+    assert await replica.load(Repositorio()) == 3
+    assert (await replica.select_by_id(1)).versao == 2
+    assert await replica.count(CriaturaFiltro(periculosidade_min=5)) == 1
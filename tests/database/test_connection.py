@@ -0,0 +1,69 @@
+from app.database.connection import DBConnectionHandler, create_engine, create_read_engine, create_session_factory, enable_wal, warm_up
+from sqlalchemy.exc import OperationalError
+from sqlalchemy import text
+import pytest
+
+@pytest.mark.asyncio
+async def test_handlers_share_engine_and_pool(tmp_path):
+    """
+    Dois handlers criados a partir da mesma fábrica devem usar a mesma engine,
+    sem construir um novo pool a cada requisição
+    """
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    session_factory = create_session_factory(engine)
+
+    first = DBConnectionHandler(session_factory)
+    second = DBConnectionHandler(session_factory)
+    assert first.get_engine() is second.get_engine() is engine
+
+    async with first as db:
+        response = await db.session.execute(text("SELECT 1"))
+        assert response.scalar_one() == 1
+    assert engine.pool.checkedout() == 0
+
+    await engine.dispose()
+
+def test_create_engine_pool_options(tmp_path):
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    assert engine.pool.size() == 5
+
+    memory_engine = create_engine("sqlite+aiosqlite://")
+    assert memory_engine.url.database is None
+
+@pytest.mark.asyncio
+async def test_read_engine_is_read_only(tmp_path):
+    """
+    O pool de leitura deve enxergar o que o primário gravou e recusar escritas,
+    tanto com 'mode=ro' na URI quanto só pelo 'PRAGMA query_only'
+    """
+    arquivo = tmp_path / "test.db"
+    engine = create_engine(f"sqlite+aiosqlite:///{arquivo}")
+    await enable_wal(engine)
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE t (x INTEGER)"))
+        await conn.execute(text("INSERT INTO t VALUES (1)"))
+
+    for url in (f"sqlite+aiosqlite:///file:{arquivo}?mode=ro&uri=true", f"sqlite+aiosqlite:///{arquivo}"):
+        read_engine = create_read_engine(url)
+        async with read_engine.connect() as conn:
+            response = await conn.execute(text("SELECT x FROM t"))
+            assert response.scalar_one() == 1
+            with pytest.raises(OperationalError):
+                await conn.execute(text("INSERT INTO t VALUES (2)"))
+        await read_engine.dispose()
+
+    async with engine.connect() as conn:
+        response = await conn.execute(text("PRAGMA journal_mode"))
+        assert response.scalar_one() == "wal"
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_warm_up_opens_pool_connections(tmp_path):
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    assert await warm_up(engine) == 5
+    assert (engine.pool.checkedin(), engine.pool.checkedout()) == (5, 0)
+    await engine.dispose()
+
+    memory_engine = create_engine("sqlite+aiosqlite://")
+    assert await warm_up(memory_engine) == 0
+    await memory_engine.dispose()
@@ -0,0 +1,214 @@
+from app.database.connection import create_engine
+from app.database.base import Base
+from app.database.schema import ALEMBIC_INI, init_schema, set_outbox_triggers
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect, text
+import pytest
+
+async def get_table_names(engine) -> list[str]:
+    async with engine.connect() as conn:
+        return await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["alembic", "create_all"])
+async def test_init_schema_creates_criaturas(tmp_path, mode):
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+
+    await init_schema(engine, mode)
+    # Uma segunda inicialização não deve falhar nem apagar a tabela
+    await init_schema(engine, mode)
+
+    assert "criaturas" in await get_table_names(engine)
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_init_schema_none_and_invalid_mode(tmp_path):
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+
+    await init_schema(engine, "none")
+    assert await get_table_names(engine) == []
+
+    with pytest.raises(ValueError):
+        await init_schema(engine, "desconhecido")
+    await engine.dispose()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["alembic", "create_all"])
+async def test_fts_index_follows_writes(tmp_path, mode):
+    """
+    As triggers devem manter o índice FTS5 sincronizado com inserts, updates
+    e deletes em 'criaturas'
+    """
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    await init_schema(engine, mode)
+
+    search = text("SELECT rowid FROM criaturas_fts WHERE criaturas_fts MATCH :termo")
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "INSERT INTO criaturas (nome, regiao, periculosidade, lenda) "
+            "VALUES ('Curupira', 'Norte', 4, 'Protetor das florestas amazônicas')"
+        ))
+        assert (await conn.execute(search, {"termo": "amazonicas"})).scalars().all() == [1]
+
+        await conn.execute(text("UPDATE criaturas SET lenda = 'Guardião do cerrado' WHERE id = 1"))
+        assert (await conn.execute(search, {"termo": "amazonicas"})).scalars().all() == []
+        assert (await conn.execute(search, {"termo": "cerrado"})).scalars().all() == [1]
+
+        await conn.execute(text("DELETE FROM criaturas WHERE id = 1"))
+        assert (await conn.execute(search, {"termo": "cerrado"})).scalars().all() == []
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_create_all_indexes_existing_rows(tmp_path):
+    """
+    Um banco criado antes do índice FTS5 deve ter as linhas existentes indexadas
+    na primeira inicialização
+    """
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(text(
+            "INSERT INTO criaturas (nome, regiao, periculosidade, lenda) "
+            "VALUES ('Iara', 'Norte', 3, 'Sereia que vive nos rios')"
+        ))
+
+    await init_schema(engine, "create_all")
+
+    async with engine.connect() as conn:
+        response = await conn.execute(text("SELECT rowid FROM criaturas_fts WHERE criaturas_fts MATCH 'sereia'"))
+        assert response.scalars().all() == [1]
+    await engine.dispose()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["alembic", "create_all"])
+async def test_catalog_version_follows_writes(tmp_path, mode):
+    """
+    Cada insert, update e delete em 'criaturas' deve incrementar a versão do
+    catálogo usada no ETag da listagem
+    """
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    await init_schema(engine, mode)
+
+    version = text("SELECT versao FROM criaturas_catalogo WHERE id = 1")
+    async with engine.begin() as conn:
+        assert (await conn.execute(version)).scalar_one() == 1
+        await conn.execute(text(
+            "INSERT INTO criaturas (nome, regiao, periculosidade, lenda) "
+            "VALUES ('Curupira', 'Norte', 4, 'Protetor das florestas')"
+        ))
+        assert (await conn.execute(version)).scalar_one() == 2
+        await conn.execute(text("UPDATE criaturas SET periculosidade = 5 WHERE id = 1"))
+        assert (await conn.execute(version)).scalar_one() == 3
+        await conn.execute(text("DELETE FROM criaturas WHERE id = 1"))
+        assert (await conn.execute(version)).scalar_one() == 4
+    await engine.dispose()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["alembic", "create_all"])
+async def test_statistics_follow_writes(tmp_path, mode):
+    """
+    As triggers devem manter as contagens por região e periculosidade em
+    inserts, updates que mudam a região ou o nível e deletes
+    """
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    await init_schema(engine, mode)
+
+    contagens = text("SELECT regiao, periculosidade, quantidade FROM criaturas_estatisticas WHERE quantidade > 0 ORDER BY 1, 2")
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "INSERT INTO criaturas (nome, regiao, periculosidade, lenda) VALUES "
+            "('Curupira', 'Norte', 4, 'Protetor das florestas'), ('Iara', 'Norte', 4, 'Sereia dos rios'), "
+            "('Saci', 'Sudeste', 2, 'Travesso de uma perna só')"
+        ))
+        assert (await conn.execute(contagens)).all() == [("Norte", 4, 2), ("Sudeste", 2, 1)]
+
+        await conn.execute(text("UPDATE criaturas SET lenda = 'Outra lenda' WHERE id = 1"))
+        await conn.execute(text("UPDATE criaturas SET regiao = 'Sul', periculosidade = 5 WHERE id = 2"))
+        assert (await conn.execute(contagens)).all() == [("Norte", 4, 1), ("Sudeste", 2, 1), ("Sul", 5, 1)]
+
+        await conn.execute(text("DELETE FROM criaturas WHERE id = 3"))
+        assert (await conn.execute(contagens)).all() == [("Norte", 4, 1), ("Sul", 5, 1)]
+    await engine.dispose()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["alembic", "create_all"])
+async def test_events_follow_writes(tmp_path, mode):
+    """
+    Com os eventos ligados, cada insert, update e delete em 'criaturas' deve
+    gravar um evento no outbox, na mesma transação, e um evento desfeito junto
+    com a escrita não deve ficar
+    """
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    await init_schema(engine, mode)
+    await set_outbox_triggers(engine, True)
+
+    eventos = text("SELECT id, tipo, criatura_id, nome, versao FROM criaturas_eventos ORDER BY id")
+    async with engine.begin() as conn:
+        await conn.execute(text(
+            "INSERT INTO criaturas (nome, regiao, periculosidade, lenda) VALUES ('Curupira', 'Norte', 4, 'Protetor das florestas')"
+        ))
+        await conn.execute(text("UPDATE criaturas SET versao = 2, nome = 'Caipora' WHERE id = 1"))
+        await conn.execute(text("DELETE FROM criaturas WHERE id = 1"))
+    async with engine.connect() as conn:
+        await conn.execute(text(
+            "INSERT INTO criaturas (nome, regiao, periculosidade, lenda) VALUES ('Iara', 'Norte', 3, 'Sereia dos rios')"
+        ))
+        await conn.rollback()
+        assert (await conn.execute(eventos)).all() == [
+            (1, "criada", 1, "Curupira", 1),
+            (2, "atualizada", 1, "Caipora", 2),
+            (3, "removida", 1, "Caipora", 2),
+        ]
+    await engine.dispose()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["alembic", "create_all"])
+async def test_events_disabled_by_default(tmp_path, mode):
+    """
+    Sem 'set_outbox_triggers', ou com ele desligado, as escritas não gravam
+    eventos; ao religar, o outbox recomeça e pula um ID, para que um
+    Last-Event-ID antigo receba um "reinicio"
+    """
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    await init_schema(engine, mode)
+    insert = "INSERT INTO criaturas (nome, regiao, periculosidade, lenda) VALUES ('{}', 'Norte', 4, 'Lenda')"
+    eventos = text("SELECT id, nome FROM criaturas_eventos ORDER BY id")
+
+    async with engine.begin() as conn:
+        await conn.execute(text(insert.format("Curupira")))
+        assert (await conn.execute(eventos)).all() == []
+    await set_outbox_triggers(engine, True)
+    async with engine.begin() as conn:
+        await conn.execute(text(insert.format("Iara")))
+    await set_outbox_triggers(engine, False)
+    async with engine.begin() as conn:
+        await conn.execute(text(insert.format("Saci")))
+        assert (await conn.execute(eventos)).all() == [(1, "Iara")]
+    await set_outbox_triggers(engine, True)
+    await set_outbox_triggers(engine, True)
+    async with engine.begin() as conn:
+        await conn.execute(text(insert.format("Boitatá")))
+        assert (await conn.execute(eventos)).all() == [(3, "Boitatá")]
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_enabling_events_without_outbox_table_fails(tmp_path):
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+
+    with pytest.raises(RuntimeError):
+        await set_outbox_triggers(engine, True)
+    await engine.dispose()
+
+def test_autogenerate_has_no_changes_after_migrations(tmp_path):
+    """
+    Depois das migrações, o autogenerate não deve propor mudanças: as tabelas
+    sem modelo (FTS, catálogo, estatísticas e eventos) ficam de fora
+    """
+    url = f"sqlite:///{tmp_path / 'test.db'}"
+    config = Config(str(ALEMBIC_INI))
+    config.attributes["database_url"] = url
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
+
+    command.check(config)
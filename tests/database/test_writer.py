@@ -0,0 +1,185 @@
+import asyncio
+from sqlalchemy import text
+from app.database.connection import DBConnectionHandler, create_engine, create_session_factory
+from app.database.schema import init_schema, set_outbox_triggers
+from app.database.writer import GroupCommitWriter, create_writer_engine
+from app.exceptions.repository_exceptions import EntityNotFoundError, RepositoryError
+from app.repositories.criatura_repository import CriaturaRepository
+from app.schemas.criatura_schema import CriaturaCreate, CriaturaUpdate
+import pytest
+
+LENDA = "Protetor das florestas e dos animais"
+
+async def start_writer(tmp_path, max_batch: int = 64, max_delay: float = 0.05):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'test.db'}"
+    engine = create_engine(url)
+    await init_schema(engine, "create_all")
+    writer = GroupCommitWriter(create_writer_engine(url), max_batch=max_batch, max_delay=max_delay)
+    await writer.start()
+    repository = CriaturaRepository(DBConnectionHandler(create_session_factory(engine)), writer=writer)
+    return engine, writer, repository
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_share_one_commit(tmp_path):
+    """
+    Escritas concorrentes devem ser gravadas em um único grupo, e um nome
+    duplicado deve falhar apenas para quem o enviou
+    """
+    engine, writer, repository = await start_writer(tmp_path)
+
+    nomes = ["Curupira", "Iara", "Saci", "Curupira", "Boto"]
+    resultados = await asyncio.gather(
+        *(repository.insert(CriaturaCreate(nome=nome, regiao="Norte", periculosidade=3, lenda=LENDA)) for nome in nomes),
+        return_exceptions=True
+    )
+
+    assert [r.nome for r in resultados if not isinstance(r, Exception)] == ["Curupira", "Iara", "Saci", "Boto"]
+    erro = resultados[3]
+    assert isinstance(erro, RepositoryError) and "Já existe" in str(erro)
+    assert (writer.groups, writer.operations) == (1, 5)
+
+    atualizada = await repository.update_by_name("Iara", CriaturaUpdate(periculosidade=5))
+    assert (atualizada.periculosidade, atualizada.versao) == (5, 2)
+    with pytest.raises(EntityNotFoundError):
+        await repository.delete_by_id(999)
+
+    await writer.stop()
+    async with engine.connect() as conn:
+        response = await conn.execute(text("SELECT nome, periculosidade FROM criaturas ORDER BY id"))
+        assert response.all() == [("Curupira", 3), ("Iara", 5), ("Saci", 3), ("Boto", 3)]
+    await engine.dispose()
+
+class Recorder:
+    def __init__(self):
+        self.saved = []
+
+    def on_saved(self, criaturas):
+        self.saved.extend((criatura.nome, criatura.versao) for criatura in criaturas)
+
+    def on_deleted(self, ids):
+        pass
+
+@pytest.mark.asyncio
+async def test_updates_of_the_same_row_in_one_group_see_each_other(tmp_path):
+    """
+    Duas atualizações da mesma linha no mesmo grupo, logo após o insert, devem
+    devolver (e notificar) cada uma a linha como ela gravou, e não o objeto
+    carregado pela operação anterior
+    """
+    engine, writer, _ = await start_writer(tmp_path)
+    recorder = Recorder()
+    repository = CriaturaRepository(
+        DBConnectionHandler(create_session_factory(engine)), observers=[recorder], writer=writer
+    )
+
+    criada, primeira, segunda = await asyncio.gather(
+        repository.insert(CriaturaCreate(nome="Curupira", regiao="Norte", periculosidade=3, lenda=LENDA)),
+        repository.update_by_name("Curupira", CriaturaUpdate(periculosidade=4)),
+        repository.update_by_name("Curupira", CriaturaUpdate(periculosidade=5))
+    )
+
+    assert writer.groups == 1
+    assert (criada.periculosidade, criada.versao) == (3, 1)
+    assert (primeira.periculosidade, primeira.versao) == (4, 2)
+    assert (segunda.periculosidade, segunda.versao) == (5, 3)
+    assert recorder.saved == [("Curupira", 1), ("Curupira", 2), ("Curupira", 3)]
+
+    await writer.stop()
+    async with engine.connect() as conn:
+        response = await conn.execute(text("SELECT periculosidade, versao FROM criaturas"))
+        assert response.all() == [(5, 3)]
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_still_notifies_observers(tmp_path):
+    """
+    Uma requisição cancelada depois de enfileirar a escrita não a desfaz: a
+    escrita é gravada e os observadores são notificados mesmo assim
+    """
+    engine, writer, _ = await start_writer(tmp_path, max_delay=0.2)
+    recorder = Recorder()
+    repository = CriaturaRepository(
+        DBConnectionHandler(create_session_factory(engine)), observers=[recorder], writer=writer
+    )
+
+    pendente = asyncio.create_task(
+        repository.insert(CriaturaCreate(nome="Curupira", regiao="Norte", periculosidade=3, lenda=LENDA))
+    )
+    await asyncio.sleep(0.01)
+    pendente.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await pendente
+    await writer.stop()
+
+    assert recorder.saved == [("Curupira", 1)]
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_pending_writes_fail_when_the_task_dies(tmp_path):
+    """
+    Se a tarefa do escritor terminar com escritas na fila, elas falham em vez
+    de esperar para sempre
+    """
+    engine, writer, repository = await start_writer(tmp_path, max_delay=1.0)
+
+    pendente = asyncio.create_task(
+        repository.insert(CriaturaCreate(nome="Curupira", regiao="Norte", periculosidade=3, lenda=LENDA))
+    )
+    await asyncio.sleep(0.01)
+    tarefa = next(task for task in asyncio.all_tasks() if task.get_name() == "group-commit-writer")
+    tarefa.cancel()
+
+    with pytest.raises(RuntimeError):
+        await asyncio.wait_for(pendente, 1)
+    await writer.stop()
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_groups_are_bounded_by_size(tmp_path):
+    engine, writer, repository = await start_writer(tmp_path, max_batch=2)
+
+    await asyncio.gather(*(
+        repository.insert(CriaturaCreate(nome=f"Criatura {i}", regiao="Sul", periculosidade=1, lenda=LENDA)) for i in range(5)
+    ))
+
+    assert (writer.groups, writer.operations) == (3, 5)
+    await writer.stop()
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_stop_writes_pending_operations(tmp_path):
+    """
+    O desligamento deve gravar o que já estava na fila, e escritas depois dele
+    devem ser recusadas
+    """
+    engine, writer, repository = await start_writer(tmp_path, max_delay=1.0)
+
+    pendente = asyncio.create_task(
+        repository.insert(CriaturaCreate(nome="Mula sem cabeça", regiao="Sudeste", periculosidade=4, lenda=LENDA))
+    )
+    await asyncio.sleep(0)
+    await writer.stop()
+
+    assert (await pendente).id == 1
+    with pytest.raises(RuntimeError):
+        await writer.submit(lambda session: None)
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_event_retention_goes_through_the_writer(tmp_path):
+    """
+    A retenção do outbox deve gravar pelo escritor, como as demais escritas, e
+    não disputar o lock do SQLite com ele
+    """
+    engine, writer, repository = await start_writer(tmp_path)
+    await set_outbox_triggers(engine, True)
+    await asyncio.gather(
+        *(repository.insert(CriaturaCreate(nome=nome, regiao="Norte", periculosidade=3, lenda=LENDA)) for nome in ("Curupira", "Iara", "Saci"))
+    )
+    operations = writer.operations
+
+    assert await repository.delete_events_up_to(2) == 2
+    assert writer.operations == operations + 1
+    assert tuple(await repository.select_event_bounds()) == (3, 3)
+    await writer.stop()
+    await engine.dispose()
@@ -0,0 +1,69 @@
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app.database.connection import DBConnectionHandler, create_engine, create_session_factory
+from app.metrics.instrumentation import (
+    DB_POOL_CHECKED_OUT,
+    DB_POOL_WAIT,
+    DB_QUERY_DURATION,
+    DB_QUERY_ERRORS,
+    HTTP_DURATION,
+    HTTP_REQUESTS,
+    UNMATCHED_ROUTE,
+    MetricsMiddleware,
+    instrument_engine,
+)
+import pytest
+
+@pytest.mark.asyncio
+async def test_middleware_labels_requests_by_route_template():
+    """
+    As requisições devem ser rotuladas pelo modelo da rota, não pelo caminho
+    concreto, e as que não casam com nenhuma rota devem cair em um único rótulo
+    """
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/itens/{id}")
+    async def get_item(id: int):
+        return {"id": id}
+
+    antes_ok = HTTP_REQUESTS.value("GET", "/itens/{id}", "200")
+    antes_404 = HTTP_REQUESTS.value("GET", UNMATCHED_ROUTE, "404")
+    antes_duracao = HTTP_DURATION.count("GET", "/itens/{id}")
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        await client.get("/itens/1")
+        await client.get("/itens/2")
+        await client.get("/inexistente")
+
+    assert HTTP_REQUESTS.value("GET", "/itens/{id}", "200") == antes_ok + 2
+    assert HTTP_REQUESTS.value("GET", UNMATCHED_ROUTE, "404") == antes_404 + 1
+    assert HTTP_DURATION.count("GET", "/itens/{id}") == antes_duracao + 2
+
+@pytest.mark.asyncio
+async def test_instrumented_engine_records_queries_and_pool(tmp_path):
+    """
+    A engine instrumentada deve medir cada consulta por operação, contar as que
+    falham, medir a espera pelo pool e expor as conexões em uso
+    """
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    instrument_engine(engine)
+    session_factory = create_session_factory(engine)
+    antes_select = DB_QUERY_DURATION.count("SELECT")
+    antes_erros = DB_QUERY_ERRORS.value("SELECT")
+    antes_espera = DB_POOL_WAIT.count()
+
+    async with DBConnectionHandler(session_factory) as db:
+        await db.session.execute(text("SELECT 1"))
+        assert "bestiario_db_pool_checked_out 1" in list(DB_POOL_CHECKED_OUT.samples())
+        with pytest.raises(OperationalError):
+            await db.session.execute(text("SELECT * FROM tabela_inexistente"))
+
+    assert DB_QUERY_DURATION.count("SELECT") == antes_select + 1
+    assert DB_QUERY_ERRORS.value("SELECT") == antes_erros + 1
+    assert DB_POOL_WAIT.count() == antes_espera + 1
+    assert list(DB_POOL_CHECKED_OUT.samples()) == ["bestiario_db_pool_checked_out 0"]
+
+    await engine.dispose()
@@ -0,0 +1,52 @@
+from app.metrics.registry import Registry
+import pytest
+
+def test_histogram_renders_cumulative_buckets():
+    """
+    Os buckets devem ser acumulados na coleta, com o '+Inf', a soma e a contagem
+    """
+    registry = Registry()
+    histogram = registry.histogram("latencia_seconds", "Latência.", ("route",), buckets=(0.1, 0.5))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.1, "/a")
+    histogram.observe(0.3, "/a")
+    histogram.observe(2.0, "/a")
+
+    linhas = registry.render().splitlines()
+
+    assert linhas[:2] == ["# HELP latencia_seconds Latência.", "# TYPE latencia_seconds histogram"]
+    assert 'latencia_seconds_bucket{route="/a",le="0.1"} 2' in linhas
+    assert 'latencia_seconds_bucket{route="/a",le="0.5"} 3' in linhas
+    assert 'latencia_seconds_bucket{route="/a",le="+Inf"} 4' in linhas
+    assert 'latencia_seconds_sum{route="/a"} 2.45' in linhas
+    assert 'latencia_seconds_count{route="/a"} 4' in linhas
+
+def test_counter_and_gauge_render_labels_and_functions():
+    """
+    Contadores devem escapar os valores dos rótulos e gauges com função devem
+    ser lidos no momento da coleta
+    """
+    registry = Registry()
+    counter = registry.counter("requisicoes_total", "Requisições.", ("route",))
+    counter.inc('/a"b')
+    counter.inc('/a"b', amount=2)
+    estado = {"valor": 1}
+    gauge = registry.gauge("em_uso", "Em uso.")
+    gauge.set_function(lambda: estado["valor"])
+    vazio = registry.gauge("sem_valor", "Sem valor.")
+    vazio.set_function(lambda: None)
+
+    estado["valor"] = 7
+    texto = registry.render()
+
+    assert 'requisicoes_total{route="/a\\"b"} 3' in texto
+    assert "em_uso 7\n" in texto
+    assert "# TYPE sem_valor gauge\n" in texto
+    assert not any(linha.startswith("sem_valor") for linha in texto.splitlines())
+
+def test_registry_rejects_duplicate_names():
+    registry = Registry()
+    registry.counter("duplicada_total", "Primeira.")
+
+    with pytest.raises(ValueError):
+        registry.counter("duplicada_total", "Segunda.")
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from app.database.connection import create_engine
+from app.database.writer import GroupCommitWriter, create_writer_engine
+from app.metrics.tracing import SQLTraceMiddleware, current_trace, instrument_tracing
+import pytest
+
+@pytest.mark.asyncio
+async def test_middleware_reports_queries_per_request(tmp_path):
+    """
+    Cada requisição deve reportar apenas as próprias consultas e o tempo gasto
+    nelas nos cabeçalhos 'X-DB-Queries' e 'X-DB-Time'
+    """
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    instrument_tracing(engine, slow_query_ms=10_000)
+    app = FastAPI()
+    app.add_middleware(SQLTraceMiddleware)
+
+    @app.get("/consultas/{quantidade}")
+    async def consultas(quantidade: int):
+        async with engine.connect() as conn:
+            for _ in range(quantidade):
+                await conn.execute(text("SELECT 1"))
+        return {"ok": True}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        tres = await client.get("/consultas/3")
+        nenhuma = await client.get("/consultas/0")
+
+    assert tres.headers["X-DB-Queries"] == "3"
+    assert float(tres.headers["X-DB-Time"]) > 0
+    assert nenhuma.headers["X-DB-Queries"] == "0"
+    assert nenhuma.headers["X-DB-Time"] == "0.000"
+    assert current_trace() is None
+
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_slow_query_is_logged_with_query_plan(tmp_path, caplog):
+    """
+    Consultas acima do limite devem ir para o log com o plano de execução, que
+    denuncia a varredura completa de um filtro sem índice
+    """
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE itens (id INTEGER PRIMARY KEY, descricao TEXT)"))
+    instrument_tracing(engine, slow_query_ms=0)
+
+    with caplog.at_level(logging.WARNING):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT id FROM itens WHERE descricao = :descricao"), {"descricao": "x"})
+
+    mensagens = [r.getMessage() for r in caplog.records if "Consulta lenta" in r.getMessage()]
+    assert len(mensagens) == 1
+    assert "WHERE descricao = ?" in mensagens[0]
+    assert "Plano de execução:\nSCAN itens" in mensagens[0]
+
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_writer_queries_count_for_the_request_that_sent_them(tmp_path):
+    """
+    As escritas feitas pelo escritor com commit em grupo, em outra tarefa,
+    devem entrar no rastro da requisição que as enviou, mesmo quando duas
+    requisições caem no mesmo grupo
+    """
+    url = f"sqlite+aiosqlite:///{tmp_path / 'test.db'}"
+    engine = create_engine(url)
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE itens (id INTEGER PRIMARY KEY, descricao TEXT)"))
+    writer_engine = create_writer_engine(url)
+    instrument_tracing(writer_engine, slow_query_ms=10_000)
+    writer = GroupCommitWriter(writer_engine, max_batch=64, max_delay=0.05)
+    await writer.start()
+    app = FastAPI()
+    app.add_middleware(SQLTraceMiddleware)
+
+    @app.post("/itens/{quantidade}")
+    async def inserir(quantidade: int):
+        async def operation(session):
+            for _ in range(quantidade):
+                await session.execute(text("INSERT INTO itens (descricao) VALUES ('x')"))
+
+        await writer.submit(operation)
+        return {"ok": True}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        um, tres = await asyncio.gather(client.post("/itens/1"), client.post("/itens/3"))
+
+    assert writer.groups == 1
+    assert (um.headers["X-DB-Queries"], tres.headers["X-DB-Queries"]) == ("1", "3")
+
+    await writer.stop()
+    await engine.dispose()
@@ -1,8 +1,10 @@
 from app.repositories.criatura_repository import CriaturaRepository
 from app.models.criatura import Criatura
-from app.schemas.criatura_schema import CriaturaCreate, CriaturaUpdate
-from app.exceptions.repository_exceptions import EntityNotFoundError
+from app.schemas.criatura_schema import CriaturaCreate, CriaturaFiltro, CriaturaUpdate
+from app.exceptions.repository_exceptions import EntityNotFoundError, VersionConflictError
 from tests.repositories.conftest import mock_db_connection
+from unittest.mock import AsyncMock, Mock
+from sqlalchemy.dialects import sqlite
 import pytest
 
 @pytest.mark.asyncio
@@ -77,18 +79,26 @@ async def test_select_by_id_and_name(mock_db_connection):
 
 @pytest.mark.asyncio
 async def test_update_by_id_and_name(mock_db_connection):
+    """
+    O update é um único UPDATE ... RETURNING, sem SELECT prévio nem refresh
+    """
     mock_conn, mock_session, mock_result, _ = mock_db_connection
     repo = CriaturaRepository(mock_conn)
 
-    criatura = Criatura(id=1, nome="Curupira", regiao="Norte", periculosidade=4, lenda="Lenda")
+    criatura = Criatura(id=1, nome="Curupira", regiao="Norte", periculosidade=5, lenda="Lenda", versao=2)
     mock_result.scalar_one_or_none.return_value = criatura
 
     update_data = CriaturaUpdate(periculosidade=5)
 
     updated = await repo.update_by_id(1, update_data)
     assert updated.periculosidade == 5
+    mock_session.execute.assert_awaited_once()
+    query = mock_session.execute.await_args.args[0]
+    sql = str(query.compile(dialect=sqlite.dialect()))
+    assert sql.startswith("UPDATE criaturas SET") and "RETURNING" in sql
+    assert "versao=(criaturas.versao + ?)" in sql
     mock_session.commit.assert_called()
-    mock_session.refresh.assert_called()
+    mock_session.refresh.assert_not_called()
 
     updated = await repo.update_by_name("Curupira", update_data)
     assert updated.periculosidade == 5
@@ -98,22 +108,346 @@ async def test_update_by_id_and_name(mock_db_connection):
     with pytest.raises(EntityNotFoundError):
         await repo.update_by_id(999, update_data)
 
+@pytest.mark.asyncio
+async def test_update_version_conflict(mock_db_connection):
+    """
+    Com a versão esperada no WHERE, nenhuma linha afetada por uma criatura
+    existente é um conflito de versão e nada é commitado
+    """
+    mock_conn, mock_session, mock_result, _ = mock_db_connection
+    repo = CriaturaRepository(mock_conn)
+
+    # O UPDATE não afeta linhas e a consulta seguinte encontra a versão 3
+    mock_result.scalar_one_or_none.side_effect = [None, 3]
+
+    with pytest.raises(VersionConflictError):
+        await repo.update_by_id(1, CriaturaUpdate(periculosidade=5), versao=2)
+    query = mock_session.execute.await_args_list[0].args[0]
+    assert "criaturas.versao = ?" in str(query.compile(dialect=sqlite.dialect()))
+    mock_session.commit.assert_not_called()
+
+    mock_result.scalar_one_or_none.side_effect = [None, None]
+    with pytest.raises(EntityNotFoundError):
+        await repo.update_by_id(1, CriaturaUpdate(periculosidade=5), versao=2)
 
 @pytest.mark.asyncio
 async def test_delete_by_id_and_name(mock_db_connection):
     mock_conn, mock_session, mock_result, _ = mock_db_connection
     repo = CriaturaRepository(mock_conn)
 
-    criatura = Criatura(id=1, nome="Curupira", regiao="Norte", periculosidade=4, lenda="Lenda")
-    mock_result.scalar_one_or_none.return_value = criatura
+    mock_result.scalar_one_or_none.return_value = 1
 
     await repo.delete_by_id(1)
-    mock_session.delete.assert_called_with(criatura)
+    query = mock_session.execute.await_args.args[0]
+    assert str(query.compile(dialect=sqlite.dialect())).startswith("DELETE FROM criaturas")
+    mock_session.delete.assert_not_called()
     mock_session.commit.assert_called()
 
     await repo.delete_by_name("Curupira")
-    mock_session.delete.assert_called()
+    assert mock_session.execute.await_count == 2
 
     mock_result.scalar_one_or_none.return_value = None
     with pytest.raises(EntityNotFoundError):
         await repo.delete_by_id(999)
+
+@pytest.mark.asyncio
+async def test_select_all_keyset_page(mock_db_connection):
+    """
+    Testando que a paginação filtra pelo ID do cursor e limita o resultado
+    na própria consulta SQL
+    """
+    mock_conn, mock_session, _, mock_scalars = mock_db_connection
+    repo = CriaturaRepository(mock_conn)
+
+    mock_scalars.all.return_value = [Criatura(id=11, nome="Iara", regiao="Norte", periculosidade=3, lenda="Lenda")]
+
+    response = await repo.select_all(limit=10, after=[10])
+
+    assert response[0].id == 11
+    query = mock_session.execute.await_args.args[0]
+    compiled = query.compile(compile_kwargs={"literal_binds": True})
+    assert "criaturas.id > 10" in str(compiled)
+    assert "LIMIT 10" in str(compiled)
+
+@pytest.mark.asyncio
+async def test_select_all_rows(mock_db_connection):
+    """
+    O caminho por tuplas seleciona apenas as colunas pedidas, na ordem pedida,
+    com os mesmos filtros e cursor da listagem pelo ORM
+    """
+    mock_conn, mock_session, mock_result, _ = mock_db_connection
+    repo = CriaturaRepository(mock_conn)
+
+    mock_result.all.return_value = [("Iara", 11)]
+
+    response = await repo.select_all_rows(["nome", "id"], limit=10, after=[10])
+
+    assert response == [("Iara", 11)]
+    query = mock_session.execute.await_args.args[0]
+    compiled = str(query.compile(compile_kwargs={"literal_binds": True}))
+    assert compiled.startswith("SELECT criaturas.nome, criaturas.id")
+    assert "criaturas.id > 10" in compiled
+    assert "LIMIT 10" in compiled
+
+@pytest.mark.asyncio
+async def test_select_row_by_id(mock_db_connection):
+    mock_conn, mock_session, mock_result, _ = mock_db_connection
+    repo = CriaturaRepository(mock_conn)
+
+    mock_result.one_or_none.return_value = ("Curupira", 1)
+
+    assert await repo.select_row_by_id(1, ["nome", "id"]) == ("Curupira", 1)
+    query = mock_session.execute.await_args.args[0]
+    # A lenda não é lida quando não foi pedida
+    assert str(query).startswith("SELECT criaturas.nome, criaturas.id \nFROM criaturas")
+
+    mock_result.one_or_none.return_value = None
+    with pytest.raises(EntityNotFoundError):
+        await repo.select_row_by_name("Mapinguari", ["nome"])
+
+@pytest.mark.asyncio
+async def test_select_rows_by_ids_chunks_in_query(mock_db_connection, monkeypatch):
+    """
+    As chaves devem ser buscadas com 'IN', em blocos de 'IN_CHUNK_SIZE', todos
+    na mesma sessão
+    """
+    monkeypatch.setattr("app.repositories.criatura_repository.IN_CHUNK_SIZE", 2)
+    mock_conn, mock_session, mock_result, _ = mock_db_connection
+    repo = CriaturaRepository(mock_conn)
+    mock_result.all.side_effect = [[(1, "Curupira"), (2, "Iara")], [(5, "Saci")]]
+
+    rows = await repo.select_rows_by_ids([1, 2, 5], ["id", "nome"])
+
+    assert rows == [(1, "Curupira"), (2, "Iara"), (5, "Saci")]
+    queries = [call.args[0] for call in mock_session.execute.await_args_list]
+    assert len(queries) == 2
+    compiled = [q.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}) for q in queries]
+    assert "WHERE criaturas.id IN (1, 2)" in str(compiled[0])
+    assert "WHERE criaturas.id IN (5)" in str(compiled[1])
+    mock_conn.__aenter__.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_select_statistics_reads_summary_table(mock_db_connection):
+    mock_conn, mock_session, mock_result, _ = mock_db_connection
+    repo = CriaturaRepository(mock_conn)
+    mock_result.all.return_value = [("Norte", 4, 2)]
+
+    assert await repo.select_statistics() == [("Norte", 4, 2)]
+    # A leitura vem da tabela de resumo, nunca de um GROUP BY em 'criaturas'
+    query = str(mock_session.execute.await_args.args[0])
+    assert "FROM criaturas_estatisticas" in query
+    assert "GROUP BY" not in query
+
+@pytest.mark.asyncio
+async def test_rebuild_statistics(mock_db_connection):
+    mock_conn, mock_session, mock_result, _ = mock_db_connection
+    repo = CriaturaRepository(mock_conn)
+    mock_result.scalar_one.return_value = 3
+
+    assert await repo.rebuild_statistics() == 3
+    statements = [str(call.args[0]) for call in mock_session.execute.await_args_list]
+    assert statements[0] == "DELETE FROM criaturas_estatisticas"
+    assert "GROUP BY regiao, periculosidade" in statements[1]
+    mock_session.commit.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_select_events_after_reads_outbox_from_primary(mock_db_connection):
+    mock_conn, mock_session, mock_result, _ = mock_db_connection
+    read_conn = AsyncMock()
+    repo = CriaturaRepository(mock_conn, read_connection_handler=read_conn)
+    mock_result.all.return_value = [(8, "criada", 1, "Curupira", 1, None)]
+
+    assert await repo.select_events_after(7, 500) == [(8, "criada", 1, "Curupira", 1, None)]
+    query, params = mock_session.execute.await_args.args
+    assert "FROM criaturas_eventos" in str(query)
+    assert params == {"after": 7, "limit": 500}
+    read_conn.__aenter__.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_delete_events_up_to(mock_db_connection):
+    mock_conn, mock_session, mock_result, _ = mock_db_connection
+    repo = CriaturaRepository(mock_conn)
+    mock_result.rowcount = 3
+
+    assert await repo.delete_events_up_to(10) == 3
+    query, params = mock_session.execute.await_args.args
+    assert str(query) == "DELETE FROM criaturas_eventos WHERE id <= :id"
+    assert params == {"id": 10}
+    mock_session.commit.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_stream_all(mock_db_connection):
+    """
+    Testando que o streaming entrega as criaturas conforme são lidas do cursor
+    """
+    mock_conn, mock_session, _, _ = mock_db_connection
+    repo = CriaturaRepository(mock_conn)
+
+    criaturas = [
+        Criatura(id=1, nome="Curupira", regiao="Norte", periculosidade=4, lenda="Lenda"),
+        Criatura(id=2, nome="Iara", regiao="Norte", periculosidade=3, lenda="Lenda")
+    ]
+
+    async def stream():
+        for criatura in criaturas:
+            yield criatura
+
+    mock_session.stream_scalars.return_value = stream()
+
+    response = [criatura async for criatura in repo.stream_all()]
+
+    assert [c.nome for c in response] == ["Curupira", "Iara"]
+    query = mock_session.stream_scalars.await_args.args[0]
+    assert query.get_execution_options()["yield_per"] > 0
+
+@pytest.mark.asyncio
+async def test_select_all_filtered_and_sorted(mock_db_connection):
+    """
+    Testando os filtros por região e periculosidade e o cursor composto
+    (valor do campo de ordenação, ID) usado quando a ordenação não é pelo ID
+    """
+    mock_conn, mock_session, _, _ = mock_db_connection
+    repo = CriaturaRepository(mock_conn)
+
+    filtro = CriaturaFiltro(regiao="Norte", periculosidade_min=2, periculosidade_max=4, ordenar="-periculosidade")
+    await repo.select_all(filtro=filtro, limit=5, after=[4, 7])
+
+    query = mock_session.execute.await_args.args[0]
+    compiled = str(query.compile(compile_kwargs={"literal_binds": True}))
+    assert "criaturas.regiao = 'Norte'" in compiled
+    assert "criaturas.periculosidade >= 2" in compiled
+    assert "criaturas.periculosidade <= 4" in compiled
+    assert "(criaturas.periculosidade, criaturas.id) < (4, 7)" in compiled
+    assert "ORDER BY criaturas.periculosidade DESC, criaturas.id DESC" in compiled
+
+@pytest.mark.asyncio
+async def test_count(mock_db_connection):
+    mock_conn, mock_session, mock_result, _ = mock_db_connection
+    repo = CriaturaRepository(mock_conn)
+
+    mock_result.scalar_one.return_value = 3
+
+    response = await repo.count(CriaturaFiltro(regiao="Sul"))
+
+    assert response == 3
+    query = mock_session.execute.await_args.args[0]
+    compiled = str(query.compile(compile_kwargs={"literal_binds": True}))
+    assert "count(*)" in compiled
+    assert "criaturas.regiao = 'Sul'" in compiled
+
+@pytest.mark.asyncio
+async def test_search(mock_db_connection):
+    """
+    Testando que o texto digitado vira uma consulta FTS5 com aspas e prefixo,
+    sem repassar a sintaxe do FTS5 digitada pelo usuário
+    """
+    mock_conn, mock_session, mock_result, _ = mock_db_connection
+    repo = CriaturaRepository(mock_conn)
+
+    mock_result.all.return_value = []
+
+    await repo.search('flor "rio', 10)
+
+    query, params = mock_session.execute.await_args.args
+    assert "MATCH :termo" in str(query)
+    assert params == {"termo": '"flor"* """rio"*', "limit": 10}
+
+    # Texto sem palavras não chega ao banco
+    mock_session.execute.reset_mock()
+    assert await repo.search("   ", 10) == []
+    mock_session.execute.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_observers_notified_after_commit(mock_db_connection):
+    """
+    Os observadores (como o cache) devem ser avisados das criaturas gravadas e
+    removidas depois do commit
+    """
+    mock_conn, _, mock_result, _ = mock_db_connection
+    observer = Mock()
+    repo = CriaturaRepository(mock_conn, observers=[observer])
+
+    data = CriaturaCreate(nome="Curupira", regiao="Norte", periculosidade=4, lenda="Protetor das florestas.")
+    inserted = await repo.insert(data)
+    observer.on_saved.assert_called_once_with([inserted])
+
+    mock_result.scalar_one_or_none.return_value = 1
+    await repo.delete_by_name("Curupira")
+    observer.on_deleted.assert_called_once_with([1])
+
+    # Falhas não notificam
+    observer.reset_mock()
+    mock_result.scalar_one_or_none.return_value = None
+    with pytest.raises(EntityNotFoundError):
+        await repo.update_by_id(1, CriaturaUpdate(periculosidade=5))
+    observer.on_saved.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_primary_version_skips_read_connection(mock_db_connection):
+    """
+    A versão conferida no If-Match deve vir do primário, nunca do handler de
+    leitura, que pode estar atrasado
+    """
+    mock_conn, mock_session, mock_result, _ = mock_db_connection
+    read_conn = Mock()
+    read_conn.__aenter__ = AsyncMock(return_value=read_conn)
+    read_conn.__aexit__ = AsyncMock(return_value=None)
+    repo = CriaturaRepository(mock_conn, read_connection_handler=read_conn)
+    mock_result.one_or_none.return_value = (1, 3, None)
+
+    assert await repo.select_version_by_id(1, primary=True) == (1, 3, None)
+    assert await repo.select_version_by_name("Curupira", primary=True) == (1, 3, None)
+    assert mock_session.execute.await_count == 2
+    read_conn.__aenter__.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_reads_use_read_connection(mock_db_connection):
+    """
+    Com um handler de leitura, as consultas devem ir para ele e as escritas
+    continuar no primário
+    """
+    mock_conn, mock_session, mock_result, _ = mock_db_connection
+    read_conn = Mock()
+    read_conn.__aenter__ = AsyncMock(return_value=read_conn)
+    read_conn.__aexit__ = AsyncMock(return_value=None)
+    read_conn.session.execute = AsyncMock(return_value=mock_result)
+    repo = CriaturaRepository(mock_conn, read_connection_handler=read_conn)
+
+    mock_result.scalar_one_or_none.return_value = Criatura(id=1, nome="Curupira", regiao="Norte", periculosidade=4, lenda="Lenda")
+    await repo.select_by_id(1)
+    await repo.count()
+    assert read_conn.session.execute.await_count == 2
+    mock_session.execute.assert_not_called()
+
+    await repo.delete_by_id(1)
+    mock_session.execute.assert_called_once()
+    mock_session.commit.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_bulk_insert(mock_db_connection):
+    """
+    Nomes repetidos no lote são enviados uma única vez e os que já existem no
+    banco (não retornados pelo RETURNING) ficam como None
+    """
+    mock_conn, mock_session, _, _ = mock_db_connection
+    observer = Mock()
+    repo = CriaturaRepository(mock_conn, observers=[observer])
+
+    lenda = "Protetor das florestas e dos animais"
+    data = [
+        CriaturaCreate(nome="Curupira", regiao="Norte", periculosidade=4, lenda=lenda),
+        CriaturaCreate(nome="Iara", regiao="Norte", periculosidade=3, lenda=lenda),
+        CriaturaCreate(nome="Curupira", regiao="Sul", periculosidade=2, lenda=lenda),
+    ]
+    inserida = Mock(id=1)
+    inserida.nome = "Curupira"
+    mock_session.execute.return_value = [inserida]
+
+    response = await repo.bulk_insert(data)
+
+    assert response == [inserida, None, None]
+    query, values = mock_session.execute.await_args.args
+    assert "ON CONFLICT" in str(query.compile(dialect=sqlite.dialect()))
+    assert [v["nome"] for v in values] == ["Curupira", "Iara"]
+    mock_session.commit.assert_awaited_once()
+    observer.on_saved.assert_called_once_with([inserida])
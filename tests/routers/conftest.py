@@ -1,8 +1,12 @@
-from unittest.mock import AsyncMock
+from contextlib import AsyncExitStack
+from datetime import datetime
+from unittest.mock import AsyncMock, Mock
 from httpx import AsyncClient, ASGITransport
+from app.cache.catalog_cache import CatalogCache
 from app.routers.routes.criatura_routes import router
 from app.routers.api.api import create_app
-from app.routers.api.dependencies import get_criatura_service
+from app.routers.api.dependencies import get_catalog_cache, get_criatura_service, get_event_broadcaster
+from app.routers.api.serialization import CAMPOS_CRIATURA
 import pytest_asyncio
 
 @pytest_asyncio.fixture
@@ -12,7 +16,9 @@ def criatura():
         "nome": "Curupira",
         "regiao": "Norte",
         "periculosidade": 4,
-        "lenda": "Protetor das florestas"
+        "lenda": "Protetor das florestas",
+        "versao": 1,
+        "atualizado_em": "2024-01-01T12:00:00"
     }
 
 @pytest_asyncio.fixture
@@ -22,14 +28,43 @@ def criatura_update():
         "nome": "Curupira",
         "regiao": "Norte",
         "periculosidade": 4,
-        "lenda": "Protetor das florestas, atualizado"
+        "lenda": "Protetor das florestas, atualizado",
+        "versao": 2,
+        "atualizado_em": "2024-01-02T12:00:00"
     }
 
 @pytest_asyncio.fixture
 def mock_service(criatura, criatura_update):
     service = AsyncMock()
     service.create_criatura.return_value = criatura
-    service.get_all_criaturas.return_value = [criatura]
+    # A listagem recebe as linhas como tuplas, na ordem de 'CAMPOS_CRIATURA'
+    row = tuple(criatura[campo] for campo in CAMPOS_CRIATURA)
+    service.get_all_criaturas_rows.return_value = [row]
+    service.get_criaturas_page_rows.return_value = ([row], "cursor-da-proxima-pagina")
+    service.count_criaturas.return_value = 42
+    service.create_criaturas_bulk.return_value = {
+        "criadas": 1,
+        "conflitos": 0,
+        "invalidas": 0,
+        "resultados": [{"indice": 0, "status": "criada", "id": 1, "nome": "Curupira"}]
+    }
+    service.search_criaturas.return_value = [{
+        "id": 1,
+        "nome": "Curupira",
+        "regiao": "Norte",
+        "periculosidade": 4,
+        "trecho": "Protetor das <mark>florestas</mark>",
+        "relevancia": -1.5
+    }]
+
+    async def stream_criaturas_rows():
+        yield row
+
+    # 'stream_criaturas_rows' é síncrono e retorna um iterador assíncrono
+    service.stream_criaturas_rows = Mock(side_effect=lambda campos, filtro=None, after=None: stream_criaturas_rows())
+    service.get_versao_catalogo.return_value = (7, datetime(2024, 1, 1, 12, 0, 0))
+    service.get_versao_criatura_by_id.return_value = (1, 1, datetime(2024, 1, 1, 12, 0, 0))
+    service.get_versao_criatura_by_name.return_value = (1, 1, datetime(2024, 1, 1, 12, 0, 0))
     service.get_criatura_by_id.return_value = criatura
     service.get_criatura_by_name.return_value = criatura
     service.update_criatura_by_id.return_value = criatura_update
@@ -39,10 +74,38 @@ def mock_service(criatura, criatura_update):
     return service
 
 @pytest_asyncio.fixture
-async def client(mock_service):
-    app = create_app()
-    app.include_router(router)
-    app.dependency_overrides[get_criatura_service] = lambda: mock_service
-    transport = ASGITransport(app=app)
-    async with AsyncClient(transport=transport, base_url="http://test") as ac:
-        yield ac
\ No newline at end of file
+async def make_client(mock_service):
+    """
+    Fábrica de clientes da API com o serviço simulado. O cache materializado
+    e o broadcaster de eventos ficam desligados, salvo os informados
+    """
+    async with AsyncExitStack() as stack:
+        async def make(catalog_cache=None, broadcaster=None) -> AsyncClient:
+            app = create_app()
+            app.include_router(router)
+            app.dependency_overrides[get_criatura_service] = lambda: mock_service
+            app.dependency_overrides[get_catalog_cache] = lambda: catalog_cache
+            app.dependency_overrides[get_event_broadcaster] = lambda: broadcaster
+            transport = ASGITransport(app=app)
+            return await stack.enter_async_context(AsyncClient(transport=transport, base_url="http://test"))
+
+        yield make
+
+@pytest_asyncio.fixture
+async def client(make_client):
+    return await make_client()
+
+@pytest_asyncio.fixture
+def catalog_cache():
+    return CatalogCache(max_bytes=1024 * 1024, ttl=60)
+
+@pytest_asyncio.fixture
+def broadcaster():
+    broadcaster = Mock()
+
+    async def listen(after, heartbeat):
+        yield b"retry: 3000\n\n"
+        yield b'id: 8\nevent: criada\ndata: {"id": 1, "nome": "Curupira"}\n\n'
+
+    broadcaster.listen = Mock(side_effect=listen)
+    return broadcaster
@@ -0,0 +1,52 @@
+import time
+from fastapi import FastAPI, Request
+from httpx import ASGITransport, AsyncClient
+from app.routers.api.consistency import PRIMARY_COOKIE, ReadYourWritesMiddleware, reads_from_primary
+import pytest
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware, sticky_seconds=5)
+
+    @app.get("/leitura")
+    async def leitura(request: Request):
+        return {"primario": reads_from_primary(request)}
+
+    @app.post("/escrita")
+    async def escrita():
+        return {"ok": True}
+
+    @app.post("/falha", status_code=400)
+    async def falha():
+        return {"ok": False}
+
+    return app
+
+@pytest.mark.asyncio
+async def test_write_makes_client_read_from_primary():
+    """
+    Depois de uma escrita bem-sucedida, o mesmo cliente deve ler do primário;
+    escritas com erro e outros clientes não são afetados
+    """
+    async with AsyncClient(transport=ASGITransport(app=build_app()), base_url="http://test") as client:
+        assert (await client.get("/leitura")).json() == {"primario": False}
+
+        falha = await client.post("/falha")
+        assert "set-cookie" not in falha.headers
+        assert (await client.get("/leitura")).json() == {"primario": False}
+
+        escrita = await client.post("/escrita")
+        assert escrita.headers["set-cookie"].startswith(f"{PRIMARY_COOKIE}=")
+        assert "Max-Age=5" in escrita.headers["set-cookie"]
+        assert (await client.get("/leitura")).json() == {"primario": True}
+
+    async with AsyncClient(transport=ASGITransport(app=build_app()), base_url="http://test") as outro:
+        assert (await outro.get("/leitura")).json() == {"primario": False}
+
+@pytest.mark.asyncio
+async def test_expired_or_invalid_cookie_reads_from_replica():
+    async with AsyncClient(transport=ASGITransport(app=build_app()), base_url="http://test") as client:
+        client.cookies.set(PRIMARY_COOKIE, str(int(time.time()) - 1))
+        assert (await client.get("/leitura")).json() == {"primario": False}
+        client.cookies.set(PRIMARY_COOKIE, "abc")
+        assert (await client.get("/leitura")).json() == {"primario": False}
@@ -1,4 +1,11 @@
-from app.schemas.criatura_schema import CriaturaUpdate
+from app.schemas.criatura_schema import CriaturaFiltro, CriaturaUpdate
+from app.exceptions.repository_exceptions import VersionConflictError
+from app.routers.api.consistency import PRIMARY_COOKIE
+from app.routers.api.serialization import CAMPOS_CRIATURA
+from app.exceptions.service_exceptions import AutocompleteDisabledError, InvalidCursorError
+import json
+import time
+from datetime import datetime
 import pytest
 
 @pytest.mark.asyncio
@@ -11,13 +18,13 @@ async def test_create_criatura(client, mock_service, criatura):
     mock_service.create_criatura.assert_awaited_once()
 
 @pytest.mark.asyncio
-async def test_get_all_criaturas(client, mock_service):
+async def test_get_all_criaturas(client, mock_service, criatura):
     response = await client.get("/criaturas/")
     assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
     data = response.json()
-    assert len(data) == 1
-    assert data[0]["nome"] == "Curupira"
-    mock_service.get_all_criaturas.assert_awaited_once()
+    assert data == [criatura]
+    mock_service.get_all_criaturas_rows.assert_awaited_once()
 
 @pytest.mark.asyncio
 async def test_get_criatura_by_id_and_name(client, mock_service, criatura):
@@ -67,3 +74,299 @@ async def test_delete_criatura_by_id_and_name(client, mock_service, criatura):
     response = await client.delete(f"/criaturas/nome/{criatura['nome']}")
     assert response.status_code == 204
     mock_service.delete_criatura_by_name.assert_awaited_once_with(criatura["nome"])
+
+@pytest.mark.asyncio
+async def test_get_criaturas_page(client, mock_service):
+    response = await client.get("/criaturas/", params={"limit": 1, "after": "cursor-anterior"})
+    assert response.status_code == 200
+    assert response.json()[0]["nome"] == "Curupira"
+    assert response.headers["X-Next-Cursor"] == "cursor-da-proxima-pagina"
+    assert response.headers["X-Total-Count"] == "42"
+    mock_service.get_criaturas_page_rows.assert_awaited_once_with(CAMPOS_CRIATURA, CriaturaFiltro(), 1, "cursor-anterior")
+    mock_service.get_all_criaturas_rows.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_get_criaturas_filtered(client, mock_service):
+    response = await client.get("/criaturas/", params={
+        "regiao": "Norte",
+        "periculosidade_min": 3,
+        "periculosidade_max": 5,
+        "ordenar": "-nome"
+    })
+    assert response.status_code == 200
+    # Sem paginação, o total é o próprio tamanho da lista e não exige COUNT
+    assert response.headers["X-Total-Count"] == "1"
+    mock_service.count_criaturas.assert_not_awaited()
+    _, filtro, limit, after = mock_service.get_criaturas_page_rows.await_args.args
+    assert filtro == CriaturaFiltro(regiao="Norte", periculosidade_min=3, periculosidade_max=5, ordenar="-nome")
+    assert limit is None and after is None
+
+    response = await client.get("/criaturas/", params={"regiao": "Atlântida"})
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_get_criaturas_page_invalid_cursor(client, mock_service):
+    mock_service.get_criaturas_page_rows.side_effect = InvalidCursorError()
+    response = await client.get("/criaturas/", params={"after": "invalido"})
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_get_criaturas_ndjson(client, mock_service, criatura):
+    response = await client.get("/criaturas/", headers={"Accept": "application/x-ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.text.splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["nome"] == criatura["nome"]
+    mock_service.stream_criaturas_rows.assert_called_once_with(CAMPOS_CRIATURA, CriaturaFiltro(), None)
+
+@pytest.mark.asyncio
+async def test_search_criaturas(client, mock_service):
+    response = await client.get("/criaturas/busca", params={"q": "floresta", "limit": 5})
+    assert response.status_code == 200
+    assert response.json()[0]["trecho"] == "Protetor das <mark>florestas</mark>"
+    mock_service.search_criaturas.assert_awaited_once_with("floresta", 5)
+
+    response = await client.get("/criaturas/busca", params={"q": "a"})
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_get_criatura_conditional(client, mock_service, criatura):
+    response = await client.get(f"/criaturas/id/{criatura['id']}")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert response.headers["Last-Modified"] == "Mon, 01 Jan 2024 12:00:00 GMT"
+
+    # Com o ETag atual, apenas a versão é consultada
+    mock_service.get_criatura_by_id.reset_mock()
+    response = await client.get(f"/criaturas/id/{criatura['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    mock_service.get_versao_criatura_by_id.assert_awaited_once_with(criatura["id"])
+    mock_service.get_criatura_by_id.assert_not_awaited()
+
+    response = await client.get(f"/criaturas/nome/{criatura['nome']}", headers={"If-Modified-Since": "Mon, 01 Jan 2024 12:00:00 GMT"})
+    assert response.status_code == 304
+
+    response = await client.get(f"/criaturas/id/{criatura['id']}", headers={"If-None-Match": '"desatualizado"'})
+    assert response.status_code == 200
+    mock_service.get_criatura_by_id.assert_awaited_once_with(criatura["id"])
+
+@pytest.mark.asyncio
+async def test_get_criaturas_conditional(client, mock_service):
+    response = await client.get("/criaturas/")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    mock_service.get_all_criaturas_rows.reset_mock()
+    response = await client.get("/criaturas/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    mock_service.get_all_criaturas_rows.assert_not_awaited()
+
+    # Outra query string gera outro corpo, então o ETag não pode ser o mesmo
+    response = await client.get("/criaturas/", params={"limit": 1}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+@pytest.mark.asyncio
+async def test_update_criatura_if_match(client, mock_service, criatura, criatura_update):
+    etag = (await client.get(f"/criaturas/id/{criatura['id']}")).headers["ETag"]
+
+    response = await client.put(f"/criaturas/id/{criatura['id']}", json=criatura_update, headers={"If-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    args, kwargs = mock_service.update_criatura_by_id.await_args
+    assert kwargs == {"versao": 1}
+    # A versão conferida vem do banco, não do cache do processo
+    mock_service.get_versao_criatura_by_id.assert_awaited_with(criatura["id"], cached=False)
+
+    mock_service.update_criatura_by_name.reset_mock()
+    response = await client.put(f"/criaturas/nome/{criatura['nome']}", json=criatura_update, headers={"If-Match": '"desatualizado"'})
+    assert response.status_code == 412
+    mock_service.update_criatura_by_name.assert_not_awaited()
+
+    # Outra escrita entre a leitura da versão e o update
+    mock_service.update_criatura_by_id.side_effect = VersionConflictError()
+    response = await client.put(f"/criaturas/id/{criatura['id']}", json=criatura_update, headers={"If-Match": etag})
+    assert response.status_code == 412
+
+@pytest.mark.asyncio
+async def test_create_criaturas_bulk(client, mock_service, criatura):
+    response = await client.post("/criaturas/bulk", json=[criatura])
+    assert response.status_code == 200
+    assert response.json()["criadas"] == 1
+    mock_service.create_criaturas_bulk.assert_awaited_once_with([criatura])
+
+    # NDJSON: um objeto por linha, linhas em branco são ignoradas
+    mock_service.create_criaturas_bulk.reset_mock()
+    body = json.dumps(criatura) + "\n\n" + json.dumps(criatura) + "\n"
+    response = await client.post("/criaturas/bulk", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    mock_service.create_criaturas_bulk.assert_awaited_once_with([criatura, criatura])
+
+    response = await client.post("/criaturas/bulk", json=criatura)
+    assert response.status_code == 400
+
+    response = await client.post("/criaturas/bulk", content="{}\n{", headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 400
+    assert "Linha 2" in response.json()["detail"]
+
+@pytest.mark.asyncio
+async def test_get_criaturas_lote(client, mock_service, criatura):
+    mock_service.get_criaturas_lote.return_value = {
+        "criaturas": [criatura],
+        "ids_nao_encontrados": [9],
+        "nomes_nao_encontrados": []
+    }
+
+    response = await client.get("/criaturas/lote", params={"ids": "1,9"})
+    assert response.status_code == 200
+    assert response.json()["ids_nao_encontrados"] == [9]
+    mock_service.get_criaturas_lote.assert_awaited_once_with([1, 9], [])
+
+    mock_service.get_criaturas_lote.reset_mock()
+    response = await client.post("/criaturas/lote", json={"ids": [1], "nomes": ["Iara"]})
+    assert response.status_code == 200
+    mock_service.get_criaturas_lote.assert_awaited_once_with([1], ["Iara"])
+
+    assert (await client.get("/criaturas/lote", params={"ids": "1,x"})).status_code == 400
+    assert (await client.post("/criaturas/lote", json={})).status_code == 400
+    assert (await client.post("/criaturas/lote", json={"ids": list(range(1001))})).status_code == 413
+
+@pytest.mark.asyncio
+async def test_get_estatisticas(client, mock_service):
+    mock_service.get_estatisticas.return_value = {
+        "total": 1,
+        "por_regiao": {"Norte": 1},
+        "por_periculosidade": {4: 1},
+        "por_regiao_e_periculosidade": {"Norte": {4: 1}}
+    }
+
+    response = await client.get("/criaturas/estatisticas")
+    assert response.status_code == 200
+    assert response.json()["por_periculosidade"] == {"4": 1}
+    mock_service.get_estatisticas.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_autocomplete_criaturas(client, mock_service):
+    mock_service.autocomplete_criaturas.return_value = [{"id": 1, "nome": "Curupira"}]
+
+    response = await client.get("/criaturas/autocomplete?q=curu&limit=5")
+    assert response.status_code == 200
+    assert response.json() == [{"id": 1, "nome": "Curupira"}]
+    mock_service.autocomplete_criaturas.assert_awaited_once_with("curu", 5)
+
+    mock_service.autocomplete_criaturas.side_effect = AutocompleteDisabledError()
+    response = await client.get("/criaturas/autocomplete?q=curu")
+    assert response.status_code == 503
+
+    response = await client.get("/criaturas/autocomplete?q=")
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_get_criaturas_fields(client, mock_service):
+    mock_service.get_criaturas_page_rows.return_value = ([("Curupira", 1)], None)
+
+    response = await client.get("/criaturas/", params={"fields": "nome,id", "limit": 10})
+    assert response.status_code == 200
+    assert response.json() == [{"nome": "Curupira", "id": 1}]
+    # Os campos seguem sempre a ordem do modelo, qualquer que seja a ordem pedida
+    campos = mock_service.get_criaturas_page_rows.await_args.args[0]
+    assert campos == ("nome", "id")
+
+    response = await client.get("/criaturas/", params={"fields": "nome,poder"})
+    assert response.status_code == 400
+    assert "poder" in response.json()["detail"]
+
+@pytest.mark.asyncio
+async def test_get_criatura_fields(client, mock_service, criatura):
+    full_etag = (await client.get(f"/criaturas/id/{criatura['id']}")).headers["ETag"]
+    mock_service.get_campos_criatura_by_id.return_value = {
+        "id": 1,
+        "nome": "Curupira",
+        "versao": 1,
+        "atualizado_em": datetime(2024, 1, 1, 12, 0, 0)
+    }
+
+    response = await client.get(f"/criaturas/id/{criatura['id']}", params={"fields": "id,nome"})
+    assert response.status_code == 200
+    assert response.json() == {"nome": "Curupira", "id": 1}
+    assert response.headers["ETag"] not in ("", full_etag)
+    mock_service.get_campos_criatura_by_id.assert_awaited_once_with(criatura["id"], ("nome", "id"))
+
+    etag = response.headers["ETag"]
+    response = await client.get(f"/criaturas/id/{criatura['id']}", params={"fields": "id,nome"}, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+@pytest.mark.asyncio
+async def test_get_all_criaturas_from_catalog_cache(make_client, catalog_cache, mock_service, criatura):
+    catalog_client = await make_client(catalog_cache=catalog_cache)
+    response = await catalog_client.get("/criaturas/", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.headers["X-Total-Count"] == "1"
+    assert response.json() == [criatura]
+    gzip_etag = response.headers["ETag"]
+
+    # O segundo acesso, em outra codificação, vem do cache sem consultar o serviço
+    response = await catalog_client.get("/criaturas/", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in response.headers
+    assert response.json() == [criatura]
+    assert response.headers["ETag"] != gzip_etag
+    mock_service.get_all_criaturas_rows.assert_awaited_once_with(CAMPOS_CRIATURA, primary=True)
+    mock_service.get_versao_catalogo.assert_awaited_once_with(primary=True)
+    assert (catalog_cache.hits, catalog_cache.misses) == (1, 1)
+
+    response = await catalog_client.get("/criaturas/", headers={"Accept-Encoding": "gzip", "If-None-Match": gzip_etag})
+    assert response.status_code == 304
+
+    # Uma escrita descarta a listagem, que é remontada na próxima leitura
+    catalog_cache.on_saved([])
+    await catalog_client.get("/criaturas/")
+    assert mock_service.get_all_criaturas_rows.await_count == 2
+
+    # Listagens filtradas não passam pelo cache
+    await catalog_client.get("/criaturas/", params={"regiao": "Norte"})
+    assert mock_service.get_all_criaturas_rows.await_count == 2
+
+@pytest.mark.asyncio
+async def test_catalog_cache_after_a_write_checks_the_primary_version(make_client, catalog_cache, mock_service):
+    """
+    Com o cookie de leitura do primário, uma entrada de uma versão anterior do
+    catálogo (escrita em outro processo) é remontada em vez de servida
+    """
+    catalog_client = await make_client(catalog_cache=catalog_cache)
+    await catalog_client.get("/criaturas/")
+    mock_service.get_versao_catalogo.return_value = (8, datetime(2024, 1, 2, 12, 0, 0))
+
+    response = await catalog_client.get("/criaturas/")
+    assert response.headers["ETag"].startswith('"catalogo-7-')
+    assert mock_service.get_all_criaturas_rows.await_count == 1
+
+    catalog_client.cookies.set(PRIMARY_COOKIE, str(int(time.time()) + 60))
+    response = await catalog_client.get("/criaturas/")
+    assert response.headers["ETag"].startswith('"catalogo-8-')
+    assert mock_service.get_all_criaturas_rows.await_count == 2
+
+@pytest.mark.asyncio
+async def test_stream_eventos(make_client, broadcaster):
+    events_client = await make_client(broadcaster=broadcaster)
+    response = await events_client.get("/criaturas/eventos", headers={"Last-Event-ID": "7"})
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/event-stream")
+    assert response.headers["Cache-Control"] == "no-cache"
+    assert response.text.endswith('id: 8\nevent: criada\ndata: {"id": 1, "nome": "Curupira"}\n\n')
+    # O Last-Event-ID tem precedência sobre o parâmetro 'after'
+    assert broadcaster.listen.call_args.args[0] == 7
+
+    await events_client.get("/criaturas/eventos", params={"after": 3})
+    assert broadcaster.listen.call_args.args[0] == 3
+
+    response = await events_client.get("/criaturas/eventos", headers={"Last-Event-ID": "abc"})
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_stream_eventos_disabled(client):
+    response = await client.get("/criaturas/eventos")
+    assert response.status_code == 503
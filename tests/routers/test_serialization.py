@@ -0,0 +1,57 @@
+from datetime import datetime
+from app.routers.api import serialization
+from app.routers.api.serialization import CAMPOS_CRIATURA, choose_encoding, dump_criaturas
+from app.schemas.criatura_schema import CriaturaResponse
+import pytest
+
+@pytest.mark.parametrize("usar_orjson", [True, False])
+def test_dump_criaturas_matches_response_model(monkeypatch, usar_orjson):
+    """
+    O JSON gerado a partir das tuplas deve ser idêntico ao do 'CriaturaResponse',
+    com ou sem o orjson instalado
+    """
+    if usar_orjson and serialization.orjson is None:
+        pytest.skip("orjson não está instalado")
+    if not usar_orjson:
+        monkeypatch.setattr(serialization, "orjson", None)
+
+    criaturas = [
+        CriaturaResponse(
+            id=1,
+            nome="Boitatá",
+            regiao="Sul",
+            periculosidade=5,
+            lenda="Serpente de fogo que protege os campos",
+            versao=2,
+            atualizado_em=datetime(2024, 1, 1, 12, 30, 0, 125)
+        ),
+        CriaturaResponse(
+            id=2,
+            nome="Cuca",
+            regiao="Sudeste",
+            periculosidade=4,
+            lenda="Bruxa com cabeça de jacaré que rapta crianças",
+            versao=1,
+            atualizado_em=datetime(2024, 1, 2)
+        )
+    ]
+    rows = [tuple(getattr(c, campo) if campo != "regiao" else c.regiao.value for campo in CAMPOS_CRIATURA) for c in criaturas]
+
+    esperado = "[" + ",".join(c.model_dump_json() for c in criaturas) + "]"
+    assert dump_criaturas(rows) == esperado.encode()
+    assert dump_criaturas([]) == b"[]"
+
+@pytest.mark.parametrize("accept_encoding, esperado", [
+    ("", "identity"),
+    ("gzip, deflate", "gzip"),
+    ("gzip, br", "br"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("br;q=0, gzip;q=0", "identity"),
+    ("*", "br"),
+    ("deflate", "identity"),
+])
+def test_choose_encoding(accept_encoding, esperado):
+    assert choose_encoding(accept_encoding, {"identity", "gzip", "br"}) == esperado
+
+def test_choose_encoding_without_brotli():
+    assert choose_encoding("br, gzip;q=0.8", {"identity", "gzip"}) == "gzip"
@@ -0,0 +1,148 @@
+import asyncio
+import contextvars
+from collections import namedtuple
+from datetime import datetime
+from unittest.mock import AsyncMock
+from app.exceptions.repository_exceptions import RepositoryError
+from app.schemas.criatura_schema import CriaturaResponse
+from app.services.criatura_loader import BatchLoader, CriaturaLoader
+import pytest
+
+Linha = namedtuple("Linha", ["id", "nome", "regiao", "periculosidade", "lenda", "versao", "atualizado_em"])
+
+CRIATURAS = [
+    Linha(1, "Curupira", "Norte", 4, "Protetor das florestas", 1, datetime(2024, 1, 1)),
+    Linha(2, "Iara", "Norte", 3, "Senhora dos rios e das águas", 1, datetime(2024, 1, 1)),
+    Linha(3, "Cuca", "Sudeste", 4, "Bruxa com cabeça de jacaré", 1, datetime(2024, 1, 1)),
+]
+
+def make_rows(chaves, campo: str) -> list[Linha]:
+    return [linha for linha in CRIATURAS if getattr(linha, campo) in chaves]
+
+@pytest.fixture
+def mock_repository():
+    repository = AsyncMock()
+    repository.select_rows_by_ids.side_effect = lambda ids, campos: make_rows(ids, "id")
+    repository.select_rows_by_names.side_effect = lambda nomes, campos: make_rows(nomes, "nome")
+    return repository
+
+@pytest.fixture
+def loader(mock_repository):
+    return CriaturaLoader(lambda: mock_repository)
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_query(loader, mock_repository):
+    resultados = await asyncio.gather(*(loader.load_by_id(1) for _ in range(5)))
+
+    assert {r.nome for r in resultados} == {"Curupira"}
+    mock_repository.select_rows_by_ids.assert_awaited_once()
+    assert mock_repository.select_rows_by_ids.await_args.args[0] == [1]
+    assert (loader.requests, loader.shared, loader.batches, loader.keys) == (5, 4, 1, 1)
+
+@pytest.mark.asyncio
+async def test_distinct_keys_are_batched(loader, mock_repository):
+    por_id = asyncio.gather(*(loader.load_by_id(id) for id in (1, 2, 42)))
+    por_nome = asyncio.gather(loader.load_by_name("Cuca"), loader.load_by_name("Saci"))
+
+    assert [c and c.nome for c in await por_id] == ["Curupira", "Iara", None]
+    assert [c and c.id for c in await por_nome] == [3, None]
+    mock_repository.select_rows_by_ids.assert_awaited_once()
+    assert sorted(mock_repository.select_rows_by_ids.await_args.args[0]) == [1, 2, 42]
+    mock_repository.select_rows_by_names.assert_awaited_once()
+    assert isinstance((await loader.load_by_id(1)), CriaturaResponse)
+    assert loader.batches == 3
+
+@pytest.mark.asyncio
+async def test_max_batch_dispatches_early(mock_repository):
+    loader = CriaturaLoader(lambda: mock_repository, max_batch=2)
+
+    await asyncio.gather(*(loader.load_by_id(id) for id in (1, 2, 3)))
+
+    assert [sorted(c.args[0]) for c in mock_repository.select_rows_by_ids.await_args_list] == [[1, 2], [3]]
+
+@pytest.mark.asyncio
+async def test_window_batches_lookups_across_ticks():
+    load_many = AsyncMock(side_effect=lambda chaves: {chave: chave * 10 for chave in chaves})
+    loader = BatchLoader(load_many, window=0.05)
+
+    async def depois(chave: int) -> int:
+        await asyncio.sleep(0)
+        return await loader.load(chave)
+
+    assert await asyncio.gather(loader.load(1), depois(2)) == [10, 20]
+    load_many.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_error_reaches_every_waiter(loader, mock_repository):
+    mock_repository.select_rows_by_ids.side_effect = RepositoryError("Erro ao acessar banco de dados")
+
+    resultados = await asyncio.gather(loader.load_by_id(1), loader.load_by_id(2), return_exceptions=True)
+
+    assert all(isinstance(r, RepositoryError) for r in resultados)
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_shared_query():
+    liberar = asyncio.Event()
+
+    async def load_many(chaves):
+        await liberar.wait()
+        return {chave: chave for chave in chaves}
+
+    loader = BatchLoader(load_many)
+    primeira = asyncio.create_task(loader.load(1))
+    segunda = asyncio.create_task(loader.load(1))
+    await asyncio.sleep(0.01)
+    primeira.cancel()
+    liberar.set()
+
+    assert await segunda == 1
+    assert primeira.cancelled()
+
+@pytest.mark.asyncio
+async def test_write_stops_joining_in_flight_queries(mock_repository):
+    """
+    Depois de uma escrita, uma nova busca pela mesma chave não pode aproveitar a
+    consulta iniciada antes dela
+    """
+    liberar = asyncio.Event()
+    consultar = mock_repository.select_rows_by_ids.side_effect
+
+    async def consultar_depois_de_liberar(ids, campos):
+        await liberar.wait()
+        return consultar(ids, campos)
+
+    mock_repository.select_rows_by_ids.side_effect = consultar_depois_de_liberar
+    loader = CriaturaLoader(lambda: mock_repository)
+    antes = asyncio.create_task(loader.load_by_id(1))
+    await asyncio.sleep(0.01)
+    loader.on_saved([])
+    depois = asyncio.create_task(loader.load_by_id(1))
+    await asyncio.sleep(0.01)
+    liberar.set()
+
+    assert (await antes).id == (await depois).id == 1
+    assert mock_repository.select_rows_by_ids.await_count == 2
+    assert loader.shared == 0
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("max_batch", [500, 2])
+async def test_batch_does_not_run_in_the_first_callers_context(max_batch):
+    """
+    A consulta do lote serve a todas as requisições: ela não deve enxergar o
+    contexto (o rastro de SQL) da requisição que abriu o lote
+    """
+    requisicao = contextvars.ContextVar("requisicao", default=None)
+    vistos = []
+
+    async def load_many(keys):
+        vistos.append(requisicao.get())
+        return {key: key for key in keys}
+
+    batch_loader = BatchLoader(load_many, max_batch=max_batch)
+
+    async def carregar(nome, key):
+        requisicao.set(nome)
+        return await batch_loader.load(key)
+
+    assert await asyncio.gather(carregar("primeira", 1), carregar("segunda", 2)) == [1, 2]
+    assert vistos == [None]
@@ -1,6 +1,14 @@
+from datetime import datetime
+from collections import namedtuple
+from unittest.mock import AsyncMock
+from app.cache.autocomplete_index import AutocompleteIndex
+from app.cache.criatura_cache import CriaturaCache
+from app.cache.criatura_replica import CriaturaRecord, CriaturaReplica
 from app.models.criatura import Criatura
 from app.exceptions.repository_exceptions import RepositoryError, EntityNotFoundError
-from app.schemas.criatura_schema import CriaturaCreate, CriaturaUpdate
+from app.exceptions.service_exceptions import AutocompleteDisabledError, InvalidCursorError
+from app.schemas.criatura_schema import CriaturaCreate, CriaturaFiltro, CriaturaResponse, CriaturaUpdate, StatusLoteEnum
+from app.services.criatura_service import CriaturaService
 import pytest
 
 @pytest.mark.asyncio
@@ -72,7 +80,7 @@ async def test_update_criatura_by_id_success(service, mock_repository):
     result = await service.update_criatura_by_id(1, data)
 
     assert result.periculosidade == 5
-    mock_repository.update_by_id.assert_awaited_once_with(1, data)
+    mock_repository.update_by_id.assert_awaited_once_with(1, data, versao=None)
 
 @pytest.mark.asyncio
 async def test_update_criatura_by_id_not_found(service, mock_repository):
@@ -84,4 +92,314 @@ async def test_update_criatura_by_id_not_found(service, mock_repository):
 @pytest.mark.asyncio
 async def test_delete_criatura_by_id_success(service, mock_repository):
     await service.delete_criatura_by_id(1)
-    mock_repository.delete_by_id.assert_awaited_once_with(1)
\ No newline at end of file
+    mock_repository.delete_by_id.assert_awaited_once_with(1)
+@pytest.mark.asyncio
+async def test_get_criaturas_page(service, mock_repository):
+    criaturas = [
+        Criatura(id=i, nome=f"Criatura {i}", regiao="Norte", periculosidade=3, lenda="Protetor das florestas")
+        for i in range(1, 4)
+    ]
+    mock_repository.select_all.return_value = criaturas
+
+    page, next_cursor = await service.get_criaturas_page(limit=2)
+
+    assert [c.id for c in page] == [1, 2]
+    mock_repository.select_all.assert_awaited_once_with(filtro=CriaturaFiltro(), limit=3, after=None)
+
+    # A próxima página começa depois do último ID retornado
+    mock_repository.select_all.return_value = criaturas[2:]
+    page, last_cursor = await service.get_criaturas_page(limit=2, after=next_cursor)
+
+    assert [c.id for c in page] == [3]
+    assert last_cursor is None
+    mock_repository.select_all.assert_awaited_with(filtro=CriaturaFiltro(), limit=3, after=[2])
+
+@pytest.mark.asyncio
+async def test_get_criaturas_page_sorted_cursor(service, mock_repository):
+    """
+    Com ordenação por outro campo, o cursor leva o valor desse campo e o ID
+    """
+    criaturas = [
+        Criatura(id=7, nome="Boitatá", regiao="Sul", periculosidade=5, lenda="Protetor das florestas"),
+        Criatura(id=3, nome="Cuca", regiao="Sudeste", periculosidade=4, lenda="Protetor das florestas")
+    ]
+    mock_repository.select_all.return_value = criaturas
+    filtro = CriaturaFiltro(ordenar="-periculosidade")
+
+    _, next_cursor = await service.get_criaturas_page(filtro, limit=1)
+    await service.get_criaturas_page(filtro, limit=1, after=next_cursor)
+
+    mock_repository.select_all.assert_awaited_with(filtro=filtro, limit=2, after=[5, 7])
+
+    # Um cursor de ordenação por ID não serve para a ordenação por periculosidade
+    _, id_cursor = await service.get_criaturas_page(limit=1)
+    with pytest.raises(InvalidCursorError):
+        await service.get_criaturas_page(filtro, limit=1, after=id_cursor)
+
+@pytest.mark.asyncio
+async def test_get_criaturas_page_rows(service, mock_repository):
+    """
+    O caminho por tuplas lê também o campo de ordenação e o ID quando eles não
+    foram pedidos, para montar o mesmo cursor do caminho pelo ORM
+    """
+    Linha = namedtuple("Linha", ["nome", "periculosidade", "id"])
+    mock_repository.select_all_rows.return_value = [Linha("Boitatá", 5, 7), Linha("Cuca", 4, 3)]
+    filtro = CriaturaFiltro(ordenar="-periculosidade")
+
+    page, next_cursor = await service.get_criaturas_page_rows(["nome"], filtro, limit=1)
+
+    assert page == [("Boitatá", 5, 7)]
+    mock_repository.select_all_rows.assert_awaited_once_with(["nome", "periculosidade", "id"], filtro=filtro, limit=2, after=None)
+    await service.get_criaturas_page_rows(["nome"], filtro, limit=1, after=next_cursor)
+    assert mock_repository.select_all_rows.await_args.kwargs["after"] == [5, 7]
+
+@pytest.mark.asyncio
+async def test_get_criaturas_page_without_limit(service, mock_repository):
+    mock_repository.select_all.return_value = []
+    filtro = CriaturaFiltro(regiao="Sul")
+
+    page, next_cursor = await service.get_criaturas_page(filtro)
+
+    assert page == []
+    assert next_cursor is None
+    mock_repository.select_all.assert_awaited_once_with(filtro=filtro, limit=None, after=None)
+
+@pytest.mark.asyncio
+async def test_get_criaturas_page_invalid_cursor(service, mock_repository):
+    with pytest.raises(InvalidCursorError):
+        await service.get_criaturas_page(limit=10, after="não é um cursor")
+    mock_repository.select_all.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_stream_criaturas(service, mock_repository):
+    async def stream(filtro=None, after=None):
+        yield Criatura(id=1, nome="Curupira", regiao="Norte", periculosidade=4, lenda="Protetor das florestas")
+
+    mock_repository.stream_all = stream
+
+    result = [c async for c in service.stream_criaturas()]
+
+    assert result[0].nome == "Curupira"
+
+@pytest.mark.asyncio
+async def test_search_criaturas(service, mock_repository):
+    resultado = {
+        "id": 1,
+        "nome": "Curupira",
+        "regiao": "Norte",
+        "periculosidade": 4,
+        "trecho": "Protetor das <mark>florestas</mark>",
+        "relevancia": -1.5
+    }
+    mock_repository.search.return_value = [resultado]
+
+    result = await service.search_criaturas("floresta", 5)
+
+    assert result[0].trecho == "Protetor das <mark>florestas</mark>"
+    mock_repository.search.assert_awaited_once_with("floresta", 5)
+
+@pytest.mark.asyncio
+async def test_get_criatura_uses_cache(mock_repository):
+    service = CriaturaService(mock_repository, cache=CriaturaCache(max_size=10, ttl=60, negative_ttl=5))
+    criatura = Criatura(id=1, nome="Curupira", regiao="Norte", periculosidade=4, lenda="Protetor das florestas")
+    mock_repository.select_by_id.return_value = criatura
+
+    first = await service.get_criatura_by_id(1)
+    second = await service.get_criatura_by_id(1)
+    by_name = await service.get_criatura_by_name("Curupira")
+
+    assert first == second == by_name
+    mock_repository.select_by_id.assert_awaited_once_with(1)
+    mock_repository.select_by_name.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_get_versao_uncached_ignores_cache(mock_repository):
+    """
+A versão usada no If-Match é lida do banco mesmo com a criatura em cache, que
+pode estar atrás de uma escrita feita por outro processo
+    """
+    service = CriaturaService(mock_repository, cache=CriaturaCache(max_size=10, ttl=60, negative_ttl=5))
+    atualizado_em = datetime(2024, 1, 1)
+    mock_repository.select_by_id.return_value = Criatura(
+        id=1, nome="Curupira", regiao="Norte", periculosidade=4, lenda="Protetor das florestas",
+        versao=1, atualizado_em=atualizado_em
+    )
+    Versao = namedtuple("Versao", ["id", "versao", "atualizado_em"])
+    mock_repository.select_version_by_id.return_value = Versao(1, 3, atualizado_em)
+    await service.get_criatura_by_id(1)
+
+    assert await service.get_versao_criatura_by_id(1) == (1, 1, atualizado_em)
+    assert await service.get_versao_criatura_by_id(1, cached=False) == (1, 3, atualizado_em)
+    mock_repository.select_version_by_id.assert_awaited_once_with(1, primary=True)
+
+@pytest.mark.asyncio
+async def test_get_criatura_caches_misses(mock_repository):
+    service = CriaturaService(mock_repository, cache=CriaturaCache(max_size=10, ttl=60, negative_ttl=5))
+    mock_repository.select_by_name.side_effect = EntityNotFoundError("Não encontrada")
+
+    for _ in range(2):
+        with pytest.raises(EntityNotFoundError):
+            await service.get_criatura_by_name("Mapinguari")
+
+    mock_repository.select_by_name.assert_awaited_once_with("Mapinguari")
+
+@pytest.mark.asyncio
+async def test_get_campos_criatura(service, mock_repository):
+    """
+    Sem cache, apenas os campos pedidos (e os usados no ETag) são lidos do banco
+    """
+    atualizado_em = datetime(2024, 1, 1)
+    mock_repository.select_row_by_id.return_value = ("Curupira", 1, 2, atualizado_em)
+
+    dados = await service.get_campos_criatura_by_id(1, ("nome",))
+
+    mock_repository.select_row_by_id.assert_awaited_once_with(1, ["nome", "id", "versao", "atualizado_em"])
+    assert dados == {"nome": "Curupira", "id": 1, "versao": 2, "atualizado_em": atualizado_em}
+    mock_repository.select_by_id.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_get_campos_criatura_uses_cache(mock_repository):
+    service = CriaturaService(mock_repository, cache=CriaturaCache(max_size=10, ttl=60, negative_ttl=5))
+    criatura = Criatura(id=1, nome="Curupira", regiao="Norte", periculosidade=4, lenda="Protetor das florestas", versao=1)
+    mock_repository.select_by_name.return_value = criatura
+
+    await service.get_criatura_by_name("Curupira")
+    dados = await service.get_campos_criatura_by_name("Curupira", ("nome", "periculosidade"))
+
+    assert dados["periculosidade"] == 4 and dados["versao"] == 1
+    mock_repository.select_by_name.assert_awaited_once()
+    mock_repository.select_row_by_name.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_get_criaturas_lote(service, mock_repository):
+    """
+    As criaturas voltam na ordem pedida, sem repetição, e as chaves que não
+    existem são reportadas
+    """
+    Linha = namedtuple("Linha", ["id", "nome", "regiao", "periculosidade", "lenda", "versao", "atualizado_em"])
+    curupira = Linha(1, "Curupira", "Norte", 4, "Protetor das florestas", 1, datetime(2024, 1, 1))
+    iara = Linha(2, "Iara", "Norte", 3, "Senhora dos rios e das águas", 1, datetime(2024, 1, 1))
+    mock_repository.select_rows_by_ids.return_value = [iara, curupira]
+    mock_repository.select_rows_by_names.return_value = [curupira]
+
+    response = await service.get_criaturas_lote([2, 9, 1, 2], ["Curupira", "Saci"])
+
+    assert [c.id for c in response.criaturas] == [2, 1]
+    assert response.ids_nao_encontrados == [9]
+    assert response.nomes_nao_encontrados == ["Saci"]
+    assert mock_repository.select_rows_by_ids.await_args.args[0] == [2, 9, 1]
+
+@pytest.mark.asyncio
+async def test_get_criaturas_lote_uses_cache(mock_repository):
+    """
+    Com cache, só as chaves ausentes dele vão ao banco, e as que não existem
+    ficam em cache negativo
+    """
+    service = CriaturaService(mock_repository, cache=CriaturaCache(max_size=10, ttl=60, negative_ttl=5))
+    mock_repository.select_by_id.return_value = Criatura(id=1, nome="Curupira", regiao="Norte", periculosidade=4, lenda="Protetor das florestas", versao=1)
+    await service.get_criatura_by_id(1)
+    mock_repository.select_rows_by_ids.return_value = []
+
+    response = await service.get_criaturas_lote([1, 9], ["Curupira"])
+    await service.get_criaturas_lote([9], [])
+
+    assert [c.id for c in response.criaturas] == [1]
+    assert response.ids_nao_encontrados == [9]
+    mock_repository.select_rows_by_ids.assert_awaited_once()
+    assert mock_repository.select_rows_by_ids.await_args.args[0] == [9]
+    mock_repository.select_rows_by_names.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_get_estatisticas(service, mock_repository):
+    """
+    As contagens devem incluir todas as regiões e níveis, com zero onde não há
+    criaturas
+    """
+    Linha = namedtuple("Linha", ["regiao", "periculosidade", "quantidade"])
+    mock_repository.select_statistics.return_value = [Linha("Norte", 4, 2), Linha("Sul", 4, 1), Linha("Sul", 1, 3)]
+
+    estatisticas = await service.get_estatisticas()
+
+    assert estatisticas.total == 6
+    assert estatisticas.por_regiao == {"Norte": 2, "Nordeste": 0, "Centro-Oeste": 0, "Sudeste": 0, "Sul": 4}
+    assert estatisticas.por_periculosidade == {1: 3, 2: 0, 3: 0, 4: 3, 5: 0}
+    assert estatisticas.por_regiao_e_periculosidade["Sul"] == {1: 3, 2: 0, 3: 0, 4: 1, 5: 0}
+
+@pytest.mark.asyncio
+async def test_autocomplete_criaturas(mock_repository):
+    index = AutocompleteIndex()
+    index.build([(1, "Curupira"), (2, "Cuca")])
+    service = CriaturaService(mock_repository, autocomplete=index)
+
+    sugestoes = await service.autocomplete_criaturas("CU", 10)
+
+    assert [(s.id, s.nome) for s in sugestoes] == [(2, "Cuca"), (1, "Curupira")]
+    assert not mock_repository.method_calls
+
+    with pytest.raises(AutocompleteDisabledError):
+        await CriaturaService(mock_repository).autocomplete_criaturas("cu", 10)
+
+@pytest.mark.asyncio
+async def test_create_criaturas_bulk(service, mock_repository):
+    """
+    Itens inválidos não chegam ao repositório e cada item recebe o seu
+    resultado na ordem enviada
+    """
+    lenda = "Protetor das florestas e dos animais"
+    itens = [
+        {"nome": "Curupira", "regiao": "Norte", "periculosidade": 4, "lenda": lenda},
+        {"nome": "X", "regiao": "Marte", "periculosidade": 9, "lenda": lenda},
+        {"nome": "Iara", "regiao": "Norte", "periculosidade": 3, "lenda": lenda},
+    ]
+    mock_repository.bulk_insert.return_value = [Criatura(id=7, nome="Curupira"), None]
+
+    response = await service.create_criaturas_bulk(itens)
+
+    validos = mock_repository.bulk_insert.await_args.args[0]
+    assert [c.nome for c in validos] == ["Curupira", "Iara"]
+    assert (response.criadas, response.conflitos, response.invalidas) == (1, 1, 1)
+    assert [r.status for r in response.resultados] == [StatusLoteEnum.criada, StatusLoteEnum.invalida, StatusLoteEnum.conflito]
+    assert response.resultados[0].id == 7
+    assert "regiao" in response.resultados[1].erro
+    assert response.resultados[2].nome == "Iara"
+
+@pytest.mark.asyncio
+async def test_get_criatura_uses_loader(mock_repository):
+    """
+    Com o loader, as buscas por ID e por nome passam por ele e não pelo
+    repositório da requisição
+    """
+    loader = AsyncMock()
+    loader.load_by_id.return_value = CriaturaResponse(id=1, nome="Curupira", regiao="Norte", periculosidade=4, lenda="Protetor das florestas")
+    loader.load_by_name.return_value = None
+    service = CriaturaService(mock_repository, loader=loader)
+
+    criatura = await service.get_criatura_by_id(1)
+
+    assert criatura.nome == "Curupira"
+    loader.load_by_id.assert_awaited_once_with(1)
+    with pytest.raises(EntityNotFoundError):
+        await service.get_criatura_by_name("Saci")
+    assert not mock_repository.method_calls
+
+@pytest.mark.asyncio
+async def test_reads_use_replica(mock_repository):
+    """
+    Com a réplica, as leituras não chegam ao repositório; as escritas, sim
+    """
+    replica = CriaturaReplica()
+    replica.build([CriaturaRecord(1, "Curupira", "Norte", 4, "Protetor das florestas", 1, datetime(2024, 1, 1))])
+    service = CriaturaService(mock_repository, replica=replica)
+
+    assert (await service.get_criatura_by_name("Curupira")).id == 1
+    assert await service.count_criaturas(CriaturaFiltro(regiao="Norte")) == 1
+    assert (await service.get_estatisticas()).por_regiao["Norte"] == 1
+    assert not mock_repository.method_calls
+
+    await service.delete_criatura_by_id(1)
+    mock_repository.delete_by_id.assert_awaited_once_with(1)
+
+    # A listagem materializada é montada a partir do primário, nunca da réplica
+    mock_repository.select_all_rows.return_value = [(1, "Curupira")]
+    assert await service.get_all_criaturas_rows(("id", "nome"), primary=True) == [(1, "Curupira")]
+    mock_repository.select_all_rows.assert_awaited_once_with(("id", "nome"), primary=True)
@@ -0,0 +1,208 @@
+import asyncio
+from collections import namedtuple
+from datetime import datetime
+from unittest.mock import AsyncMock
+from app.services.event_broadcaster import HEARTBEAT, EventBroadcaster, format_retry, format_row
+import pytest
+
+Evento = namedtuple("Evento", ["id", "tipo", "criatura_id", "nome", "versao", "criado_em"])
+Limites = namedtuple("Limites", ["primeiro", "ultimo"])
+
+class Outbox:
+    """
+    Outbox em memória com a mesma interface do 'CriaturaRepository'
+    """
+    def __init__(self):
+        self.eventos: list[Evento] = []
+        self.ultimo = 0
+        self.repository = AsyncMock()
+        self.repository.select_events_after.side_effect = self.select_events_after
+        self.repository.select_event_bounds.side_effect = self.select_event_bounds
+
+    def add(self, tipo="criada", nome="Curupira"):
+        self.ultimo += 1
+        self.eventos.append(Evento(self.ultimo, tipo, self.ultimo, nome, 1, datetime(2024, 1, 1)))
+
+    def prune(self, id):
+        self.eventos = [evento for evento in self.eventos if evento.id > id]
+
+    async def select_events_after(self, after, limit):
+        return [evento for evento in self.eventos if evento.id > after][:limit]
+
+    async def select_event_bounds(self):
+        if not self.eventos:
+            return Limites(0, 0)
+        return Limites(self.eventos[0].id, self.eventos[-1].id)
+
+@pytest.fixture
+def outbox():
+    return Outbox()
+
+@pytest.fixture
+def broadcaster(outbox):
+    return EventBroadcaster(lambda: outbox.repository, buffer_size=3, queue_size=2, batch_size=2)
+
+async def subscribe(broadcaster, after=None, heartbeat=60):
+    stream = broadcaster.listen(after, heartbeat)
+    assert await anext(stream) == format_retry(3000)
+    return stream
+
+async def take(stream, n):
+    return [await asyncio.wait_for(anext(stream), 1) for _ in range(n)]
+
+def frames(outbox, *ids):
+    por_id = {evento.id: evento for evento in outbox.eventos}
+    return [format_row(por_id[id]) for id in ids]
+
+@pytest.mark.asyncio
+async def test_each_event_is_fetched_once_for_all_subscribers(broadcaster, outbox):
+    outbox.add()
+    streams = [await subscribe(broadcaster) for _ in range(3)]
+    assert len(broadcaster) == 3
+
+    outbox.add("atualizada")
+    outbox.add("removida")
+    outbox.repository.select_events_after.reset_mock()
+    assert await broadcaster.fetch() == 2
+
+    # Uma página de 'batch_size' cheia e outra vazia, qualquer que seja o número de assinantes
+    assert outbox.repository.select_events_after.await_count == 2
+    for stream in streams:
+        assert await take(stream, 2) == frames(outbox, 2, 3)
+    assert (broadcaster.fetched, broadcaster.delivered) == (2, 6)
+
+@pytest.mark.asyncio
+async def test_resume_from_buffer_without_reading_the_database(broadcaster, outbox):
+    primeiro = await subscribe(broadcaster)
+    for _ in range(3):
+        outbox.add()
+    await broadcaster.fetch()
+    outbox.repository.select_events_after.reset_mock()
+
+    stream = await subscribe(broadcaster, after=1)
+
+    assert await take(stream, 2) == frames(outbox, 2, 3)
+    outbox.repository.select_events_after.assert_not_awaited()
+    assert broadcaster.replayed == 0
+    await primeiro.aclose()
+
+@pytest.mark.asyncio
+async def test_resume_older_than_buffer_replays_from_the_database(outbox):
+    broadcaster = EventBroadcaster(lambda: outbox.repository, buffer_size=3, batch_size=2)
+    primeiro = await subscribe(broadcaster)
+    for _ in range(5):
+        outbox.add()
+    await broadcaster.fetch()
+
+    stream = await subscribe(broadcaster, after=0)
+
+    # Só os eventos anteriores ao buffer são relidos do banco
+    assert await take(stream, 5) == frames(outbox, 1, 2, 3, 4, 5)
+    assert broadcaster.replayed == 2
+    outbox.add()
+    await broadcaster.fetch()
+    assert await take(stream, 1) == frames(outbox, 6)
+    await primeiro.aclose()
+
+@pytest.mark.asyncio
+async def test_resume_after_pruned_events_restarts(broadcaster, outbox):
+    for _ in range(5):
+        outbox.add()
+    outbox.prune(3)
+
+    stream = await subscribe(broadcaster, after=1)
+
+    reinicio = await take(stream, 1)
+    assert reinicio == [b'id: 5\nevent: reinicio\ndata: {"ultimo": 5}\n\n']
+    outbox.add()
+    await broadcaster.fetch()
+    assert await take(stream, 1) == frames(outbox, 6)
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_is_disconnected(broadcaster, outbox):
+    lento = await subscribe(broadcaster)
+    rapido = await subscribe(broadcaster)
+
+    for _ in range(2):
+        outbox.add()
+        await broadcaster.fetch()
+        await take(rapido, 1)
+    outbox.add()
+    await broadcaster.fetch()
+
+    # O assinante lento recebe o que já estava na fila e a conexão termina
+    assert broadcaster.dropped == 1
+    assert len(broadcaster) == 1
+    assert await take(lento, 2) == frames(outbox, 1, 2)
+    with pytest.raises(StopAsyncIteration):
+        await anext(lento)
+    assert await take(rapido, 1) == frames(outbox, 3)
+
+@pytest.mark.asyncio
+async def test_heartbeat_when_idle(broadcaster):
+    stream = await subscribe(broadcaster, heartbeat=0.01)
+
+    assert await take(stream, 2) == [HEARTBEAT, HEARTBEAT]
+
+@pytest.mark.asyncio
+async def test_local_write_wakes_the_broadcaster(outbox):
+    broadcaster = EventBroadcaster(lambda: outbox.repository, poll_interval=60)
+    broadcaster.start()
+    try:
+        stream = await subscribe(broadcaster)
+        outbox.add()
+        broadcaster.on_saved([])
+
+        assert await take(stream, 1) == frames(outbox, 1)
+    finally:
+        await broadcaster.stop()
+    with pytest.raises(StopAsyncIteration):
+        await anext(stream)
+
+@pytest.mark.asyncio
+async def test_first_subscriber_skips_events_written_while_idle(broadcaster, outbox):
+    for _ in range(4):
+        outbox.add()
+
+    stream = await subscribe(broadcaster)
+    outbox.add()
+    await broadcaster.fetch()
+
+    assert broadcaster.fetched == 1
+    assert await take(stream, 1) == frames(outbox, 5)
+
+@pytest.mark.asyncio
+async def test_stop_right_after_a_write(outbox):
+    broadcaster = EventBroadcaster(lambda: outbox.repository, poll_interval=60)
+    broadcaster.start()
+    await asyncio.sleep(0)
+
+    # A escrita acorda a tarefa e o desligamento vem antes de ela rodar
+    broadcaster.on_saved([])
+    await asyncio.sleep(0)
+    # 'asyncio.wait' não cancela 'stop' no timeout, só informa se terminou
+    parada = asyncio.ensure_future(broadcaster.stop())
+    terminadas, _ = await asyncio.wait([parada], timeout=1)
+    assert parada in terminadas
+
+@pytest.mark.asyncio
+async def test_retention_must_keep_events(outbox):
+    with pytest.raises(ValueError):
+        EventBroadcaster(lambda: outbox.repository, retention=0)
+
+@pytest.mark.asyncio
+async def test_prune_runs_without_subscribers(outbox):
+    outbox.repository.delete_events_up_to.side_effect = lambda id: outbox.prune(id)
+    broadcaster = EventBroadcaster(lambda: outbox.repository, poll_interval=60, retention=2)
+    for _ in range(5):
+        outbox.add()
+    broadcaster.start()
+    try:
+        broadcaster.on_saved([])
+        await asyncio.sleep(0.05)
+    finally:
+        await broadcaster.stop()
+
+    outbox.repository.delete_events_up_to.assert_awaited_once_with(3)
+    assert [evento.id for evento in outbox.eventos] == [4, 5]
+    outbox.repository.select_events_after.assert_not_awaited()
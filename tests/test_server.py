@@ -0,0 +1,22 @@
+from app import server
+
+def test_server_options_use_fast_loop_and_parser_when_installed(monkeypatch):
+    """
+    O uvloop e o httptools devem ser usados quando instalados, com fallback
+    para o asyncio e o h11, e o servidor de produção nunca usa reload
+    """
+    monkeypatch.setattr(server, "is_installed", lambda module: True)
+    options = server.server_options()
+    assert (options["loop"], options["http"]) == ("uvloop", "httptools")
+    assert options["reload"] is False
+    assert options["timeout_graceful_shutdown"] == server.SERVER_GRACEFUL_TIMEOUT
+
+    monkeypatch.setattr(server, "is_installed", lambda module: False)
+    options = server.server_options()
+    assert (options["loop"], options["http"]) == ("asyncio", "h11")
+
+def test_main_runs_uvicorn_with_import_string(monkeypatch):
+    chamadas = []
+    monkeypatch.setattr(server.uvicorn, "run", lambda app, **options: chamadas.append((app, options)))
+    server.main()
+    assert chamadas == [("app.main:app", server.server_options())]
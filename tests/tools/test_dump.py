@@ -0,0 +1,84 @@
+import io
+import json
+from sqlalchemy import text
+from app.database.connection import create_engine
+from app.tools.dump import detect_format, export, import_file
+import pytest
+
+LENDA = "Protetor das florestas e dos animais"
+
+def registros(*nomes):
+    return "".join(json.dumps({"nome": nome, "regiao": "Norte", "periculosidade": 3, "lenda": LENDA}) + "\n" for nome in nomes)
+
+async def nomes_no_banco(url):
+    engine = create_engine(url)
+    async with engine.connect() as conn:
+        response = await conn.execute(text("SELECT nome FROM criaturas ORDER BY id"))
+        nomes = response.scalars().all()
+    await engine.dispose()
+    return nomes
+
+def test_detect_format():
+    assert detect_format("criaturas.csv.gz") == "csv"
+    assert detect_format("criaturas.ndjson") == "ndjson"
+    assert detect_format("criaturas.txt", "csv") == "csv"
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("arquivo,formato,compress", [("dump.ndjson.gz", "ndjson", True), ("dump.csv", "csv", False)])
+async def test_export_then_import_round_trip(tmp_path, arquivo, formato, compress):
+    """
+    O que é exportado de um banco deve ser importado em outro sem perdas, em
+    NDJSON comprimido e em CSV, e importar de novo só gera conflitos
+    """
+    origem = f"sqlite+aiosqlite:///{tmp_path / 'origem.db'}"
+    entrada = tmp_path / "entrada.ndjson"
+    entrada.write_text(registros("Curupira", "Iara", "Saci"), encoding="utf-8")
+    await import_file(origem, str(entrada), "ndjson")
+
+    path = str(tmp_path / arquivo)
+    assert await export(origem, path, formato, compress) == 3
+
+    destino = f"sqlite+aiosqlite:///{tmp_path / 'destino.db'}"
+    resumo = await import_file(destino, path, formato, chunk_size=2)
+    assert (resumo.lidos, resumo.criadas, resumo.conflitos, resumo.invalidas) == (3, 3, 0, 0)
+    assert await nomes_no_banco(destino) == ["Curupira", "Iara", "Saci"]
+
+    resumo = await import_file(destino, path, formato)
+    assert (resumo.criadas, resumo.conflitos) == (0, 3)
+
+@pytest.mark.asyncio
+async def test_import_reports_invalid_records(tmp_path):
+    path = tmp_path / "entrada.ndjson"
+    path.write_text(registros("Curupira") + "{quebrado\n\n" + registros("X") + registros("Iara"), encoding="utf-8")
+    erros = io.StringIO()
+
+    resumo = await import_file(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}", str(path), "ndjson", errors=erros)
+
+    assert (resumo.lidos, resumo.criadas, resumo.invalidas) == (4, 2, 2)
+    linhas = erros.getvalue().splitlines()
+    assert linhas[0].startswith("Linha 2 inválida: JSON inválido")
+    assert linhas[1].startswith("Linha 4 inválida: nome:")
+
+@pytest.mark.asyncio
+async def test_import_resumes_from_checkpoint(tmp_path):
+    """
+    Com um checkpoint, os registros já gravados devem ser pulados; um
+    checkpoint de outra versão do arquivo é recusado
+    """
+    url = f"sqlite+aiosqlite:///{tmp_path / 'test.db'}"
+    path = tmp_path / "entrada.ndjson"
+    path.write_text(registros("Curupira", "Iara", "Saci", "Boto"), encoding="utf-8")
+    checkpoint = tmp_path / "entrada.ndjson.checkpoint"
+    checkpoint.write_text(json.dumps({"tamanho": path.stat().st_size, "registros": 2}), encoding="utf-8")
+
+    resumo = await import_file(url, str(path), "ndjson")
+
+    assert (resumo.lidos, resumo.criadas) == (4, 2)
+    assert await nomes_no_banco(url) == ["Saci", "Boto"]
+    assert not checkpoint.exists()
+
+    checkpoint.write_text(json.dumps({"tamanho": 1, "registros": 2}), encoding="utf-8")
+    with pytest.raises(ValueError):
+        await import_file(url, str(path), "ndjson")
+    resumo = await import_file(url, str(path), "ndjson", restart=True)
+    assert (resumo.lidos, resumo.criadas, resumo.conflitos) == (4, 2, 2)
@@ -0,0 +1,31 @@
+import asyncio
+from sqlalchemy import text
+from app.database.connection import create_engine
+from app.database.schema import init_schema
+from app.tools.outbox import main
+import pytest
+
+async def triggers(url):
+    engine = create_engine(url)
+    async with engine.connect() as conn:
+        response = await conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'criaturas_eventos%' ORDER BY name"))
+        nomes = response.scalars().all()
+    await engine.dispose()
+    return nomes
+
+@pytest.mark.asyncio
+async def test_enable_and_disable(tmp_path):
+    """
+    Com SCHEMA_BOOTSTRAP=none a aplicação não mexe nas triggers do outbox; a
+    ferramenta é o passo explícito que as cria e remove
+    """
+    url = f"sqlite+aiosqlite:///{tmp_path / 'test.db'}"
+    engine = create_engine(url)
+    await init_schema(engine, "alembic")
+    await engine.dispose()
+
+    await asyncio.to_thread(main, ["--enable", "--database-url", url])
+    assert await triggers(url) == ["criaturas_eventos_ad", "criaturas_eventos_ai", "criaturas_eventos_au"]
+
+    await asyncio.to_thread(main, ["--disable", "--database-url", url])
+    assert await triggers(url) == []